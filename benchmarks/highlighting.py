@@ -0,0 +1,190 @@
+"""
+Compares ``haystack.utils.highlighting.Highlighter`` against the highlighter it
+replaced (kept below as ``OldHighlighter``), checking both give the same output.
+
+Run from the root of the checkout::
+
+    python benchmarks/highlighting.py [--words 20000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+# Import the checkout's ``haystack``, not an installed copy (or none at all).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+from django.utils.html import strip_tags  # noqa: E402
+
+if not settings.configured:
+    settings.configure(
+        HAYSTACK_CONNECTIONS={
+            "default": {"ENGINE": "haystack.backends.simple_backend.SimpleEngine"}
+        }
+    )
+
+from haystack.utils.highlighting import Highlighter  # noqa: E402
+
+
+class OldHighlighter(Highlighter):
+    """The highlighter as it was, searching once per word & window."""
+
+    def find_highlightable_words(self):
+        word_positions = {}
+        end_offset = len(self.text_block)
+        lower_text_block = self.text_block.lower()
+
+        for word in self.query_words:
+            word_positions[word] = []
+            start_offset = 0
+
+            while start_offset < end_offset:
+                next_offset = lower_text_block.find(word, start_offset, end_offset)
+
+                if next_offset == -1:
+                    break
+
+                word_positions[word].append(next_offset)
+                start_offset = next_offset + len(word)
+
+        return word_positions
+
+    def find_window(self, highlight_locations):
+        best_start = 0
+        best_end = self.max_length
+        words_found = []
+
+        for offset_list in highlight_locations.values():
+            words_found.extend(offset_list)
+
+        if not words_found:
+            return (best_start, best_end)
+
+        if len(words_found) == 1:
+            return (words_found[0], words_found[0] + self.max_length)
+
+        words_found = sorted(words_found)
+        highest_density = 0
+
+        if words_found[0] > self.max_length:
+            best_start = words_found[0]
+            best_end = best_start + self.max_length
+
+        for count, start in enumerate(words_found[:-1]):
+            current_density = 1
+
+            for end in words_found[count + 1 :]:
+                if end - start < self.max_length:
+                    current_density += 1
+                else:
+                    current_density = 0
+
+                if current_density > highest_density:
+                    best_start = start
+                    best_end = start + self.max_length
+                    highest_density = current_density
+
+        return (best_start, best_end)
+
+    def render_html(self, highlight_locations=None, start_offset=None, end_offset=None):
+        text = self.text_block[start_offset:end_offset]
+        term_list = []
+
+        for term, locations in highlight_locations.items():
+            term_list += [(loc - start_offset, term) for loc in locations]
+
+        if self.css_class:
+            hl_start = '<%s class="%s">' % (self.html_tag, self.css_class)
+        else:
+            hl_start = "<%s>" % (self.html_tag)
+
+        hl_end = "</%s>" % self.html_tag
+        highlighted_chunk = ""
+        matched_so_far = 0
+        prev = 0
+        prev_str = ""
+
+        for cur, cur_str in sorted(term_list):
+            actual_term = text[cur : cur + len(cur_str)]
+
+            if actual_term.lower() == cur_str:
+                if cur < prev + len(prev_str):
+                    continue
+
+                highlighted_chunk += (
+                    text[prev + len(prev_str) : cur] + hl_start + actual_term + hl_end
+                )
+                prev = cur
+                prev_str = cur_str
+                matched_so_far = cur + len(actual_term)
+
+        highlighted_chunk += text[matched_so_far:]
+
+        if start_offset > 0:
+            highlighted_chunk = "...%s" % highlighted_chunk
+
+        if end_offset < len(self.text_block):
+            highlighted_chunk = "%s..." % highlighted_chunk
+
+        return highlighted_chunk
+
+
+VOCABULARY = (
+    "search index query haystack django model field facet backend result "
+    "the a of and to in is it that for on with as this was be by"
+).split()
+
+
+def build_document(words, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--query", default="search index Haystack -django")
+    options = parser.parse_args()
+
+    document = build_document(options.words)
+    print(
+        "Highlighting %r in a document of %d words (%d characters)."
+        % (options.query, options.words, len(document))
+    )
+
+    timings = {}
+
+    for highlighter_class in (OldHighlighter, Highlighter):
+        highlighter = highlighter_class(options.query)
+        highlighter.text_block = strip_tags(document)
+        timings[highlighter_class.__name__] = {
+            step: min(timeit.repeat(func, number=1, repeat=options.repeat))
+            for step, func in (
+                ("find_highlightable_words", highlighter.find_highlightable_words),
+                (
+                    "find_window",
+                    lambda: highlighter.find_window(
+                        highlighter.find_highlightable_words()
+                    ),
+                ),
+                ("highlight", lambda: highlighter.highlight(document)),
+            )
+        }
+
+    old, new = OldHighlighter(options.query), Highlighter(options.query)
+    assert old.highlight(document) == new.highlight(document)
+
+    for step in timings["Highlighter"]:
+        old_time = timings["OldHighlighter"][step]
+        new_time = timings["Highlighter"][step]
+        print(
+            "%-26s old %9.4fs  new %9.4fs  (%.1fx)"
+            % (step, old_time, new_time, old_time / max(new_time, 1e-9))
+        )
+
+
+if __name__ == "__main__":
+    main()
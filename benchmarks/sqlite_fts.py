@@ -0,0 +1,149 @@
+"""
+Compares the SQLite FTS5 backend against the Whoosh backend, indexing & then
+searching the same generated corpus with each.
+
+Run from the root of the checkout::
+
+    python benchmarks/sqlite_fts.py [--documents 5000] [--words 200] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+# Import the checkout's ``haystack``, not an installed copy (or none at all).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+if not settings.configured:
+    settings.configure(
+        INSTALLED_APPS=["haystack"],
+        HAYSTACK_CONNECTIONS={
+            "default": {
+                "ENGINE": "haystack.backends.whoosh_backend.WhooshEngine",
+                "PATH": tempfile.mkdtemp(prefix="haystack-whoosh-"),
+            },
+            "sqlite_fts": {
+                "ENGINE": "haystack.backends.sqlite_fts_backend.SQLiteFTSEngine",
+                "PATH": tempfile.mkdtemp(prefix="haystack-sqlite-fts-") + "/index.db",
+            },
+        },
+    )
+    django.setup()
+
+from django.db import models  # noqa: E402
+
+from haystack import connections, indexes  # noqa: E402
+from haystack.query import SearchQuerySet  # noqa: E402
+from haystack.utils.loading import UnifiedIndex  # noqa: E402
+
+
+class Document(models.Model):
+    author = models.CharField(max_length=255)
+    body = models.TextField()
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        app_label = "haystack"
+        managed = False
+
+
+class DocumentIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True, model_attr="body")
+    author = indexes.CharField(model_attr="author", faceted=True)
+    pub_date = indexes.DateTimeField(model_attr="pub_date")
+
+    def get_model(self):
+        return Document
+
+
+VOCABULARY = (
+    "search index query haystack django model field facet backend result "
+    "sqlite whoosh engine document token stem rank score boost highlight "
+    "the a of and to in is it that for on with as this was be by"
+).split()
+
+
+def build_corpus(documents, words, seed=0):
+    rng = random.Random(seed)
+    return [
+        Document(
+            pk=pk,
+            author="author%d" % rng.randrange(10),
+            body=" ".join(rng.choice(VOCABULARY) for _ in range(words)),
+            pub_date=datetime(2009, 1, 1) + timedelta(hours=pk),
+        )
+        for pk in range(1, documents + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--query", default="haystack sqlite")
+    options = parser.parse_args()
+
+    corpus = build_corpus(options.documents, options.words)
+    print(
+        "Indexing %d documents of %d words, then searching for %r."
+        % (options.documents, options.words, options.query)
+    )
+
+    index = DocumentIndex()
+    timings = {}
+    hits = {}
+
+    for alias in ("default", "sqlite_fts"):
+        unified_index = UnifiedIndex()
+        unified_index.build(indexes=[index])
+        connections[alias]._index = unified_index
+        backend = connections[alias].get_backend()
+        backend.silently_fail = False
+        backend.clear()
+
+        def index_corpus():
+            backend.clear()
+            backend.update(index, corpus)
+
+        sqs = SearchQuerySet(alias).filter(content=options.query)
+        steps = (
+            ("index", index_corpus, 1),
+            ("search", lambda: list(sqs._clone()[:20]), options.repeat),
+            ("filter", lambda: sqs._clone().filter(author="author3").count(), 1),
+            ("facet", lambda: sqs._clone().facet("author").facet_counts(), 1),
+            (
+                "order_by",
+                lambda: list(sqs._clone().order_by("-pub_date")[:20]),
+                options.repeat,
+            ),
+        )
+        timings[alias] = {
+            step: min(timeit.repeat(func, number=1, repeat=repeat))
+            for step, func, repeat in steps
+        }
+        hits[alias] = sqs._clone().count()
+        backend.clear()
+
+    print(
+        "Hits: whoosh %d, sqlite_fts %d (stemming may differ)."
+        % (hits["default"], hits["sqlite_fts"])
+    )
+
+    for step in timings["sqlite_fts"]:
+        whoosh_time = timings["default"][step]
+        sqlite_time = timings["sqlite_fts"][step]
+        print(
+            "%-10s whoosh %9.4fs  sqlite_fts %9.4fs  (%.1fx)"
+            % (step, whoosh_time, sqlite_time, whoosh_time / max(sqlite_time, 1e-9))
+        )
+
+
+if __name__ == "__main__":
+    main()
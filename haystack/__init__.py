@@ -74,3 +74,14 @@ if settings.DEBUG:
     from django.core import signals as django_signals
 
     django_signals.request_started.connect(reset_search_queries)
+
+
+# Per-request, share the objects ``load_all`` loads between querysets. It's
+# opt-in, as the same instances then end up in every queryset of the request.
+if getattr(settings, "HAYSTACK_IDENTITY_MAP", False):
+    from django.core import signals as django_signals
+
+    from haystack.utils.identity_map import end_identity_map, start_identity_map
+
+    django_signals.request_started.connect(start_identity_map)
+    django_signals.request_finished.connect(end_identity_map)
@@ -1,13 +1,14 @@
 from django.contrib.admin.options import ModelAdmin, csrf_protect_m
 from django.contrib.admin.views.main import SEARCH_VAR, ChangeList
 from django.core.exceptions import PermissionDenied
-from django.core.paginator import InvalidPage, Paginator
+from django.core.paginator import InvalidPage
 from django.shortcuts import render
 from django.utils.encoding import force_str
 from django.utils.translation import ungettext
 
 from haystack import connections
 from haystack.constants import DEFAULT_ALIAS
+from haystack.paginator import SearchPaginator
 from haystack.query import SearchQuerySet
 from haystack.utils import get_model_ct_tuple
 
@@ -29,17 +30,10 @@ class SearchChangeList(ChangeList):
             .load_all()
         )
 
-        paginator = Paginator(sqs, self.list_per_page)
-        # Get the number of objects, with admin filters applied.
-        result_count = paginator.count
-        full_result_count = (
-            SearchQuerySet(self.haystack_connection).models(self.model).all().count()
-        )
+        paginator = SearchPaginator(sqs, self.list_per_page)
 
-        can_show_all = result_count <= self.list_max_show_all
-        multi_page = result_count > self.list_per_page
-
-        # Get the list of objects to display on this page.
+        # Get the list of objects to display on this page. This comes first so
+        # the count is fetched along with the page.
         try:
             result_list = paginator.page(self.page_num + 1).object_list
             # Grab just the Django models, since that's what everything else is
@@ -48,6 +42,15 @@ class SearchChangeList(ChangeList):
         except InvalidPage:
             result_list = ()
 
+        # Get the number of objects, with admin filters applied.
+        result_count = paginator.count
+        full_result_count = (
+            SearchQuerySet(self.haystack_connection).models(self.model).all().count()
+        )
+
+        can_show_all = result_count <= self.list_max_show_all
+        multi_page = result_count > self.list_per_page
+
         self.result_count = result_count
         self.full_result_count = full_result_count
         self.result_list = result_list
@@ -1,8 +1,14 @@
+import asyncio
 import copy
-from copy import deepcopy
+import inspect
+import re
+import threading
+from functools import lru_cache
 from time import time
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.db.models import Q
 from django.db.models.base import ModelBase
 from django.utils import tree
@@ -13,17 +19,67 @@ from haystack.exceptions import FacetingError, MoreLikeThisError
 from haystack.models import SearchResult
 from haystack.utils import get_model_ct
 from haystack.utils.loading import UnifiedIndex
+from haystack.utils.query_cache import QueryCache
 
 VALID_GAPS = ["year", "month", "day", "hour", "minute", "second"]
 
 SPELLING_SUGGESTION_HAS_NOT_RUN = object()
 
 
+@lru_cache(maxsize=None)
+def reserved_characters_pattern(reserved_characters):
+    """
+    Returns a compiled regex matching any of a backend's reserved characters
+    (longest first), or ``None`` if it doesn't reserve any.
+    """
+    if not reserved_characters:
+        return None
+
+    return re.compile(
+        "|".join(
+            re.escape(char)
+            for char in sorted(reserved_characters, key=len, reverse=True)
+        )
+    )
+
+
+def record_query(obj, query_string, args, kwargs, start):
+    """
+    Adds a search query to the connection's pseudo-log, when ``DEBUG`` is on.
+    """
+    stop = time()
+
+    if settings.DEBUG:
+        from haystack import connections
+
+        connections[obj.connection_alias].queries.append(
+            {
+                "query_string": query_string,
+                "additional_args": args,
+                "additional_kwargs": kwargs,
+                "time": "%.3f" % (stop - start),
+                "start": start,
+                "stop": stop,
+            }
+        )
+
+
 def log_query(func):
     """
     A decorator for pseudo-logging search queries. Used in the ``SearchBackend``
-    to wrap the ``search`` method.
+    to wrap the ``search`` method (and its native async counterpart).
     """
+    if inspect.iscoroutinefunction(func):
+
+        async def async_wrapper(obj, query_string, *args, **kwargs):
+            start = time()
+
+            try:
+                return await func(obj, query_string, *args, **kwargs)
+            finally:
+                record_query(obj, query_string, args, kwargs, start)
+
+        return async_wrapper
 
     def wrapper(obj, query_string, *args, **kwargs):
         start = time()
@@ -31,21 +87,25 @@ def log_query(func):
         try:
             return func(obj, query_string, *args, **kwargs)
         finally:
-            stop = time()
-
-            if settings.DEBUG:
-                from haystack import connections
-
-                connections[obj.connection_alias].queries.append(
-                    {
-                        "query_string": query_string,
-                        "additional_args": args,
-                        "additional_kwargs": kwargs,
-                        "time": "%.3f" % (stop - start),
-                        "start": start,
-                        "stop": stop,
-                    }
-                )
+            record_query(obj, query_string, args, kwargs, start)
+
+    return wrapper
+
+
+def invalidates_query_cache(func):
+    """
+    A decorator for the ``SearchBackend`` methods that change the index, so
+    any query results cached before the change are no longer used.
+
+    Queries can opt in to the cache without the connection having a ``CACHE``
+    of its own, so the cache they'd use is always invalidated.
+    """
+
+    def wrapper(obj, *args, **kwargs):
+        try:
+            return func(obj, *args, **kwargs)
+        finally:
+            obj.get_query_cache().invalidate()
 
     return wrapper
 
@@ -80,6 +140,49 @@ class BaseSearchBackend:
         self.batch_size = connection_options.get("BATCH_SIZE", 1000)
         self.silently_fail = connection_options.get("SILENTLY_FAIL", True)
         self.distance_available = connection_options.get("DISTANCE_AVAILABLE", False)
+        self.cache_alias = connection_options.get("CACHE")
+        self.cache_timeout = connection_options.get("CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+        self.setup_complete = False
+        self.setup_lock = threading.RLock()
+        # Async clients are bound to an event loop, which is per thread.
+        self._async_local = threading.local()
+
+    def ensure_setup(self):
+        """
+        Runs ``setup`` unless it's already been done.
+
+        Backends are shared between threads, so this only lets one of them
+        set up the backend; the rest wait for it to finish.
+        """
+        if self.setup_complete:
+            return
+
+        with self.setup_lock:
+            if not self.setup_complete:
+                self.setup()
+
+    def setup(self):
+        """
+        Prepares the engine (creating indexes, mappings, etc.) before it's
+        first used. Called through ``ensure_setup``.
+
+        Backends that need no preparation can leave this alone.
+        """
+        self.setup_complete = True
+
+    def get_query_cache(self):
+        """
+        Returns the ``QueryCache`` that query results for this connection are
+        stored in.
+        """
+        return QueryCache(self.connection_alias, self.cache_alias, self.cache_timeout)
+
+    def get_pool_stats(self):
+        """
+        Returns how much of the shared HTTP connection pool is in use, as a
+        dictionary, or ``None`` for backends that don't pool connections.
+        """
+        return None
 
     def update(self, index, iterable, commit=True):
         """
@@ -128,6 +231,136 @@ class BaseSearchBackend:
         """
         raise NotImplementedError
 
+    def multi_search(self, searches):
+        """
+        Takes a list of ``(query_string, kwargs)`` pairs and returns a list of
+        the dictionaries ``search`` gives for each of them, in the same order.
+
+        By default, the searches are run one after another. Backends that can
+        send several searches at once should override this.
+        """
+        return [
+            self.search(query_string, **kwargs) for query_string, kwargs in searches
+        ]
+
+    def build_async_conn(self):
+        """
+        Returns an asynchronous client for ``asearch`` to query the engine
+        with, or ``None`` if there isn't one available.
+
+        Backends that return a client here MUST implement ``_native_asearch``.
+        """
+        return None
+
+    async def close_async_conn(self, conn):
+        """
+        Closes a client from ``build_async_conn``, once its event loop is
+        shutting down.
+        """
+        await conn.close()
+
+    def get_async_conn(self):
+        """
+        Returns the asynchronous client for the running event loop.
+
+        Async clients hold on to connections bound to the loop they were
+        created in, so a new one is built whenever the loop changes & closed
+        along with the loop.
+        """
+        # Called from a coroutine, this is the running loop.
+        loop = asyncio.get_event_loop()
+
+        if getattr(self._async_local, "loop", None) is not loop:
+            conn = self.build_async_conn()
+            self._async_local.conn = conn
+            self._async_local.loop = loop
+            self._async_local.closer = None
+
+            if conn is not None:
+                # ``asyncio.run`` (& ``async_to_sync``) finalize any async
+                # generators before closing the loop, which closes the client.
+                closer = self._close_async_conn_with_loop(conn)
+                asyncio.ensure_future(closer.__anext__())
+                self._async_local.closer = closer
+
+        return self._async_local.conn
+
+    async def _close_async_conn_with_loop(self, conn):
+        try:
+            yield
+        finally:
+            await self.close_async_conn(conn)
+
+    async def asearch(self, query_string, **kwargs):
+        """
+        Awaitable version of ``search``, taking the same arguments & returning
+        the same dictionary.
+
+        Queries the engine natively when the backend has an asynchronous
+        client. Otherwise, ``search`` is run in a worker thread.
+        """
+        if self.get_async_conn() is None:
+            return await sync_to_async(self.search)(query_string, **kwargs)
+
+        return await self._native_asearch(query_string, **kwargs)
+
+    async def _native_asearch(self, query_string, **kwargs):
+        raise NotImplementedError
+
+    async def amore_like_this(
+        self, model_instance, additional_query_string=None, **kwargs
+    ):
+        """
+        Awaitable version of ``more_like_this``, which is run in a worker
+        thread.
+        """
+        return await sync_to_async(self.more_like_this)(
+            model_instance, additional_query_string, **kwargs
+        )
+
+    def iter_search(self, query_string, chunk_size=None, **kwargs):
+        """
+        Takes a query to search on and yields every match as lists of
+        ``SearchResult`` objects, ``chunk_size`` at a time.
+
+        This generic version pages through ``search`` by offset, so each chunk
+        costs more than the last. Backends should override it to use a cursor
+        when the engine provides one.
+        """
+        if chunk_size is None:
+            chunk_size = self.batch_size
+
+        start_offset = 0
+
+        while True:
+            results = self.search(
+                query_string,
+                start_offset=start_offset,
+                end_offset=start_offset + chunk_size,
+                **kwargs
+            )
+
+            if results.get("results"):
+                yield results["results"]
+
+            start_offset += chunk_size
+
+            if start_offset >= results.get("hits", 0):
+                return
+
+    def iter_facet(self, query_string, field, page_size=None, **kwargs):
+        """
+        Takes a query to search on and yields every ``(value, count)`` of the
+        facet on ``field`` across the matches, fetching ``page_size`` values
+        at a time.
+
+        This method MUST be implemented by each backend that supports it, as
+        paging through facets is highly specific to each one.
+        """
+        raise NotImplementedError(
+            "Subclasses must provide a way to page through facets via the 'iter_facet' method if supported by the backend."
+        )
+
     def build_search_kwargs(
         self,
         query_string,
@@ -288,6 +521,20 @@ class SearchNode(tree.Node):
             )
         return "(%s: %s)" % (self.connector, ", ".join([str(c) for c in self.children]))
 
+    def __copy__(self):
+        """
+        Utility method used by copy.copy().
+
+        Only the root of a query's tree is ever changed (child nodes are
+        rebuilt, never altered, once they're in it), so copies share the
+        child nodes & just get their own lists of them.
+        """
+        obj = SearchNode(connector=self.connector, negated=self.negated)
+        obj.__class__ = self.__class__
+        obj.children = self.children[:]
+        obj.subtree_parents = [copy.copy(parent) for parent in self.subtree_parents]
+        return obj
+
     def __deepcopy__(self, memodict):
         """
         Utility method used by copy.deepcopy().
@@ -487,6 +734,16 @@ class BaseSearchQuery:
         #: and django_id when using code which expects those to be included in
         #: the results
         self.fields = []
+        #: Stored fields to restrict (``only_fields``) or skip
+        #: (``deferred_fields``) when the backend fetches the documents behind
+        #: ``SearchResult`` objects. Both hold index fieldnames.
+        self.only_fields = set()
+        self.deferred_fields = set()
+        #: Whether responses go through the connection's query cache (``None``
+        #: follows the connection's ``CACHE`` option) & for how long, in
+        #: seconds (``None`` uses its ``CACHE_TIMEOUT``).
+        self.use_cache = None
+        self.cache_timeout = None
         # Geospatial-related information
         self.within = {}
         self.dwithin = {}
@@ -504,6 +761,8 @@ class BaseSearchQuery:
         self.spelling_query = None
         self.result_class = SearchResult
         self.stats = {}
+        # What ``build_query`` last returned, until the filters or boosts change.
+        self._built_query = None
         from haystack import connections
 
         self._using = using
@@ -577,29 +836,112 @@ class BaseSearchQuery:
         if self.fields:
             kwargs["fields"] = self.fields
 
+        if self.only_fields:
+            kwargs["only_fields"] = self.only_fields
+
+        if self.deferred_fields:
+            kwargs["deferred_fields"] = self.deferred_fields
+
         if self.models:
             kwargs["models"] = self.models
 
         return kwargs
 
-    def run(self, spelling_query=None, **kwargs):
-        """Builds and executes the query. Returns a list of search results."""
+    def _get_query_cache(self):
+        use_cache = self.use_cache
+
+        if use_cache is None:
+            use_cache = self.backend.cache_alias is not None
+
+        if use_cache:
+            return self.backend.get_query_cache()
+
+        return None
+
+    def _search(self, query_string, **kwargs):
+        """
+        Runs the search on the backend, unless the response is in the query
+        cache.
+        """
+        query_cache = self._get_query_cache()
+
+        if query_cache is None:
+            return self.backend.search(query_string, **kwargs)
+
+        return query_cache.fetch(
+            "search",
+            query_string,
+            kwargs,
+            lambda: self.backend.search(query_string, **kwargs),
+            timeout=self.cache_timeout,
+        )
+
+    def _search_more_like_this(self, model_instance, query_string, **kwargs):
+        """
+        Runs the More Like This on the backend, unless the response is in the
+        query cache.
+        """
+        query_cache = self._get_query_cache()
+
+        if query_cache is None:
+            return self.backend.more_like_this(model_instance, query_string, **kwargs)
+
+        return query_cache.fetch(
+            "more_like_this",
+            query_string,
+            dict(kwargs, model_instance=model_instance),
+            lambda: self.backend.more_like_this(model_instance, query_string, **kwargs),
+            timeout=self.cache_timeout,
+        )
+
+    async def _asearch(self, query_string, **kwargs):
+        """Awaitable version of ``_search``."""
+        query_cache = self._get_query_cache()
+
+        if query_cache is None:
+            return await self.backend.asearch(query_string, **kwargs)
+
+        return await query_cache.afetch(
+            "search",
+            query_string,
+            kwargs,
+            lambda: self.backend.asearch(query_string, **kwargs),
+            timeout=self.cache_timeout,
+        )
+
+    async def _asearch_more_like_this(self, model_instance, query_string, **kwargs):
+        """Awaitable version of ``_search_more_like_this``."""
+        query_cache = self._get_query_cache()
+
+        if query_cache is None:
+            return await self.backend.amore_like_this(
+                model_instance, query_string, **kwargs
+            )
+
+        return await query_cache.afetch(
+            "more_like_this",
+            query_string,
+            dict(kwargs, model_instance=model_instance),
+            lambda: self.backend.amore_like_this(
+                model_instance, query_string, **kwargs
+            ),
+            timeout=self.cache_timeout,
+        )
+
+    def _run_params(self, spelling_query=None, **kwargs):
+        """Returns the query string & kwargs to search the backend with."""
         final_query = self.build_query()
         search_kwargs = self.build_params(spelling_query=spelling_query)
 
         if kwargs:
             search_kwargs.update(kwargs)
 
-        results = self.backend.search(final_query, **search_kwargs)
-        self._results = results.get("results", [])
-        self._hit_count = results.get("hits", 0)
-        self._facet_counts = self.post_process_facets(results)
-        self._spelling_suggestion = results.get("spelling_suggestion", None)
+        return final_query, search_kwargs
 
-    def run_mlt(self, **kwargs):
+    def _mlt_params(self, **kwargs):
         """
-        Executes the More Like This. Returns a list of search results similar
-        to the provided document (and optionally query).
+        Returns the additional query string & kwargs to fetch the More Like
+        This with.
         """
         if self._more_like_this is False or self._mlt_instance is None:
             raise MoreLikeThisError(
@@ -614,27 +956,89 @@ class BaseSearchQuery:
         if kwargs:
             search_kwargs.update(kwargs)
 
-        additional_query_string = self.build_query()
-        results = self.backend.more_like_this(
-            self._mlt_instance, additional_query_string, **search_kwargs
-        )
-        self._results = results.get("results", [])
-        self._hit_count = results.get("hits", 0)
+        return self.build_query(), search_kwargs
 
-    def run_raw(self, **kwargs):
-        """Executes a raw query. Returns a list of search results."""
+    def _raw_params(self, **kwargs):
+        """Returns the kwargs to run the raw query with."""
         search_kwargs = self.build_params()
         search_kwargs.update(self._raw_query_params)
 
         if kwargs:
             search_kwargs.update(kwargs)
 
-        results = self.backend.search(self._raw_query, **search_kwargs)
+        return search_kwargs
+
+    def _search_params(self, **kwargs):
+        """
+        Returns the query string & kwargs that ``get_results`` would search
+        the backend with.
+        """
+        if self._raw_query:
+            return self._raw_query, self._raw_params(**kwargs)
+
+        return self._run_params(**kwargs)
+
+    def _store_search_results(self, results):
+        """Stores a response to the search from ``_search_params``."""
+        if self._raw_query:
+            self._store_raw_results(results)
+        else:
+            self._store_results(results)
+
+    def _store_results(self, results):
+        self._results = results.get("results", [])
+        self._hit_count = results.get("hits", 0)
+        self._facet_counts = self.post_process_facets(results)
+        self._spelling_suggestion = results.get("spelling_suggestion", None)
+
+    def _store_raw_results(self, results):
         self._results = results.get("results", [])
         self._hit_count = results.get("hits", 0)
         self._facet_counts = results.get("facets", {})
         self._spelling_suggestion = results.get("spelling_suggestion", None)
 
+    def run(self, spelling_query=None, **kwargs):
+        """Builds and executes the query. Returns a list of search results."""
+        final_query, search_kwargs = self._run_params(spelling_query, **kwargs)
+        self._store_results(self._search(final_query, **search_kwargs))
+
+    def run_mlt(self, **kwargs):
+        """
+        Executes the More Like This. Returns a list of search results similar
+        to the provided document (and optionally query).
+        """
+        additional_query_string, search_kwargs = self._mlt_params(**kwargs)
+        results = self._search_more_like_this(
+            self._mlt_instance, additional_query_string, **search_kwargs
+        )
+        self._results = results.get("results", [])
+        self._hit_count = results.get("hits", 0)
+
+    def run_raw(self, **kwargs):
+        """Executes a raw query. Returns a list of search results."""
+        search_kwargs = self._raw_params(**kwargs)
+        self._store_raw_results(self._search(self._raw_query, **search_kwargs))
+
+    async def arun(self, spelling_query=None, **kwargs):
+        """Awaitable version of ``run``."""
+        final_query, search_kwargs = self._run_params(spelling_query, **kwargs)
+        self._store_results(await self._asearch(final_query, **search_kwargs))
+
+    async def arun_mlt(self, **kwargs):
+        """Awaitable version of ``run_mlt``."""
+        additional_query_string, search_kwargs = self._mlt_params(**kwargs)
+        results = await self._asearch_more_like_this(
+            self._mlt_instance, additional_query_string, **search_kwargs
+        )
+        self._results = results.get("results", [])
+        self._hit_count = results.get("hits", 0)
+
+    async def arun_raw(self, **kwargs):
+        """Awaitable version of ``run_raw``."""
+        search_kwargs = self._raw_params(**kwargs)
+        results = await self._asearch(self._raw_query, **search_kwargs)
+        self._store_raw_results(results)
+
     def get_count(self):
         """
         Returns the number of results the backend found for the query.
@@ -643,10 +1047,10 @@ class BaseSearchQuery:
         the results.
         """
         if self._hit_count is None:
-            # Limit the slice to 1 so we get a count without consuming
-            # everything.
+            # Ask for no documents at all, so we get a count without consuming
+            # anything.
             if not self.end_offset:
-                self.end_offset = 1
+                self.end_offset = self.start_offset
 
             if self._more_like_this:
                 # Special case for MLT.
@@ -659,6 +1063,21 @@ class BaseSearchQuery:
 
         return self._hit_count
 
+    async def aget_count(self):
+        """Awaitable version of ``get_count``."""
+        if self._hit_count is None:
+            if not self.end_offset:
+                self.end_offset = self.start_offset
+
+            if self._more_like_this:
+                await self.arun_mlt()
+            elif self._raw_query:
+                await self.arun_raw()
+            else:
+                await self.arun()
+
+        return self._hit_count
+
     def get_results(self, **kwargs):
         """
         Returns the results received from the backend.
@@ -678,6 +1097,76 @@ class BaseSearchQuery:
 
         return self._results
 
+    async def aget_results(self, **kwargs):
+        """Awaitable version of ``get_results``."""
+        if self._results is None:
+            if self._more_like_this:
+                await self.arun_mlt(**kwargs)
+            elif self._raw_query:
+                await self.arun_raw(**kwargs)
+            else:
+                await self.arun(**kwargs)
+
+        return self._results
+
+    def iter_results(self, chunk_size=None, **kwargs):
+        """
+        Yields every result received from the backend, ``chunk_size`` at a
+        time, without storing them on the query.
+
+        Any limits set on the query are ignored.
+        """
+        if self._more_like_this:
+            # Special case for MLT, which has no cursor to stream with.
+            if chunk_size is None:
+                chunk_size = self.backend.batch_size
+
+            start_offset = 0
+
+            while True:
+                clone = self._clone()
+                clone.set_limits(start_offset, start_offset + chunk_size)
+                results = clone.get_results(**kwargs)
+
+                if not results:
+                    return
+
+                yield results
+                start_offset += chunk_size
+
+        # Build the query as ``get_results`` would, filters & all.
+        query_string, search_kwargs = self._search_params(**kwargs)
+        search_kwargs.pop("start_offset", None)
+        search_kwargs.pop("end_offset", None)
+
+        yield from self.backend.iter_search(
+            query_string, chunk_size=chunk_size, **search_kwargs
+        )
+
+    def iter_facet(self, field, page_size=None, **kwargs):
+        """
+        Yields every ``(value, count)`` of the facet on ``field`` for the
+        query, ``page_size`` values at a time, without running the query.
+        """
+        query_string, search_kwargs = self._search_params(**kwargs)
+
+        # Only which documents match matters, not how they'd be presented.
+        for key in (
+            "start_offset",
+            "end_offset",
+            "sort_by",
+            "highlight",
+            "facets",
+            "date_facets",
+            "query_facets",
+            "spelling_query",
+        ):
+            search_kwargs.pop(key, None)
+
+        yield from self.backend.iter_facet(
+            query_string, field, page_size=page_size, **search_kwargs
+        )
+
     def get_facet_counts(self):
         """
         Returns the facet counts received from the backend.
@@ -690,6 +1179,13 @@ class BaseSearchQuery:
 
         return self._facet_counts
 
+    async def aget_facet_counts(self):
+        """Awaitable version of ``get_facet_counts``."""
+        if self._facet_counts is None:
+            await self.arun()
+
+        return self._facet_counts
+
     def get_stats(self):
         """
         Returns the stats received from the backend.
@@ -716,6 +1212,13 @@ class BaseSearchQuery:
 
         return self._spelling_suggestion
 
+    async def aget_spelling_suggestion(self, preferred_query=None):
+        """Awaitable version of ``get_spelling_suggestion``."""
+        if self._spelling_suggestion is SPELLING_SUGGESTION_HAS_NOT_RUN:
+            await self.arun(spelling_query=preferred_query)
+
+        return self._spelling_suggestion
+
     def boost_fragment(self, boost_word, boost_value):
         """Generates query fragment for boosting a single word/value pair."""
         return "%s^%s" % (boost_word, boost_value)
@@ -728,8 +1231,22 @@ class BaseSearchQuery:
         """
         Interprets the collected query metadata and builds the final query to
         be sent to the backend.
+
+        The result is kept until ``add_filter`` or ``add_boost`` changes the
+        query, so code that alters ``query_filter`` or ``boost`` directly
+        needs to call ``clear_built_query`` afterwards.
+        """
+        if self._built_query is None:
+            self._built_query = self.build_query_string(self.query_filter)
+
+        return self._built_query
+
+    def build_query_string(self, query_filter):
+        """
+        Builds the query string for a tree of ``SQ`` objects, followed by the
+        query's boosts.
         """
-        final_query = self.query_filter.as_query_string(self.build_query_fragment)
+        final_query = query_filter.as_query_string(self.build_query_fragment)
 
         if not final_query:
             # Match all.
@@ -745,6 +1262,10 @@ class BaseSearchQuery:
 
         return final_query
 
+    def clear_built_query(self):
+        """Forgets the query string ``build_query`` last built."""
+        self._built_query = None
+
     def combine(self, rhs, connector=SQ.AND):
         if connector == SQ.AND:
             self.add_filter(rhs.query_filter)
@@ -775,19 +1296,18 @@ class BaseSearchQuery:
         if not isinstance(query_fragment, str):
             return query_fragment
 
-        words = query_fragment.split()
-        cleaned_words = []
-
-        for word in words:
-            if word in self.backend.RESERVED_WORDS:
-                word = word.replace(word, word.lower())
-
-            for char in self.backend.RESERVED_CHARACTERS:
-                word = word.replace(char, "\\%s" % char)
+        reserved_words = self.backend.RESERVED_WORDS
+        cleaned = " ".join(
+            word.lower() if word in reserved_words else word
+            for word in query_fragment.split()
+        )
+        pattern = reserved_characters_pattern(tuple(self.backend.RESERVED_CHARACTERS))
 
-            cleaned_words.append(word)
+        if pattern is None:
+            return cleaned
 
-        return " ".join(cleaned_words)
+        # Escapes every reserved character in a single pass.
+        return pattern.sub(r"\\\g<0>", cleaned)
 
     def build_not_query(self, query_string):
         if " " in query_string:
@@ -802,6 +1322,8 @@ class BaseSearchQuery:
         """
         Adds a SQ to the current query.
         """
+        self.clear_built_query()
+
         if use_or:
             connector = SQ.OR
         else:
@@ -871,9 +1393,45 @@ class BaseSearchQuery:
         """Clears any existing limits."""
         self.start_offset, self.end_offset = 0, None
 
+    def add_only_fields(self, fields):
+        """
+        Restricts the stored fields fetched for each result to ``fields``.
+
+        Like Django's ``QuerySet.only``, this replaces any previous call.
+        """
+        from haystack import connections
+
+        unified_index = connections[self._using].get_unified_index()
+        self.only_fields = {
+            unified_index.get_index_fieldname(field) for field in fields
+        }
+
+    def add_deferred_fields(self, fields):
+        """Skips fetching the given stored fields for each result."""
+        from haystack import connections
+
+        unified_index = connections[self._using].get_unified_index()
+        self.deferred_fields.update(
+            unified_index.get_index_fieldname(field) for field in fields
+        )
+
+    def clear_deferred_fields(self):
+        """Clears out all deferred fields, fetching every stored field again."""
+        self.deferred_fields = set()
+
+    def set_cache(self, timeout=None):
+        """
+        Caches the query's results for ``timeout`` seconds, or the connection's
+        ``CACHE_TIMEOUT`` if not provided. A ``timeout`` of ``0`` skips the
+        cache entirely.
+        """
+        self.use_cache = timeout != 0
+        self.cache_timeout = timeout
+
     def add_boost(self, term, boost_value):
         """Adds a boosted term and the amount to boost it to the query."""
         self.boost[term] = boost_value
+        self.clear_built_query()
 
     def raw_search(self, query_string, **kwargs):
         """
@@ -1047,7 +1605,7 @@ class BaseSearchQuery:
             klass = self.__class__
 
         clone = klass(using=using)
-        clone.query_filter = deepcopy(self.query_filter)
+        clone.query_filter = copy.copy(self.query_filter)
         clone.order_by = self.order_by[:]
         clone.models = self.models.copy()
         clone.boost = self.boost.copy()
@@ -1057,6 +1615,10 @@ class BaseSearchQuery:
         clone.date_facets = self.date_facets.copy()
         clone.query_facets = self.query_facets[:]
         clone.narrow_queries = self.narrow_queries.copy()
+        clone.only_fields = self.only_fields.copy()
+        clone.deferred_fields = self.deferred_fields.copy()
+        clone.use_cache = self.use_cache
+        clone.cache_timeout = self.cache_timeout
         clone.start_offset = self.start_offset
         clone.end_offset = self.end_offset
         clone.result_class = self.result_class
@@ -1069,6 +1631,11 @@ class BaseSearchQuery:
         clone._more_like_this = self._more_like_this
         clone._mlt_instance = self._mlt_instance
 
+        # Fragments are backend-specific, so only a like-for-like clone can
+        # reuse the query string.
+        if klass is self.__class__ and using == self._using:
+            clone._built_query = self._built_query
+
         return clone
 
 
@@ -1076,6 +1643,12 @@ class BaseEngine:
     backend = BaseSearchBackend
     query = BaseSearchQuery
     unified_index = UnifiedIndex
+    # Engines get one instance per thread, unless they set this to ``True``
+    # once their backend (& its client) is known to be safe to share.
+    thread_safe = False
+    # The ``ConnectionHandler`` that made the engine, which shares the
+    # ``UnifiedIndex`` between the engines for the connection.
+    connection_handler = None
 
     def __init__(self, using=None):
         if using is None:
@@ -1083,17 +1656,35 @@ class BaseEngine:
 
         self.using = using
         self.options = settings.HAYSTACK_CONNECTIONS.get(self.using, {})
-        self.queries = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
         self._index = None
         self._backend = None
 
+    @property
+    def queries(self):
+        # Each thread only logs its own queries.
+        if not hasattr(self._local, "queries"):
+            self._local.queries = []
+
+        return self._local.queries
+
     def get_backend(self):
         if self._backend is None:
-            self._backend = self.backend(self.using, **self.options)
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self.backend(self.using, **self.options)
+
         return self._backend
 
     def reset_sessions(self):
-        """Reset any transient connections, file handles, etc."""
+        """
+        Reset any transient connections, file handles, etc.
+
+        The process-wide HTTP connection pools (see
+        ``haystack.utils.pooling``) outlive the backend & are reused by the
+        next one.
+        """
         self._backend = None
 
     def get_query(self):
@@ -1102,8 +1693,14 @@ class BaseEngine:
     def reset_queries(self):
         del self.queries[:]
 
+    def build_unified_index(self):
+        return self.unified_index(self.options.get("EXCLUDED_INDEXES", []))
+
     def get_unified_index(self):
         if self._index is None:
-            self._index = self.unified_index(self.options.get("EXCLUDED_INDEXES", []))
+            if self.connection_handler is not None:
+                self._index = self.connection_handler.get_unified_index(self)
+            else:
+                self._index = self.build_unified_index()
 
         return self._index
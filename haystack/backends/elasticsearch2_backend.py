@@ -3,7 +3,7 @@ import warnings
 
 from django.conf import settings
 
-from haystack.backends import BaseEngine
+from haystack.backends import BaseEngine, invalidates_query_cache
 from haystack.backends.elasticsearch_backend import (
     ElasticsearchSearchBackend,
     ElasticsearchSearchQuery,
@@ -36,6 +36,7 @@ class Elasticsearch2SearchBackend(ElasticsearchSearchBackend):
         super().__init__(connection_alias, **connection_options)
         self.content_field_name = None
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         """
         Clears the backend of all documents/objects for a collection of models.
@@ -114,6 +115,9 @@ class Elasticsearch2SearchBackend(ElasticsearchSearchBackend):
         models=None,
         limit_to_registered_models=None,
         result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        filter_clauses=None,
     ):
         kwargs = super().build_search_kwargs(
             query_string,
@@ -129,6 +133,9 @@ class Elasticsearch2SearchBackend(ElasticsearchSearchBackend):
             models=models,
             limit_to_registered_models=limit_to_registered_models,
             result_class=result_class,
+            only_fields=only_fields,
+            deferred_fields=deferred_fields,
+            filter_clauses=filter_clauses,
         )
 
         filters = []
@@ -244,7 +251,7 @@ class Elasticsearch2SearchBackend(ElasticsearchSearchBackend):
         from haystack import connections
 
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         # Deferred models will have a different class ("RealClass_Deferred_fieldname")
         # which won't be in our registry:
@@ -388,3 +395,4 @@ class Elasticsearch2SearchQuery(ElasticsearchSearchQuery):
 class Elasticsearch2SearchEngine(BaseEngine):
     backend = Elasticsearch2SearchBackend
     query = Elasticsearch2SearchQuery
+    thread_safe = True
@@ -4,7 +4,7 @@ import warnings
 from django.conf import settings
 
 import haystack
-from haystack.backends import BaseEngine
+from haystack.backends import BaseEngine, invalidates_query_cache
 from haystack.backends.elasticsearch_backend import (
     ElasticsearchSearchBackend,
     ElasticsearchSearchQuery,
@@ -32,6 +32,7 @@ class Elasticsearch5SearchBackend(ElasticsearchSearchBackend):
         super().__init__(connection_alias, **connection_options)
         self.content_field_name = None
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         """
         Clears the backend of all documents/objects for a collection of models.
@@ -110,6 +111,9 @@ class Elasticsearch5SearchBackend(ElasticsearchSearchBackend):
         models=None,
         limit_to_registered_models=None,
         result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        filter_clauses=None,
         **extra_kwargs
     ):
         index = haystack.connections[self.connection_alias].get_unified_index()
@@ -139,6 +143,9 @@ class Elasticsearch5SearchBackend(ElasticsearchSearchBackend):
 
             kwargs["stored_fields"] = fields
 
+        if only_fields or deferred_fields:
+            kwargs["_source"] = self._build_source_filter(only_fields, deferred_fields)
+
         if sort_by is not None:
             order_list = []
             for field, direction in sort_by:
@@ -275,6 +282,9 @@ class Elasticsearch5SearchBackend(ElasticsearchSearchBackend):
         if len(model_choices) > 0:
             filters.append({"terms": {DJANGO_CT: model_choices}})
 
+        if filter_clauses:
+            filters.extend(filter_clauses)
+
         for q in narrow_queries:
             filters.append({"query_string": {"query": q}})
 
@@ -336,7 +346,7 @@ class Elasticsearch5SearchBackend(ElasticsearchSearchBackend):
         from haystack import connections
 
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         # Deferred models will have a different class ("RealClass_Deferred_fieldname")
         # which won't be in our registry:
@@ -481,3 +491,4 @@ class Elasticsearch5SearchQuery(ElasticsearchSearchQuery):
 class Elasticsearch5SearchEngine(BaseEngine):
     backend = Elasticsearch5SearchBackend
     query = Elasticsearch5SearchQuery
+    thread_safe = True
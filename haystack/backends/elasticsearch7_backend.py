@@ -4,7 +4,7 @@ import warnings
 from django.conf import settings
 
 import haystack
-from haystack.backends import BaseEngine
+from haystack.backends import BaseEngine, invalidates_query_cache
 from haystack.backends.elasticsearch_backend import (
     ElasticsearchSearchBackend,
     ElasticsearchSearchQuery,
@@ -102,6 +102,7 @@ class Elasticsearch7SearchBackend(ElasticsearchSearchBackend):
         # ES7 does not support a doc_type option
         return {"properties": field_mapping}
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         """
         Clears the backend of all documents/objects for a collection of models.
@@ -178,6 +179,9 @@ class Elasticsearch7SearchBackend(ElasticsearchSearchBackend):
         models=None,
         limit_to_registered_models=None,
         result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        filter_clauses=None,
         **extra_kwargs
     ):
         index = haystack.connections[self.connection_alias].get_unified_index()
@@ -206,6 +210,9 @@ class Elasticsearch7SearchBackend(ElasticsearchSearchBackend):
 
             kwargs["stored_fields"] = fields
 
+        if only_fields or deferred_fields:
+            kwargs["_source"] = self._build_source_filter(only_fields, deferred_fields)
+
         if sort_by is not None:
             order_list = []
             for field, direction in sort_by:
@@ -342,6 +349,9 @@ class Elasticsearch7SearchBackend(ElasticsearchSearchBackend):
         if len(model_choices) > 0:
             filters.append({"terms": {DJANGO_CT: model_choices}})
 
+        if filter_clauses:
+            filters.extend(filter_clauses)
+
         for q in narrow_queries:
             filters.append({"query_string": {"query": q}})
 
@@ -389,6 +399,66 @@ class Elasticsearch7SearchBackend(ElasticsearchSearchBackend):
             }
         }
 
+    def iter_facet(self, query_string, field, page_size=None, **kwargs):
+        """
+        Streams every ``(value, count)`` of a field facet, in order of value,
+        fetching ``page_size`` values at a time with a composite aggregation.
+
+        Unlike a ``terms`` aggregation, this never has to hold every value in
+        memory at once, however many there are.
+        """
+        if len(query_string) == 0:
+            return
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        if page_size is None:
+            page_size = self.batch_size
+
+        index = haystack.connections[self.connection_alias].get_unified_index()
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+        composite = {
+            "size": page_size,
+            "sources": [
+                {field: {"terms": {"field": index.get_facet_fieldname(field)}}}
+            ],
+        }
+
+        while True:
+            try:
+                raw_results = self.conn.search(
+                    body={
+                        "query": search_kwargs["query"],
+                        "size": 0,
+                        "aggs": {field: {"composite": composite}},
+                    },
+                    index=self.index_name,
+                )
+            except elasticsearch.TransportError as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to page through the '%s' facet using '%s': %s",
+                    field,
+                    query_string,
+                    e,
+                    exc_info=True,
+                )
+                return
+
+            facet_info = raw_results.get("aggregations", {}).get(field, {})
+            buckets = facet_info.get("buckets", [])
+
+            for bucket in buckets:
+                yield (bucket["key"][field], bucket["doc_count"])
+
+            if len(buckets) < page_size or "after_key" not in facet_info:
+                return
+
+            composite["after"] = facet_info["after_key"]
+
     def more_like_this(
         self,
         model_instance,
@@ -403,7 +473,7 @@ class Elasticsearch7SearchBackend(ElasticsearchSearchBackend):
         from haystack import connections
 
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         # Deferred models will have a different class ("RealClass_Deferred_fieldname")
         # which won't be in our registry:
@@ -584,3 +654,4 @@ class Elasticsearch7SearchQuery(ElasticsearchSearchQuery):
 class Elasticsearch7SearchEngine(BaseEngine):
     backend = Elasticsearch7SearchBackend
     query = Elasticsearch7SearchQuery
+    thread_safe = True
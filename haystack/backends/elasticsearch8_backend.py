@@ -0,0 +1,1021 @@
+import datetime
+import warnings
+from time import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+import haystack
+from haystack.backends import (
+    BaseEngine,
+    invalidates_query_cache,
+    log_query,
+    record_query,
+)
+from haystack.backends.elasticsearch_backend import (
+    MAPPING_FINGERPRINT,
+    MAPPING_META_FILTER,
+    ElasticsearchSearchBackend,
+    ElasticsearchSearchQuery,
+)
+from haystack.constants import DEFAULT_OPERATOR, DJANGO_CT, DJANGO_ID, FUZZINESS, ID
+from haystack.exceptions import MissingDependency, SearchBackendError, SkipDocument
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+from haystack.utils.pooling import summarize_pools
+
+try:
+    import elasticsearch
+
+    if not ((8, 0, 0) <= elasticsearch.__version__ < (9, 0, 0)):
+        raise ImportError
+    from elasticsearch import ApiError, NotFoundError, TransportError
+    from elasticsearch.helpers import bulk
+
+    try:
+        # The async client needs ``elasticsearch[async]``.
+        from elasticsearch import AsyncElasticsearch
+    except ImportError:
+        AsyncElasticsearch = None
+except ImportError:
+    raise MissingDependency(
+        "The 'elasticsearch8' backend requires the \
+                            installation of 'elasticsearch>=8.0.0,<9.0.0'. \
+                            Please refer to the documentation."
+    )
+
+# HTTP errors & connection errors no longer share a base class in 8.x.
+ELASTICSEARCH_ERRORS = (ApiError, TransportError)
+
+# Search body keys the client takes under a different keyword argument.
+BODY_PARAMS = {"from": "from_", "_source": "source"}
+
+DEFAULT_FIELD_MAPPING = {
+    "type": "text",
+    "analyzer": "snowball",
+}
+FIELD_MAPPINGS = {
+    "edge_ngram": {
+        "type": "text",
+        "analyzer": "edgengram_analyzer",
+    },
+    "ngram": {
+        "type": "text",
+        "analyzer": "ngram_analyzer",
+    },
+    "date": {"type": "date"},
+    "datetime": {"type": "date"},
+    "location": {"type": "geo_point"},
+    "boolean": {"type": "boolean"},
+    "float": {"type": "float"},
+    "long": {"type": "long"},
+    "integer": {"type": "long"},
+}
+
+# ``date_facet`` gaps Elasticsearch knows as calendar intervals.
+CALENDAR_INTERVALS = ("year", "month", "day", "hour", "minute")
+
+
+class Elasticsearch8SearchBackend(ElasticsearchSearchBackend):
+    # Settings to add an n-gram & edge n-gram analyzer.
+    DEFAULT_SETTINGS = {
+        "settings": {
+            "index": {
+                "max_ngram_diff": 2,
+            },
+            "analysis": {
+                "analyzer": {
+                    "ngram_analyzer": {
+                        "tokenizer": "standard",
+                        "filter": [
+                            "haystack_ngram",
+                            "lowercase",
+                        ],
+                    },
+                    "edgengram_analyzer": {
+                        "tokenizer": "standard",
+                        "filter": [
+                            "haystack_edgengram",
+                            "lowercase",
+                        ],
+                    },
+                },
+                "filter": {
+                    "haystack_ngram": {
+                        "type": "ngram",
+                        "min_gram": 3,
+                        "max_gram": 4,
+                    },
+                    "haystack_edgengram": {
+                        "type": "edge_ngram",
+                        "min_gram": 2,
+                        "max_gram": 15,
+                    },
+                },
+            },
+        },
+    }
+
+    # How long Elasticsearch keeps the point in time open between
+    # ``iter_search`` chunks.
+    PIT_KEEP_ALIVE = "5m"
+
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self.content_field_name = None
+
+    def build_conn(self):
+        kwargs = {"connections_per_node": self.pool_size}
+
+        if self.max_retries is not None:
+            kwargs["max_retries"] = self.max_retries
+
+        if not self.keepalive:
+            kwargs["headers"] = {"Connection": "close"}
+
+        kwargs.update(self.conn_kwargs)
+        return elasticsearch.Elasticsearch(
+            self.url, request_timeout=self.timeout, **kwargs
+        )
+
+    def get_pool_stats(self):
+        nodes = self.conn.transport.node_pool.all()
+        return summarize_pools(
+            [node.pool for node in nodes if getattr(node, "pool", None)]
+        )
+
+    def build_async_conn(self):
+        if AsyncElasticsearch is None:
+            return None
+
+        return AsyncElasticsearch(
+            self.url, request_timeout=self.timeout, **self.conn_kwargs
+        )
+
+    def _get_doc_type_option(self):
+        # ES8 does not support a doc_type option
+        return {}
+
+    def _get_current_mapping(self, field_mapping):
+        return {"properties": field_mapping}
+
+    def _body(self, response):
+        """Returns the decoded JSON of a response from the client."""
+        return getattr(response, "body", response)
+
+    def _client_kwargs(self, search_kwargs, **params):
+        """
+        Turns a search body (plus URL parameters) into keyword arguments for
+        the client, rather than sending the deprecated ``body``.
+        """
+        kwargs = {}
+
+        for key, value in list(search_kwargs.items()) + list(params.items()):
+            kwargs.setdefault(BODY_PARAMS.get(key, key), value)
+
+        return kwargs
+
+    def get_stored_fingerprint(self):
+        try:
+            response = self._body(
+                self.conn.indices.get_mapping(
+                    index=self.index_name, filter_path=MAPPING_META_FILTER
+                )
+            )
+        except NotFoundError:
+            return None
+
+        return self._find_fingerprint(response)
+
+    def _put_mapping(self, mapping, fingerprint):
+        self.conn.options(ignore_status=400).indices.create(
+            index=self.index_name, **self.DEFAULT_SETTINGS
+        )
+        self.conn.indices.put_mapping(
+            index=self.index_name, meta={MAPPING_FINGERPRINT: fingerprint}, **mapping
+        )
+
+    @invalidates_query_cache
+    def update(self, index, iterable, commit=True):
+        if not self.setup_complete:
+            try:
+                self.ensure_setup()
+            except ELASTICSEARCH_ERRORS as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to add documents to Elasticsearch: %s", e, exc_info=True
+                )
+                return
+
+        actions = []
+
+        for obj in iterable:
+            try:
+                prepped_data = self._prepare_object(index, obj)
+                final_data = {}
+
+                # Convert the data to make sure it's happy.
+                for key, value in prepped_data.items():
+                    final_data[key] = self._from_python(value)
+
+                # Spell out each bulk action, rather than mixing the metadata
+                # in with the document's fields.
+                actions.append(
+                    {
+                        "_op_type": "index",
+                        "_index": self.index_name,
+                        "_id": final_data[ID],
+                        "_source": final_data,
+                    }
+                )
+            except SkipDocument:
+                self.log.debug("Indexing for object `%s` skipped", obj)
+            except ELASTICSEARCH_ERRORS as e:
+                if not self.silently_fail:
+                    raise
+
+                # We'll log the object identifier but won't include the actual object
+                # to avoid the possibility of that generating encoding errors while
+                # processing the log message:
+                self.log.error(
+                    "%s while preparing object for update" % e.__class__.__name__,
+                    exc_info=True,
+                    extra={"data": {"index": index, "object": get_identifier(obj)}},
+                )
+
+        bulk(self.conn, actions, chunk_size=self.batch_size)
+
+        if commit:
+            self.conn.indices.refresh(index=self.index_name)
+
+    @invalidates_query_cache
+    def remove(self, obj_or_string, commit=True):
+        doc_id = get_identifier(obj_or_string)
+
+        if not self.setup_complete:
+            try:
+                self.ensure_setup()
+            except ELASTICSEARCH_ERRORS as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to remove document '%s' from Elasticsearch: %s",
+                    doc_id,
+                    e,
+                    exc_info=True,
+                )
+                return
+
+        try:
+            self.conn.options(ignore_status=404).delete(
+                index=self.index_name, id=doc_id
+            )
+
+            if commit:
+                self.conn.indices.refresh(index=self.index_name)
+        except ELASTICSEARCH_ERRORS as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to remove document '%s' from Elasticsearch: %s",
+                doc_id,
+                e,
+                exc_info=True,
+            )
+
+    @invalidates_query_cache
+    def clear(self, models=None, commit=True):
+        """
+        Clears the backend of all documents/objects for a collection of models.
+
+        :param models: List or tuple of models to clear.
+        :param commit: Whether to refresh the index afterwards.
+        """
+        if models is not None:
+            assert isinstance(models, (list, tuple))
+
+        try:
+            if models is None:
+                self.conn.options(ignore_status=404).indices.delete(
+                    index=self.index_name
+                )
+                self.setup_complete = False
+                self.existing_mapping = {}
+                self.content_field_name = None
+            else:
+                models_to_delete = sorted(get_model_ct(model) for model in models)
+
+                self.conn.delete_by_query(
+                    index=self.index_name,
+                    query={"terms": {DJANGO_CT: models_to_delete}},
+                    refresh=commit,
+                )
+        except ELASTICSEARCH_ERRORS as e:
+            if not self.silently_fail:
+                raise
+
+            if models is not None:
+                self.log.error(
+                    "Failed to clear Elasticsearch index of models '%s': %s",
+                    ",".join(models_to_delete),
+                    e,
+                    exc_info=True,
+                )
+            else:
+                self.log.error(
+                    "Failed to clear Elasticsearch index: %s", e, exc_info=True
+                )
+
+    def build_search_kwargs(
+        self,
+        query_string,
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        fields="",
+        highlight=False,
+        facets=None,
+        date_facets=None,
+        query_facets=None,
+        narrow_queries=None,
+        spelling_query=None,
+        within=None,
+        dwithin=None,
+        distance_point=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        filter_clauses=None,
+        **extra_kwargs
+    ):
+        index = haystack.connections[self.connection_alias].get_unified_index()
+        content_field = index.document_field
+
+        if query_string == "*:*":
+            kwargs = {"query": {"match_all": {}}}
+        else:
+            kwargs = {
+                "query": {
+                    "query_string": {
+                        "default_field": content_field,
+                        "default_operator": DEFAULT_OPERATOR,
+                        "query": query_string,
+                        "analyze_wildcard": True,
+                        "fuzziness": FUZZINESS,
+                    }
+                }
+            }
+
+        filters = []
+
+        if fields:
+            if isinstance(fields, (list, set)):
+                fields = list(fields)
+
+            kwargs["stored_fields"] = fields
+
+        if only_fields or deferred_fields:
+            kwargs["_source"] = self._build_source_filter(only_fields, deferred_fields)
+
+        if sort_by is not None:
+            order_list = []
+            for field, direction in sort_by:
+                if field == "distance" and distance_point:
+                    # Do the geo-enabled sort.
+                    lng, lat = distance_point["point"].coords
+                    sort_kwargs = {
+                        "_geo_distance": {
+                            distance_point["field"]: [lng, lat],
+                            "order": direction,
+                            "unit": "km",
+                        }
+                    }
+                else:
+                    if field == "distance":
+                        warnings.warn(
+                            "In order to sort by distance, you must call the '.distance(...)' method."
+                        )
+
+                    # Regular sorting.
+                    sort_kwargs = {field: {"order": direction}}
+
+                order_list.append(sort_kwargs)
+
+            kwargs["sort"] = order_list
+
+        if highlight:
+            # `highlight` can either be True or a dictionary containing custom parameters
+            # which will be passed to the backend and may override our default settings:
+
+            kwargs["highlight"] = {"fields": {content_field: {}}}
+
+            if isinstance(highlight, dict):
+                kwargs["highlight"].update(highlight)
+
+        if self.include_spelling:
+            kwargs["suggest"] = {
+                "suggest": {
+                    "text": spelling_query or query_string,
+                    "term": {
+                        # Using content_field here will result in suggestions of stemmed words.
+                        "field": content_field,
+                    },
+                }
+            }
+
+        if narrow_queries is None:
+            narrow_queries = set()
+
+        if facets is not None:
+            kwargs.setdefault("aggs", {})
+
+            for facet_fieldname, extra_options in facets.items():
+                facet_options = {
+                    "meta": {"_type": "terms"},
+                    "terms": {"field": index.get_facet_fieldname(facet_fieldname)},
+                }
+                if "order" in extra_options:
+                    facet_options["meta"]["order"] = extra_options.pop("order")
+                facet_options["terms"].update(extra_options)
+                kwargs["aggs"][facet_fieldname] = facet_options
+
+        if date_facets is not None:
+            kwargs.setdefault("aggs", {})
+
+            for facet_fieldname, value in date_facets.items():
+                kwargs["aggs"][facet_fieldname] = {
+                    "meta": {"_type": "date_histogram"},
+                    "date_histogram": {
+                        "field": facet_fieldname,
+                        **self._build_date_interval(value),
+                    },
+                    "aggs": {
+                        facet_fieldname: {
+                            "date_range": {
+                                "field": facet_fieldname,
+                                "ranges": [
+                                    {
+                                        "from": self._from_python(
+                                            value.get("start_date")
+                                        ),
+                                        "to": self._from_python(value.get("end_date")),
+                                    }
+                                ],
+                            }
+                        }
+                    },
+                }
+
+        if query_facets is not None:
+            kwargs.setdefault("aggs", {})
+
+            for facet_fieldname, value in query_facets:
+                kwargs["aggs"][facet_fieldname] = {
+                    "meta": {"_type": "query"},
+                    "filter": {"query_string": {"query": value}},
+                }
+
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(
+                settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True
+            )
+
+        if models and len(models):
+            model_choices = sorted(get_model_ct(model) for model in models)
+        elif limit_to_registered_models:
+            # Using narrow queries, limit the results to only models handled
+            # with the current routers.
+            model_choices = self.build_models_list()
+        else:
+            model_choices = []
+
+        if len(model_choices) > 0:
+            filters.append({"terms": {DJANGO_CT: model_choices}})
+
+        if filter_clauses:
+            filters.extend(filter_clauses)
+
+        for q in narrow_queries:
+            filters.append({"query_string": {"query": q}})
+
+        if within is not None:
+            filters.append(self._build_search_query_within(within))
+
+        if dwithin is not None:
+            filters.append(self._build_search_query_dwithin(dwithin))
+
+        # if we want to filter, change the query type to bool
+        if filters:
+            kwargs["query"] = {"bool": {"must": kwargs.pop("query"), "filter": filters}}
+
+        if extra_kwargs:
+            kwargs.update(extra_kwargs)
+
+        return kwargs
+
+    def _build_date_interval(self, date_facet):
+        """
+        Returns the ``calendar_interval`` (or, for multiples & seconds, the
+        ``fixed_interval``) for a ``date_facet``'s gap.
+        """
+        interval = date_facet.get("gap_by").lower()
+        gap_amount = date_facet.get("gap_amount", 1)
+
+        # Months & years vary in length, so can't be multiplied.
+        if interval in ("month", "year") or (
+            gap_amount == 1 and interval in CALENDAR_INTERVALS
+        ):
+            return {"calendar_interval": interval}
+
+        # Just the first character is valid for use.
+        return {"fixed_interval": "%s%s" % (gap_amount, interval[:1])}
+
+    def _build_search_query_dwithin(self, dwithin):
+        lng, lat = dwithin["point"].coords
+        distance = "%(dist).6f%(unit)s" % {"dist": dwithin["distance"].km, "unit": "km"}
+        return {
+            "geo_distance": {
+                "distance": distance,
+                dwithin["field"]: {"lat": lat, "lon": lng},
+            }
+        }
+
+    def _build_search_query_within(self, within):
+        from haystack.utils.geo import generate_bounding_box
+
+        ((south, west), (north, east)) = generate_bounding_box(
+            within["point_1"], within["point_2"]
+        )
+        return {
+            "geo_bounding_box": {
+                within["field"]: {
+                    "top_left": {"lat": north, "lon": west},
+                    "bottom_right": {"lat": south, "lon": east},
+                }
+            }
+        }
+
+    @log_query
+    def search(self, query_string, **kwargs):
+        if len(query_string) == 0:
+            return {"results": [], "hits": 0}
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        search_kwargs, params, geo_sort = self._build_search_request(
+            query_string, **kwargs
+        )
+
+        try:
+            raw_results = self._body(
+                self.conn.search(
+                    index=self.index_name,
+                    **self._client_kwargs(search_kwargs, **params),
+                )
+            )
+        except ELASTICSEARCH_ERRORS as e:
+            raw_results = self._search_failed(query_string, e)
+
+        return self._process_results(
+            raw_results,
+            highlight=kwargs.get("highlight"),
+            result_class=kwargs.get("result_class", SearchResult),
+            distance_point=kwargs.get("distance_point"),
+            geo_sort=geo_sort,
+        )
+
+    @log_query
+    async def _native_asearch(self, query_string, **kwargs):
+        if len(query_string) == 0:
+            return {"results": [], "hits": 0}
+
+        if not self.setup_complete:
+            await sync_to_async(self.ensure_setup)()
+
+        search_kwargs, params, geo_sort = self._build_search_request(
+            query_string, **kwargs
+        )
+
+        try:
+            raw_results = self._body(
+                await self.get_async_conn().search(
+                    index=self.index_name,
+                    **self._client_kwargs(search_kwargs, **params),
+                )
+            )
+        except ELASTICSEARCH_ERRORS as e:
+            raw_results = self._search_failed(query_string, e)
+
+        return self._process_results(
+            raw_results,
+            highlight=kwargs.get("highlight"),
+            result_class=kwargs.get("result_class", SearchResult),
+            distance_point=kwargs.get("distance_point"),
+            geo_sort=geo_sort,
+        )
+
+    def multi_search(self, searches):
+        """
+        Sends all of the searches to Elasticsearch in a single ``_msearch``
+        request.
+        """
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        body = []
+        geo_sorts = []
+
+        for query_string, kwargs in searches:
+            if len(query_string) == 0:
+                geo_sorts.append(None)
+                continue
+
+            search_kwargs, _, geo_sort = self._build_search_request(
+                query_string, **kwargs
+            )
+            body.extend([{}, search_kwargs])
+            geo_sorts.append(geo_sort)
+
+        start = time()
+        responses = []
+
+        if body:
+            try:
+                responses = self._body(
+                    self.conn.msearch(index=self.index_name, searches=body)
+                )["responses"]
+            except ELASTICSEARCH_ERRORS as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to multi-search Elasticsearch: %s", e, exc_info=True
+                )
+
+        responses = iter(responses)
+        results = []
+
+        for (query_string, kwargs), geo_sort in zip(searches, geo_sorts):
+            if geo_sort is None:
+                results.append({"results": [], "hits": 0})
+                continue
+
+            raw_results = next(responses, {})
+
+            if "error" in raw_results:
+                error = SearchBackendError(
+                    "Elasticsearch returned a %s error: %s"
+                    % (raw_results.get("status", "N/A"), raw_results["error"])
+                )
+                raw_results = self._search_failed(query_string, error)
+
+            record_query(self, query_string, (), kwargs, start)
+            results.append(
+                self._process_results(
+                    raw_results,
+                    highlight=kwargs.get("highlight"),
+                    result_class=kwargs.get("result_class", SearchResult),
+                    distance_point=kwargs.get("distance_point"),
+                    geo_sort=geo_sort,
+                )
+            )
+
+        return results
+
+    def iter_search(self, query_string, chunk_size=None, **kwargs):
+        """
+        Streams every match, ``chunk_size`` hits at a time.
+
+        Pages through a point in time with ``search_after``, so every chunk
+        comes from the same snapshot of the index, however long it takes.
+        """
+        if len(query_string) == 0:
+            return
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        if chunk_size is None:
+            chunk_size = self.batch_size
+
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+        search_kwargs["size"] = chunk_size
+        geo_sort = any(
+            "_geo_distance" in order for order in search_kwargs.get("sort", [])
+        )
+
+        # ``search_after`` needs a total ordering, which ``_shard_doc`` breaks
+        # ties for within a point in time.
+        search_kwargs["sort"] = (
+            search_kwargs.get("sort") or [{"_score": {"order": "desc"}}]
+        ) + [{"_shard_doc": {"order": "asc"}}]
+
+        if "_source" not in search_kwargs:
+            search_kwargs["_source"] = True
+
+        for raw_results in self._point_in_time_pages(query_string, search_kwargs):
+            results = self._process_results(
+                raw_results,
+                highlight=kwargs.get("highlight"),
+                result_class=kwargs.get("result_class", SearchResult),
+                distance_point=kwargs.get("distance_point"),
+                geo_sort=geo_sort,
+            )
+
+            if results["results"]:
+                yield results["results"]
+
+    def _point_in_time_pages(self, query_string, search_kwargs):
+        pit_id = None
+
+        try:
+            pit_id = self._body(
+                self.conn.open_point_in_time(
+                    index=self.index_name, keep_alive=self.PIT_KEEP_ALIVE
+                )
+            )["id"]
+
+            while True:
+                search_kwargs["pit"] = {"id": pit_id, "keep_alive": self.PIT_KEEP_ALIVE}
+                raw_results = self._body(
+                    self.conn.search(**self._client_kwargs(search_kwargs))
+                )
+                # Elasticsearch may hand back a new id for the point in time.
+                pit_id = raw_results.get("pit_id", pit_id)
+                hits = raw_results.get("hits", {}).get("hits", [])
+
+                if not hits:
+                    return
+
+                yield raw_results
+
+                if len(hits) < search_kwargs["size"]:
+                    return
+
+                search_kwargs["search_after"] = hits[-1]["sort"]
+        except ELASTICSEARCH_ERRORS as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to query Elasticsearch using '%s': %s",
+                query_string,
+                e,
+                exc_info=True,
+            )
+        finally:
+            if pit_id is not None:
+                try:
+                    self.conn.close_point_in_time(id=pit_id)
+                except ELASTICSEARCH_ERRORS:
+                    pass
+
+    def iter_facet(self, query_string, field, page_size=None, **kwargs):
+        """
+        Streams every ``(value, count)`` of a field facet, in order of value,
+        fetching ``page_size`` values at a time with a composite aggregation.
+
+        Unlike a ``terms`` aggregation, this never has to hold every value in
+        memory at once, however many there are.
+        """
+        if len(query_string) == 0:
+            return
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        if page_size is None:
+            page_size = self.batch_size
+
+        index = haystack.connections[self.connection_alias].get_unified_index()
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+        composite = {
+            "size": page_size,
+            "sources": [
+                {field: {"terms": {"field": index.get_facet_fieldname(field)}}}
+            ],
+        }
+
+        while True:
+            try:
+                raw_results = self._body(
+                    self.conn.search(
+                        index=self.index_name,
+                        query=search_kwargs["query"],
+                        size=0,
+                        aggs={field: {"composite": composite}},
+                    )
+                )
+            except ELASTICSEARCH_ERRORS as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to page through the '%s' facet using '%s': %s",
+                    field,
+                    query_string,
+                    e,
+                    exc_info=True,
+                )
+                return
+
+            facet_info = raw_results.get("aggregations", {}).get(field, {})
+            buckets = facet_info.get("buckets", [])
+
+            for bucket in buckets:
+                yield (bucket["key"][field], bucket["doc_count"])
+
+            if len(buckets) < page_size or "after_key" not in facet_info:
+                return
+
+            composite["after"] = facet_info["after_key"]
+
+    def more_like_this(
+        self,
+        model_instance,
+        additional_query_string=None,
+        start_offset=0,
+        end_offset=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        **kwargs
+    ):
+        from haystack import connections
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        # Deferred models will have a different class ("RealClass_Deferred_fieldname")
+        # which won't be in our registry:
+        model_klass = model_instance._meta.concrete_model
+
+        index = (
+            connections[self.connection_alias]
+            .get_unified_index()
+            .get_index(model_klass)
+        )
+        field_name = index.get_content_field()
+        params = {}
+
+        if start_offset is not None:
+            params["from_"] = start_offset
+
+        if end_offset is not None:
+            params["size"] = end_offset - start_offset
+
+        doc_id = get_identifier(model_instance)
+
+        # More like this Query
+        # https://www.elastic.co/guide/en/elasticsearch/reference/current/query-dsl-mlt-query.html
+        mlt_query = {
+            "more_like_this": {
+                "fields": [field_name],
+                "like": [{"_index": self.index_name, "_id": doc_id}],
+            }
+        }
+
+        narrow_queries = []
+
+        if additional_query_string and additional_query_string != "*:*":
+            narrow_queries.append({"query_string": {"query": additional_query_string}})
+
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(
+                settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True
+            )
+
+        if models and len(models):
+            model_choices = sorted(get_model_ct(model) for model in models)
+        elif limit_to_registered_models:
+            # Using narrow queries, limit the results to only models handled
+            # with the current routers.
+            model_choices = self.build_models_list()
+        else:
+            model_choices = []
+
+        if len(model_choices) > 0:
+            narrow_queries.append({"terms": {DJANGO_CT: model_choices}})
+
+        if len(narrow_queries) > 0:
+            mlt_query = {"bool": {"must": mlt_query, "filter": narrow_queries}}
+
+        try:
+            raw_results = self._body(
+                self.conn.search(
+                    index=self.index_name, query=mlt_query, source=True, **params
+                )
+            )
+        except ELASTICSEARCH_ERRORS as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to fetch More Like This from Elasticsearch for document '%s': %s",
+                doc_id,
+                e,
+                exc_info=True,
+            )
+            raw_results = {}
+
+        return self._process_results(raw_results, result_class=result_class)
+
+    def _process_hits(self, raw_results):
+        return raw_results.get("hits", {}).get("total", {}).get("value", 0)
+
+    def _process_results(
+        self,
+        raw_results,
+        highlight=False,
+        result_class=None,
+        distance_point=None,
+        geo_sort=False,
+    ):
+        results = super()._process_results(
+            raw_results, highlight, result_class, distance_point, geo_sort
+        )
+        facets = {}
+        if "aggregations" in raw_results:
+            facets = {"fields": {}, "dates": {}, "queries": {}}
+
+            for facet_fieldname, facet_info in raw_results["aggregations"].items():
+                facet_type = facet_info["meta"]["_type"]
+                if facet_type == "terms":
+                    facets["fields"][facet_fieldname] = [
+                        (individual["key"], individual["doc_count"])
+                        for individual in facet_info["buckets"]
+                    ]
+                    if "order" in facet_info["meta"]:
+                        if facet_info["meta"]["order"] == "reverse_count":
+                            srt = sorted(
+                                facets["fields"][facet_fieldname], key=lambda x: x[1]
+                            )
+                            facets["fields"][facet_fieldname] = srt
+                elif facet_type == "date_histogram":
+                    # Elasticsearch provides UTC timestamps with an extra three
+                    # decimals of precision, which datetime barfs on.
+                    facets["dates"][facet_fieldname] = [
+                        (
+                            datetime.datetime.utcfromtimestamp(
+                                individual["key"] / 1000
+                            ),
+                            individual["doc_count"],
+                        )
+                        for individual in facet_info["buckets"]
+                    ]
+                elif facet_type == "query":
+                    facets["queries"][facet_fieldname] = facet_info["doc_count"]
+        results["facets"] = facets
+        return results
+
+    def _get_common_mapping(self):
+        return {
+            DJANGO_CT: {
+                "type": "keyword",
+            },
+            DJANGO_ID: {
+                "type": "keyword",
+            },
+        }
+
+    def build_schema(self, fields):
+        content_field_name = ""
+        mapping = self._get_common_mapping()
+
+        for _, field_class in fields.items():
+            # Index-time boosts were removed in Elasticsearch 8, so field
+            # weights are left out of the mapping.
+            field_mapping = FIELD_MAPPINGS.get(
+                field_class.field_type, DEFAULT_FIELD_MAPPING
+            ).copy()
+
+            if field_class.document is True:
+                content_field_name = field_class.index_fieldname
+
+            # Do this last to override `text` fields.
+            if field_mapping["type"] == "text":
+                if field_class.indexed is False or hasattr(field_class, "facet_for"):
+                    field_mapping["type"] = "keyword"
+                    del field_mapping["analyzer"]
+
+            mapping[field_class.index_fieldname] = field_mapping
+
+        return (content_field_name, mapping)
+
+
+class Elasticsearch8SearchQuery(ElasticsearchSearchQuery):
+    def add_field_facet(self, field, **options):
+        self.facets[field] = options.copy()
+
+
+class Elasticsearch8SearchEngine(BaseEngine):
+    backend = Elasticsearch8SearchBackend
+    query = Elasticsearch8SearchQuery
+    thread_safe = True
@@ -1,14 +1,28 @@
+import hashlib
+import json
 import re
 import warnings
 from datetime import datetime, timedelta
+from time import time
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
 import haystack
-from haystack.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, log_query
+from haystack.backends import (
+    SQ,
+    BaseEngine,
+    BaseSearchBackend,
+    BaseSearchQuery,
+    SearchNode,
+    invalidates_query_cache,
+    log_query,
+    record_query,
+)
 from haystack.constants import (
     ALL_FIELD,
+    DEFAULT_ALIAS,
     DEFAULT_OPERATOR,
     DJANGO_CT,
     DJANGO_ID,
@@ -22,6 +36,12 @@ from haystack.models import SearchResult
 from haystack.utils import get_identifier, get_model_ct
 from haystack.utils import log as logging
 from haystack.utils.app_loading import haystack_get_model
+from haystack.utils.pooling import get_pool, summarize_pools
+
+# Where the fingerprint of the mapping is kept in its ``_meta``, & the
+# ``filter_path`` to fetch only that (with or without document types).
+MAPPING_FINGERPRINT = "haystack_fingerprint"
+MAPPING_META_FILTER = "*.mappings._meta,*.mappings.*._meta"
 
 try:
     import elasticsearch
@@ -39,6 +59,12 @@ try:
         # let's try this, for elasticsearch <= 1.7.0
         from elasticsearch.helpers import bulk_index as bulk
     from elasticsearch.exceptions import NotFoundError
+
+    try:
+        # The async client needs ``elasticsearch[async]`` (7.8+).
+        from elasticsearch import AsyncElasticsearch
+    except ImportError:
+        AsyncElasticsearch = None
 except ImportError:
     raise MissingDependency(
         "The 'elasticsearch' backend requires the installation of 'elasticsearch'. Please refer to the documentation."
@@ -79,6 +105,9 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         "/",
     )
 
+    # How long Elasticsearch keeps a scroll alive between ``iter_search`` chunks.
+    SCROLL_TIMEOUT = "5m"
+
     # Settings to add an n-gram & edge n-gram analyzer.
     DEFAULT_SETTINGS = {
         "settings": {
@@ -135,15 +164,33 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
                 % connection_alias
             )
 
-        self.conn = elasticsearch.Elasticsearch(
-            connection_options["URL"],
-            timeout=self.timeout,
-            **connection_options.get("KWARGS", {}),
+        self.url = connection_options["URL"]
+        self.conn_kwargs = connection_options.get("KWARGS", {})
+        self.pool_size = connection_options.get("POOL_SIZE", 10)
+        self.max_retries = connection_options.get("MAX_RETRIES")
+        self.keepalive = connection_options.get("KEEPALIVE", True)
+        # The client is thread-safe, so every thread & backend instance for
+        # the connection shares one (and its pool of connections).
+        self.conn = get_pool(
+            connection_alias,
+            self.build_conn,
+            options=(
+                self.url,
+                self.timeout,
+                self.pool_size,
+                self.max_retries,
+                self.keepalive,
+                repr(self.conn_kwargs),
+            ),
         )
         self.index_name = connection_options["INDEX_NAME"]
         self.log = logging.getLogger("haystack")
         self.setup_complete = False
-        self.existing_mapping = {}
+        # ``None`` until the mapping has been checked. Set it to ``{}`` to have
+        # ``setup`` check it again.
+        self.existing_mapping = None
+        self.skip_mapping_check = connection_options.get("SKIP_MAPPING_CHECK", False)
+        self._filterable_fields = (None, frozenset())
 
     def _get_doc_type_option(self):
         return {
@@ -153,38 +200,86 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
     def _get_current_mapping(self, field_mapping):
         return {"modelresult": {"properties": field_mapping}}
 
-    def setup(self):
+    def get_mapping_fingerprint(self, mapping):
         """
-        Defers loading until needed.
+        Returns a fingerprint of the ``mapping`` built by ``build_schema``,
+        which is stored in the mapping's ``_meta`` when it's sent.
+        """
+        serialized = json.dumps(mapping, sort_keys=True, default=str)
+        return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+    def _with_fingerprint(self, mapping, fingerprint):
+        # The ``_meta`` sits alongside the properties, which are inside the
+        # document type for the versions that have one.
+        mapping = dict(mapping)
+        meta = {"_meta": {MAPPING_FINGERPRINT: fingerprint}}
+
+        if "modelresult" in mapping:
+            mapping["modelresult"] = dict(mapping["modelresult"], **meta)
+        else:
+            mapping.update(meta)
+
+        return mapping
+
+    def _find_fingerprint(self, response):
+        for index_mapping in response.values():
+            mappings = index_mapping.get("mappings", {})
+
+            for type_mapping in [mappings] + list(mappings.values()):
+                if isinstance(type_mapping, dict) and "_meta" in type_mapping:
+                    return type_mapping["_meta"].get(MAPPING_FINGERPRINT)
+
+        return None
+
+    def get_stored_fingerprint(self):
+        """
+        Returns the fingerprint stored with the index's mapping, or ``None``
+        if there isn't one (or no index). Only the ``_meta`` is fetched, not
+        the whole mapping.
         """
-        # Get the existing mapping & cache it. We'll compare it
-        # during the ``update`` & if it doesn't match, we'll put the new
-        # mapping.
         try:
-            self.existing_mapping = self.conn.indices.get_mapping(index=self.index_name)
+            response = self.conn.indices.get_mapping(
+                index=self.index_name, filter_path=MAPPING_META_FILTER
+            )
         except NotFoundError:
-            pass
-        except Exception:
-            if not self.silently_fail:
-                raise
+            return None
+
+        return self._find_fingerprint(response)
 
+    def _put_mapping(self, mapping, fingerprint):
+        # Make sure the index is there first.
+        self.conn.indices.create(
+            index=self.index_name, body=self.DEFAULT_SETTINGS, ignore=400
+        )
+        self.conn.indices.put_mapping(
+            index=self.index_name,
+            body=self._with_fingerprint(mapping, fingerprint),
+            **self._get_doc_type_option(),
+        )
+
+    def setup(self):
+        """
+        Defers loading until needed.
+        """
         unified_index = haystack.connections[self.connection_alias].get_unified_index()
         self.content_field_name, field_mapping = self.build_schema(
             unified_index.all_searchfields()
         )
         current_mapping = self._get_current_mapping(field_mapping)
 
-        if current_mapping != self.existing_mapping:
+        if self.existing_mapping is None and self.skip_mapping_check:
+            # Trust that the mapping was put when deploying.
+            self.existing_mapping = current_mapping
+        elif current_mapping != self.existing_mapping:
+            # Rather than fetching the whole mapping to compare, only its
+            # fingerprint is fetched. If that doesn't match, we'll put the new
+            # mapping.
+            fingerprint = self.get_mapping_fingerprint(current_mapping)
+
             try:
-                # Make sure the index is there first.
-                self.conn.indices.create(
-                    index=self.index_name, body=self.DEFAULT_SETTINGS, ignore=400
-                )
-                self.conn.indices.put_mapping(
-                    index=self.index_name,
-                    body=current_mapping,
-                    **self._get_doc_type_option(),
-                )
+                if self.get_stored_fingerprint() != fingerprint:
+                    self._put_mapping(current_mapping, fingerprint)
+
                 self.existing_mapping = current_mapping
             except Exception:
                 if not self.silently_fail:
@@ -195,10 +290,11 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
     def _prepare_object(self, index, obj):
         return index.full_prepare(obj)
 
+    @invalidates_query_cache
     def update(self, index, iterable, commit=True):
         if not self.setup_complete:
             try:
-                self.setup()
+                self.ensure_setup()
             except elasticsearch.TransportError as e:
                 if not self.silently_fail:
                     raise
@@ -246,12 +342,13 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         if commit:
             self.conn.indices.refresh(index=self.index_name)
 
+    @invalidates_query_cache
     def remove(self, obj_or_string, commit=True):
         doc_id = get_identifier(obj_or_string)
 
         if not self.setup_complete:
             try:
-                self.setup()
+                self.ensure_setup()
             except elasticsearch.TransportError as e:
                 if not self.silently_fail:
                     raise
@@ -285,6 +382,7 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
                 exc_info=True,
             )
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         # We actually don't want to do this here, as mappings could be
         # very different.
@@ -350,6 +448,9 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         models=None,
         limit_to_registered_models=None,
         result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        filter_clauses=None,
         **extra_kwargs
     ):
         index = haystack.connections[self.connection_alias].get_unified_index()
@@ -381,6 +482,9 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
 
             kwargs["fields"] = fields
 
+        if only_fields or deferred_fields:
+            kwargs["_source"] = self._build_source_filter(only_fields, deferred_fields)
+
         if sort_by is not None:
             order_list = []
             for field, direction in sort_by:
@@ -503,6 +607,9 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         if len(model_choices) > 0:
             filters.append({"terms": {DJANGO_CT: model_choices}})
 
+        if filter_clauses:
+            filters.extend(filter_clauses)
+
         for q in narrow_queries:
             filters.append(
                 {"fquery": {"query": {"query_string": {"query": q}}, "_cache": True}}
@@ -558,14 +665,54 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
 
         return kwargs
 
-    @log_query
-    def search(self, query_string, **kwargs):
-        if len(query_string) == 0:
-            return {"results": [], "hits": 0}
+    def _build_source_filter(self, only_fields=None, deferred_fields=None):
+        """
+        Builds the ``_source`` filtering for ``only``/``defer``, always keeping
+        the fields needed to build a ``SearchResult``.
+        """
+        source_filter = {}
 
-        if not self.setup_complete:
-            self.setup()
+        if only_fields:
+            source_filter["includes"] = sorted(
+                set(only_fields).union((DJANGO_CT, DJANGO_ID))
+            )
+
+        if deferred_fields:
+            source_filter["excludes"] = sorted(
+                set(deferred_fields).difference((DJANGO_CT, DJANGO_ID))
+            )
+
+        return source_filter
+
+    def build_conn(self):
+        kwargs = {"maxsize": self.pool_size}
+
+        if self.max_retries is not None:
+            kwargs["max_retries"] = self.max_retries
+
+        if not self.keepalive:
+            kwargs["headers"] = {"Connection": "close"}
+
+        kwargs.update(self.conn_kwargs)
+        return elasticsearch.Elasticsearch(self.url, timeout=self.timeout, **kwargs)
 
+    def get_pool_stats(self):
+        connections = self.conn.transport.connection_pool.connections
+        return summarize_pools(
+            [conn.pool for conn in connections if getattr(conn, "pool", None)]
+        )
+
+    def build_async_conn(self):
+        if AsyncElasticsearch is None:
+            return None
+
+        return AsyncElasticsearch(self.url, timeout=self.timeout, **self.conn_kwargs)
+
+    def _build_search_request(self, query_string, **kwargs):
+        """
+        Returns the body & URL parameters to send for ``search``, plus whether
+        the results are sorted by distance.
+        """
         search_kwargs = self.build_search_kwargs(query_string, **kwargs)
         search_kwargs["from"] = kwargs.get("start_offset", 0)
 
@@ -578,35 +725,263 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
 
         end_offset = kwargs.get("end_offset")
         start_offset = kwargs.get("start_offset", 0)
-        if end_offset is not None and end_offset > start_offset:
+        if end_offset is not None and end_offset >= start_offset:
             search_kwargs["size"] = end_offset - start_offset
 
+        # The ``_source`` URL parameter would override any source filtering
+        # requested by ``only``/``defer`` in the body.
+        params = {} if "_source" in search_kwargs else {"_source": True}
+        params.update(self._get_doc_type_option())
+        return search_kwargs, params, geo_sort
+
+    def _search_failed(self, query_string, error):
+        if not self.silently_fail:
+            raise error
+
+        self.log.error(
+            "Failed to query Elasticsearch using '%s': %s",
+            query_string,
+            error,
+            exc_info=error,
+        )
+        return {}
+
+    @log_query
+    def search(self, query_string, **kwargs):
+        if len(query_string) == 0:
+            return {"results": [], "hits": 0}
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        search_kwargs, params, geo_sort = self._build_search_request(
+            query_string, **kwargs
+        )
+
+        try:
+            raw_results = self.conn.search(
+                body=search_kwargs, index=self.index_name, **params
+            )
+        except elasticsearch.TransportError as e:
+            raw_results = self._search_failed(query_string, e)
+
+        return self._process_results(
+            raw_results,
+            highlight=kwargs.get("highlight"),
+            result_class=kwargs.get("result_class", SearchResult),
+            distance_point=kwargs.get("distance_point"),
+            geo_sort=geo_sort,
+        )
+
+    @log_query
+    async def _native_asearch(self, query_string, **kwargs):
+        if len(query_string) == 0:
+            return {"results": [], "hits": 0}
+
+        if not self.setup_complete:
+            await sync_to_async(self.ensure_setup)()
+
+        search_kwargs, params, geo_sort = self._build_search_request(
+            query_string, **kwargs
+        )
+
+        try:
+            raw_results = await self.get_async_conn().search(
+                body=search_kwargs, index=self.index_name, **params
+            )
+        except elasticsearch.TransportError as e:
+            raw_results = self._search_failed(query_string, e)
+
+        return self._process_results(
+            raw_results,
+            highlight=kwargs.get("highlight"),
+            result_class=kwargs.get("result_class", SearchResult),
+            distance_point=kwargs.get("distance_point"),
+            geo_sort=geo_sort,
+        )
+
+    def multi_search(self, searches):
+        """
+        Sends all of the searches to Elasticsearch in a single ``_msearch``
+        request.
+        """
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        body = []
+        geo_sorts = []
+
+        for query_string, kwargs in searches:
+            if len(query_string) == 0:
+                geo_sorts.append(None)
+                continue
+
+            search_kwargs, _, geo_sort = self._build_search_request(
+                query_string, **kwargs
+            )
+            body.extend([{}, search_kwargs])
+            geo_sorts.append(geo_sort)
+
+        start = time()
+        responses = []
+
+        if body:
+            try:
+                responses = self.conn.msearch(
+                    body=body, index=self.index_name, **self._get_doc_type_option()
+                )["responses"]
+            except elasticsearch.TransportError as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to multi-search Elasticsearch: %s", e, exc_info=True
+                )
+
+        responses = iter(responses)
+        results = []
+
+        for (query_string, kwargs), geo_sort in zip(searches, geo_sorts):
+            if geo_sort is None:
+                results.append({"results": [], "hits": 0})
+                continue
+
+            raw_results = next(responses, {})
+
+            if "error" in raw_results:
+                error = elasticsearch.TransportError(
+                    raw_results.get("status", "N/A"), raw_results["error"]
+                )
+                raw_results = self._search_failed(query_string, error)
+
+            record_query(self, query_string, (), kwargs, start)
+            results.append(
+                self._process_results(
+                    raw_results,
+                    highlight=kwargs.get("highlight"),
+                    result_class=kwargs.get("result_class", SearchResult),
+                    distance_point=kwargs.get("distance_point"),
+                    geo_sort=geo_sort,
+                )
+            )
+
+        return results
+
+    def iter_search(self, query_string, chunk_size=None, **kwargs):
+        """
+        Streams every match, ``chunk_size`` hits at a time.
+
+        Uses ``search_after`` on Elasticsearch 5.x and above, so there's no
+        ``from + size`` window to outgrow, and the scroll API before that.
+        """
+        if len(query_string) == 0:
+            return
+
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        if chunk_size is None:
+            chunk_size = self.batch_size
+
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+        search_kwargs["size"] = chunk_size
+        geo_sort = any(
+            "_geo_distance" in order for order in search_kwargs.get("sort", [])
+        )
+        source_option = {} if "_source" in search_kwargs else {"_source": True}
+
+        if elasticsearch.VERSION >= (5, 0, 0):
+            raw_pages = self._search_after_pages(
+                query_string, search_kwargs, source_option
+            )
+        else:
+            raw_pages = self._scroll_pages(query_string, search_kwargs, source_option)
+
+        for raw_results in raw_pages:
+            results = self._process_results(
+                raw_results,
+                highlight=kwargs.get("highlight"),
+                result_class=kwargs.get("result_class", SearchResult),
+                distance_point=kwargs.get("distance_point"),
+                geo_sort=geo_sort,
+            )
+
+            if results["results"]:
+                yield results["results"]
+
+    def _search_after_pages(self, query_string, search_kwargs, source_option):
+        # ``search_after`` needs a total ordering, so break ties on the
+        # document's identity.
+        search_kwargs["sort"] = (
+            search_kwargs.get("sort") or [{"_score": {"order": "desc"}}]
+        ) + [{DJANGO_CT: {"order": "asc"}}, {DJANGO_ID: {"order": "asc"}}]
+
+        while True:
+            try:
+                raw_results = self.conn.search(
+                    body=search_kwargs,
+                    index=self.index_name,
+                    **source_option,
+                    **self._get_doc_type_option(),
+                )
+            except elasticsearch.TransportError as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to query Elasticsearch using '%s': %s",
+                    query_string,
+                    e,
+                    exc_info=True,
+                )
+                return
+
+            hits = raw_results.get("hits", {}).get("hits", [])
+
+            if not hits:
+                return
+
+            yield raw_results
+
+            if len(hits) < search_kwargs["size"]:
+                return
+
+            search_kwargs["search_after"] = hits[-1]["sort"]
+
+    def _scroll_pages(self, query_string, search_kwargs, source_option):
+        scroll_id = None
+
         try:
             raw_results = self.conn.search(
                 body=search_kwargs,
                 index=self.index_name,
-                _source=True,
+                scroll=self.SCROLL_TIMEOUT,
+                **source_option,
                 **self._get_doc_type_option(),
             )
+
+            while raw_results.get("hits", {}).get("hits"):
+                scroll_id = raw_results.get("_scroll_id")
+                yield raw_results
+                raw_results = self.conn.scroll(
+                    scroll_id=scroll_id, scroll=self.SCROLL_TIMEOUT
+                )
         except elasticsearch.TransportError as e:
             if not self.silently_fail:
                 raise
 
             self.log.error(
-                "Failed to query Elasticsearch using '%s': %s",
+                "Failed to scroll Elasticsearch using '%s': %s",
                 query_string,
                 e,
                 exc_info=True,
             )
-            raw_results = {}
-
-        return self._process_results(
-            raw_results,
-            highlight=kwargs.get("highlight"),
-            result_class=kwargs.get("result_class", SearchResult),
-            distance_point=kwargs.get("distance_point"),
-            geo_sort=geo_sort,
-        )
+        finally:
+            if scroll_id is not None:
+                try:
+                    self.conn.clear_scroll(scroll_id=scroll_id)
+                except elasticsearch.TransportError:
+                    pass
 
     def more_like_this(
         self,
@@ -622,7 +997,7 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
         from haystack import connections
 
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         # Deferred models will have a different class ("RealClass_Deferred_fieldname")
         # which won't be in our registry:
@@ -825,6 +1200,32 @@ class ElasticsearchSearchBackend(BaseSearchBackend):
 
         return (content_field_name, mapping)
 
+    def get_filterable_fields(self):
+        """
+        Returns the names of the fields the index stores verbatim (numbers,
+        dates, booleans & strings that aren't analyzed), which structured
+        ``term`` & ``range`` filters match exactly like the query string does.
+        """
+        fields = (
+            haystack.connections[self.connection_alias]
+            .get_unified_index()
+            .all_searchfields()
+        )
+
+        if self._filterable_fields[0] is not fields:
+            _, mapping = self.build_schema(fields)
+            self._filterable_fields = (
+                fields,
+                frozenset(
+                    field_name
+                    for field_name, field_mapping in mapping.items()
+                    if field_mapping.get("type") in FILTERABLE_TYPES
+                    or field_mapping.get("index") == "not_analyzed"
+                ),
+            )
+
+        return self._filterable_fields[1]
+
     def _iso_datetime(self, value):
         """
         If value appears to be something datetime-like, return it in ISO format.
@@ -906,10 +1307,29 @@ FIELD_MAPPINGS = {
     "integer": {"type": "long"},
 }
 
+# Mapping types whose values are indexed as-is, rather than analyzed.
+FILTERABLE_TYPES = ("keyword", "date", "boolean", "float", "long")
+
+# Lookups a structured filter matches exactly like the query string does.
+FILTER_LOOKUPS = ("exact", "in", "range", "gt", "gte", "lt", "lte")
+
+# A narrow query on a single (cleaned) value, like 'author_exact:"Daniel"'.
+NARROW_TERM_REGEX = re.compile(r'^(\w+):"((?:[^"\\]|\\.)*)"$')
+ESCAPED_CHARACTER_REGEX = re.compile(r"\\(.)")
+
 
 # Sucks that this is almost an exact copy of what's in the Solr backend,
 # but we can't import due to dependencies.
 class ElasticsearchSearchQuery(BaseSearchQuery):
+    def __init__(self, using=DEFAULT_ALIAS):
+        super().__init__(using=using)
+        # What ``build_filtered_query`` last returned.
+        self._filtered_query = None
+
+    def clear_built_query(self):
+        super().clear_built_query()
+        self._filtered_query = None
+
     def matching_all_fragment(self):
         return "*:*"
 
@@ -1024,6 +1444,140 @@ class ElasticsearchSearchQuery(BaseSearchQuery):
 
         return "%s%s" % (index_fieldname, query_frag)
 
+    def build_filter(self, child, filterable_fields):
+        """
+        Returns the ``term``, ``terms``, ``range`` or ``bool`` filter matching
+        the same documents as a node (or ``(expression, value)`` child) of the
+        query's tree, or ``None`` if it needs the query string.
+        """
+        from haystack import connections
+
+        if isinstance(child, SearchNode):
+            filters = []
+
+            for grandchild in child.children:
+                child_filter = self.build_filter(grandchild, filterable_fields)
+
+                if child_filter is None:
+                    return None
+
+                filters.append(child_filter)
+
+            if not filters:
+                return None
+            elif len(filters) == 1:
+                node_filter = filters[0]
+            elif child.connector == SQ.OR:
+                node_filter = {"bool": {"should": filters}}
+            else:
+                node_filter = {"bool": {"must": filters}}
+
+            if child.negated:
+                node_filter = {"bool": {"must_not": [node_filter]}}
+
+            return node_filter
+
+        expression, value = child
+        field, filter_type = self.query_filter.split_expression(expression)
+
+        # ``InputType`` values & searches on 'content' are query syntax.
+        if field == "content" or hasattr(value, "input_type_name"):
+            return None
+
+        # Strings get split into words, but anything else matches as a whole.
+        if filter_type == "content" and not isinstance(value, (str, bytes)):
+            filter_type = "exact"
+
+        if filter_type not in FILTER_LOOKUPS:
+            return None
+
+        index_fieldname = (
+            connections[self._using].get_unified_index().get_index_fieldname(field)
+        )
+
+        if index_fieldname not in filterable_fields:
+            return None
+
+        # Handle when we've got a ``ValuesListQuerySet``...
+        if hasattr(value, "values_list"):
+            value = list(value)
+
+        is_sequence = isinstance(value, (list, tuple, set))
+
+        if filter_type == "in":
+            if not is_sequence:
+                return None
+
+            values = [self.backend._from_python(item) for item in value]
+            return {"terms": {index_fieldname: values}}
+
+        if filter_type == "range":
+            if not is_sequence or len(value) != 2:
+                return None
+
+            start, end = value
+            return {
+                "range": {
+                    index_fieldname: {
+                        "gte": self.backend._from_python(start),
+                        "lte": self.backend._from_python(end),
+                    }
+                }
+            }
+
+        if is_sequence:
+            return None
+
+        value = self.backend._from_python(value)
+
+        if filter_type == "exact":
+            return {"term": {index_fieldname: value}}
+
+        return {"range": {index_fieldname: {filter_type: value}}}
+
+    def build_narrow_filter(self, narrow_query, filterable_fields):
+        """
+        Returns a ``term`` filter for a narrow query on one value of a
+        filterable field (like those ``FacetedSearchForm`` adds), or ``None``.
+        """
+        match = NARROW_TERM_REGEX.match(narrow_query)
+
+        if match is None or match.group(1) not in filterable_fields:
+            return None
+
+        value = ESCAPED_CHARACTER_REGEX.sub(r"\1", match.group(2))
+        return {"term": {match.group(1): value}}
+
+    def build_filtered_query(self):
+        """
+        Splits the query into the query string for its full-text parts & the
+        structured filters for the lookups on fields the index stores as-is.
+
+        Filters aren't scored and Elasticsearch can cache them, so only the
+        ``AND``-ed lookups at the top of the tree are moved out, where that
+        doesn't change which documents match.
+        """
+        if self._filtered_query is None:
+            filterable_fields = self.backend.get_filterable_fields()
+            root = self.query_filter
+            query_filter = SearchNode(connector=root.connector)
+            filters = []
+
+            if root.negated or (root.connector != SQ.AND and len(root) > 1):
+                query_filter = root
+            else:
+                for child in root.children:
+                    child_filter = self.build_filter(child, filterable_fields)
+
+                    if child_filter is None:
+                        query_filter.children.append(child)
+                    else:
+                        filters.append(child_filter)
+
+            self._filtered_query = (self.build_query_string(query_filter), filters)
+
+        return self._filtered_query
+
     def build_alt_parser_query(self, parser_name, query_string="", **kwargs):
         if query_string:
             kwargs["v"] = query_string
@@ -1076,6 +1630,12 @@ class ElasticsearchSearchQuery(BaseSearchQuery):
         if self.fields:
             search_kwargs["fields"] = self.fields
 
+        if self.only_fields:
+            search_kwargs["only_fields"] = self.only_fields
+
+        if self.deferred_fields:
+            search_kwargs["deferred_fields"] = self.deferred_fields
+
         if self.highlight:
             search_kwargs["highlight"] = self.highlight
 
@@ -1098,28 +1658,44 @@ class ElasticsearchSearchQuery(BaseSearchQuery):
 
         return search_kwargs
 
-    def run(self, spelling_query=None, **kwargs):
-        """Builds and executes the query. Returns a list of search results."""
-        final_query = self.build_query()
+    def _run_params(self, spelling_query=None, **kwargs):
+        final_query, filters = self.build_filtered_query()
         search_kwargs = self.build_params(spelling_query, **kwargs)
+        filter_clauses = list(filters)
+
+        if self.narrow_queries:
+            filterable_fields = self.backend.get_filterable_fields()
+            narrow_queries = set()
+            del search_kwargs["narrow_queries"]
+
+            # Sorted, so the same query always sends the same request.
+            for narrow_query in sorted(self.narrow_queries):
+                narrow_filter = self.build_narrow_filter(
+                    narrow_query, filterable_fields
+                )
+
+                if narrow_filter is None:
+                    narrow_queries.add(narrow_query)
+                else:
+                    filter_clauses.append(narrow_filter)
+
+            if narrow_queries:
+                search_kwargs["narrow_queries"] = narrow_queries
+
+        if filter_clauses:
+            search_kwargs["filter_clauses"] = filter_clauses
 
         if kwargs:
             search_kwargs.update(kwargs)
 
-        results = self.backend.search(final_query, **search_kwargs)
-        self._results = results.get("results", [])
-        self._hit_count = results.get("hits", 0)
-        self._facet_counts = self.post_process_facets(results)
-        self._spelling_suggestion = results.get("spelling_suggestion", None)
+        return final_query, search_kwargs
 
-    def run_mlt(self, **kwargs):
-        """Builds and executes the query. Returns a list of search results."""
+    def _mlt_params(self, **kwargs):
         if self._more_like_this is False or self._mlt_instance is None:
             raise MoreLikeThisError(
                 "No instance was provided to determine 'More Like This' results."
             )
 
-        additional_query_string = self.build_query()
         search_kwargs = {
             "start_offset": self.start_offset,
             "result_class": self.result_class,
@@ -1129,13 +1705,10 @@ class ElasticsearchSearchQuery(BaseSearchQuery):
         if self.end_offset is not None:
             search_kwargs["end_offset"] = self.end_offset - self.start_offset
 
-        results = self.backend.more_like_this(
-            self._mlt_instance, additional_query_string, **search_kwargs
-        )
-        self._results = results.get("results", [])
-        self._hit_count = results.get("hits", 0)
+        return self.build_query(), search_kwargs
 
 
 class ElasticsearchSearchEngine(BaseEngine):
     backend = ElasticsearchSearchBackend
     query = ElasticsearchSearchQuery
+    thread_safe = True
@@ -0,0 +1,1451 @@
+"""
+An in-memory backend, keeping an inverted index of the documents in the
+process & ranking the matches with BM25.
+
+Nothing needs to be installed or run alongside it, which makes it handy for
+development, continuous integration & small sites.
+"""
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.files import locks
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.encoding import force_str
+
+from haystack.backends import (
+    BaseEngine,
+    BaseSearchBackend,
+    BaseSearchQuery,
+    invalidates_query_cache,
+    log_query,
+)
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.exceptions import SkipDocument
+from haystack.fields import FacetField
+from haystack.inputs import Clean, PythonData, Raw
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+from haystack.utils import log as logging
+
+WORD_REGEX = re.compile(r"\w+")
+NUMBER_REGEX = re.compile(r"\d+(\.\d+)?")
+
+# Fields of these types have their words indexed. The rest are matched by value.
+TEXT_FIELD_TYPES = ("string", "edge_ngram", "ngram")
+
+# How many of a document's words are used to find ones like it.
+MORE_LIKE_THIS_WORDS = 25
+
+# The indexes, by connection alias, so they outlive the backends using them.
+INDEXES = {}
+INDEXES_LOCK = threading.Lock()
+
+
+def analyze(value):
+    """Splits a (possibly multivalued) field's value into lowercased words."""
+    if value is None:
+        return []
+
+    if isinstance(value, (list, tuple, set)):
+        return [word for item in value for word in analyze(item)]
+
+    return WORD_REGEX.findall(force_str(value).lower())
+
+
+def normalize(value):
+    """Makes dates comparable with datetimes."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+
+    return value
+
+
+def field_values(value):
+    """Returns the values of a (possibly multivalued) field."""
+    if value is None:
+        return []
+
+    if isinstance(value, (list, tuple, set)):
+        return [item for item in value if item is not None]
+
+    return [value]
+
+
+def file_version(path):
+    """
+    Identifies the saved index. Each save replaces the file, so its inode
+    changes along with its modification time (which can be too coarse to
+    tell saves apart).
+    """
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def encode_value(value):
+    """
+    Saves the values JSON has no type for, marking dates & datetimes so
+    they're loaded back as such. Sets are saved as lists & anything else as
+    a string.
+    """
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+
+    return force_str(value)
+
+
+def decode_value(obj):
+    """Loads back the dates & datetimes marked by ``encode_value``."""
+    if "__datetime__" in obj:
+        return parse_datetime(obj["__datetime__"])
+
+    if "__date__" in obj:
+        return parse_date(obj["__date__"])
+
+    return obj
+
+
+def sort_values(values, key, reverse=False):
+    """
+    Sorts ``values`` by ``key``, falling back to comparing them as strings
+    when they're of types that can't be compared.
+    """
+    try:
+        return sorted(values, key=key, reverse=reverse)
+    except TypeError:
+        return sorted(values, key=lambda value: force_str(key(value)), reverse=reverse)
+
+
+def edit_distance(word, other, limit):
+    """
+    Returns the Levenshtein distance between ``word`` & ``other``, or
+    ``limit + 1`` once it's known to be more than ``limit``.
+    """
+    if abs(len(word) - len(other)) > limit:
+        return limit + 1
+
+    previous = list(range(len(other) + 1))
+
+    for i, char in enumerate(word, 1):
+        current = [i]
+
+        for j, other_char in enumerate(other, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char != other_char),
+                )
+            )
+
+        if min(current) > limit:
+            return limit + 1
+
+        previous = current
+
+    return previous[-1]
+
+
+class InvertedIndex:
+    """
+    The documents of a connection, with the postings for the words in their
+    text fields & the documents holding each value of their other fields.
+
+    A posting list is a pair of arrays, with the numbers of the documents
+    holding the word (in ascending order) & how often it appears in each.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # The ``file_version`` last loaded from (or saved to) disk.
+        self.version = None
+        self.clear()
+
+    def clear(self):
+        # docnum -> the prepared document.
+        self.documents = {}
+        # identifier -> docnum.
+        self.docnums = {}
+        # fieldname -> the field's type, when it was indexed.
+        self.field_types = {}
+        # fieldname -> word -> (docnums, frequencies).
+        self.postings = {}
+        # fieldname -> docnum -> how many words the field has.
+        self.lengths = {}
+        self.total_lengths = Counter()
+        # fieldname -> value -> docnums.
+        self.values = {}
+        # fieldname -> the sorted words of the field, built when needed.
+        self.vocabularies = {}
+        self.next_docnum = 0
+
+    def load(self, path):
+        with open(path, encoding="utf-8") as index_file:
+            state = json.load(index_file, object_hook=decode_value)
+
+        self.clear()
+        self.documents = {docnum: document for docnum, document in state["documents"]}
+        self.docnums = state["docnums"]
+        self.field_types = state["field_types"]
+        self.postings = {
+            fieldname: {
+                word: (array("I", docnums), array("I", frequencies))
+                for word, docnums, frequencies in postings
+            }
+            for fieldname, postings in state["postings"].items()
+        }
+        self.lengths = {
+            fieldname: dict(lengths) for fieldname, lengths in state["lengths"].items()
+        }
+        self.total_lengths = Counter(state["total_lengths"])
+        self.values = {
+            fieldname: {value: array("I", docnums) for value, docnums in values}
+            for fieldname, values in state["values"].items()
+        }
+        self.next_docnum = state["next_docnum"]
+        self.version = file_version(path)
+
+    def save(self, path):
+        # JSON keys can only be strings, so anything keyed by a docnum or a
+        # value is saved as a list of pairs instead.
+        state = {
+            "documents": list(self.documents.items()),
+            "docnums": self.docnums,
+            "field_types": self.field_types,
+            "postings": {
+                fieldname: [
+                    (word, docnums.tolist(), frequencies.tolist())
+                    for word, (docnums, frequencies) in postings.items()
+                ]
+                for fieldname, postings in self.postings.items()
+            },
+            "lengths": {
+                fieldname: list(lengths.items())
+                for fieldname, lengths in self.lengths.items()
+            },
+            "total_lengths": self.total_lengths,
+            "values": {
+                fieldname: [
+                    (value, docnums.tolist()) for value, docnums in values.items()
+                ]
+                for fieldname, values in self.values.items()
+            },
+            "next_docnum": self.next_docnum,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, delete=False
+        ) as index_file:
+            json.dump(state, index_file, default=encode_value)
+
+        os.replace(index_file.name, path)
+        self.version = file_version(path)
+
+    def add(self, identifier, document, field_types):
+        self.remove(identifier)
+        docnum = self.next_docnum
+        self.next_docnum += 1
+        self.documents[docnum] = document
+        self.docnums[identifier] = docnum
+
+        for fieldname, value in document.items():
+            field_type = field_types.get(fieldname)
+
+            if field_type is None:
+                continue
+
+            self.field_types[fieldname] = field_type
+
+            if field_type in TEXT_FIELD_TYPES:
+                words = analyze(value)
+                postings = self.postings.setdefault(fieldname, {})
+
+                for word, frequency in Counter(words).items():
+                    if word not in postings:
+                        postings[word] = (array("I"), array("I"))
+                        self.vocabularies.pop(fieldname, None)
+
+                    docnums, frequencies = postings[word]
+                    docnums.append(docnum)
+                    frequencies.append(frequency)
+
+                self.lengths.setdefault(fieldname, {})[docnum] = len(words)
+                self.total_lengths[fieldname] += len(words)
+            else:
+                values = self.values.setdefault(fieldname, {})
+
+                for item in set(map(normalize, field_values(value))):
+                    values.setdefault(item, array("I")).append(docnum)
+
+    def remove(self, identifier):
+        docnum = self.docnums.pop(identifier, None)
+
+        if docnum is None:
+            return
+
+        document = self.documents.pop(docnum)
+
+        for fieldname, value in document.items():
+            if docnum in self.lengths.get(fieldname, ()):
+                postings = self.postings[fieldname]
+
+                for word in set(analyze(value)):
+                    docnums, frequencies = postings[word]
+                    position = bisect.bisect_left(docnums, docnum)
+                    del docnums[position]
+                    del frequencies[position]
+
+                    if not docnums:
+                        del postings[word]
+                        self.vocabularies.pop(fieldname, None)
+
+                self.total_lengths[fieldname] -= self.lengths[fieldname].pop(docnum)
+            elif fieldname in self.values:
+                values = self.values[fieldname]
+
+                for item in set(map(normalize, field_values(value))):
+                    docnums = values[item]
+                    del docnums[bisect.bisect_left(docnums, docnum)]
+
+                    if not docnums:
+                        del values[item]
+
+    def remove_models(self, model_cts):
+        for identifier, docnum in list(self.docnums.items()):
+            if self.documents[docnum][DJANGO_CT] in model_cts:
+                self.remove(identifier)
+
+    def vocabulary(self, fieldname):
+        """Returns the words of a text field, in order."""
+        if fieldname not in self.vocabularies:
+            self.vocabularies[fieldname] = sorted(self.postings.get(fieldname, ()))
+
+        return self.vocabularies[fieldname]
+
+
+class QueryParser:
+    """
+    Parses the query strings ``MemorySearchQuery`` builds (a subset of the
+    Lucene syntax) into a tree of tuples for the backend to evaluate.
+    """
+
+    field_regex = re.compile(r"([A-Za-z_][\w.]*):(?=\S)")
+
+    def __init__(self, query_string):
+        self.text = query_string
+        self.pos = 0
+
+    def parse(self):
+        node = self.parse_or(None)
+
+        # Carry on past any unbalanced ")".
+        while self.pos < len(self.text):
+            self.pos += 1
+            rest = self.parse_or(None)
+
+            if rest is not None:
+                node = rest if node is None else ("and", [node, rest])
+
+        return node
+
+    def at_end(self):
+        self.skip_spaces()
+        return self.pos >= len(self.text) or self.text[self.pos] == ")"
+
+    def skip_spaces(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def at(self, operator, ignore_case=False):
+        self.skip_spaces()
+        end = self.pos + len(operator)
+        found = self.text[self.pos : end]
+
+        if ignore_case:
+            found = found.upper()
+
+        return found == operator and (
+            end == len(self.text) or self.text[end].isspace() or self.text[end] == "("
+        )
+
+    def accept(self, operator, ignore_case=False):
+        if self.at(operator, ignore_case):
+            self.pos += len(operator)
+            return True
+
+        return False
+
+    def combine(self, connector, children):
+        if not children:
+            return None
+
+        if len(children) == 1:
+            return children[0]
+
+        return (connector, children)
+
+    def parse_or(self, field):
+        children = []
+
+        while True:
+            node = self.parse_and(field)
+
+            if node is not None:
+                children.append(node)
+
+            if not self.accept("OR"):
+                return self.combine("or", children)
+
+    def parse_and(self, field):
+        children = []
+
+        while not self.at_end() and not self.at("OR"):
+            if self.accept("AND"):
+                continue
+
+            node = self.parse_unary(field)
+
+            if node is not None:
+                children.append(node)
+
+        return self.combine("and", children)
+
+    def parse_unary(self, field):
+        if self.accept("NOT"):
+            if self.at_end():
+                return None
+
+            node = self.parse_unary(field)
+            return None if node is None else ("not", node)
+
+        char = self.text[self.pos]
+
+        if char in "+-" and self.text[self.pos + 1 : self.pos + 2].strip():
+            self.pos += 1
+            node = self.parse_unary(field)
+
+            if char == "-" and node is not None:
+                return ("not", node)
+
+            return node
+
+        return self.parse_primary(field)
+
+    def parse_primary(self, field):
+        match = self.field_regex.match(self.text, self.pos)
+
+        if match:
+            field = match.group(1)
+            self.pos = match.end()
+
+        char = self.text[self.pos]
+
+        if char == "(":
+            self.pos += 1
+            node = self.parse_or(field)
+
+            if self.pos < len(self.text):
+                self.pos += 1
+
+            if node is None:
+                node = ("none",)
+        elif char in "[{":
+            node = self.parse_range(field)
+        elif char == '"':
+            node = ("phrase", field, self.read_quoted())
+            self.read_suffix("~")
+        else:
+            node = self.parse_word(field)
+
+        boost = self.read_suffix("^")
+
+        if node is not None and boost:
+            node = ("boost", node, float(boost))
+
+        return node
+
+    def parse_range(self, field):
+        include_low = self.text[self.pos] == "["
+        self.pos += 1
+        low = self.read_bound()
+        high = None
+
+        if self.accept("TO", ignore_case=True):
+            high = self.read_bound()
+
+        self.skip_spaces()
+        include_high = True
+
+        if self.pos < len(self.text) and self.text[self.pos] in "]}":
+            include_high = self.text[self.pos] == "]"
+            self.pos += 1
+
+        return ("range", field, low, high, include_low, include_high)
+
+    def parse_word(self, field):
+        pieces = self.read_pieces('()[]{}"^~')
+
+        if not pieces:
+            # A stray "]" or the like.
+            self.pos += 1
+            return None
+
+        text = "".join(char for char, escaped in pieces)
+
+        if self.pos < len(self.text) and self.text[self.pos] == "~":
+            edits = self.read_suffix("~")
+
+            # Skip Whoosh's prefix length, as in "word~2/3".
+            if self.text[self.pos : self.pos + 1] == "/":
+                self.read_suffix("/")
+
+            return ("fuzzy", field, text, int(float(edits or 2)))
+
+        if any(char in "*?" and not escaped for char, escaped in pieces):
+            if field is None and text == "*":
+                return ("all",)
+
+            return ("wildcard", field, pieces)
+
+        return ("term", field, text)
+
+    def read_pieces(self, stop_chars):
+        """
+        Reads up to a space or one of ``stop_chars``, returning each
+        character & whether it was escaped.
+        """
+        pieces = []
+
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+
+            if char == "\\" and self.pos + 1 < len(self.text):
+                pieces.append((self.text[self.pos + 1], True))
+                self.pos += 2
+                continue
+
+            if char.isspace() or char in stop_chars:
+                break
+
+            pieces.append((char, False))
+            self.pos += 1
+
+        return pieces
+
+    def read_quoted(self):
+        chars = []
+        self.pos += 1
+
+        while self.pos < len(self.text) and self.text[self.pos] != '"':
+            if self.text[self.pos] == "\\" and self.pos + 1 < len(self.text):
+                self.pos += 1
+
+            chars.append(self.text[self.pos])
+            self.pos += 1
+
+        self.pos += 1
+        return "".join(chars)
+
+    def read_bound(self):
+        self.skip_spaces()
+
+        if self.at("TO", ignore_case=True) or self.text[self.pos : self.pos + 1] in (
+            "",
+            "]",
+            "}",
+        ):
+            return None
+
+        if self.text[self.pos] == '"':
+            return self.read_quoted()
+
+        pieces = self.read_pieces("]}")
+
+        if pieces == [("*", False)]:
+            return None
+
+        return "".join(char for char, escaped in pieces)
+
+    def read_suffix(self, marker):
+        """Reads the number after ``marker`` (as in "^2"), if there's one."""
+        if self.text[self.pos : self.pos + 1] != marker:
+            return None
+
+        self.pos += 1
+        match = NUMBER_REGEX.match(self.text, self.pos)
+
+        if match is None:
+            return None
+
+        self.pos = match.end()
+        return match.group(0)
+
+
+class MemorySearchBackend(BaseSearchBackend):
+    # Word reserved for special use.
+    RESERVED_WORDS = ("AND", "NOT", "OR", "TO")
+
+    # Characters reserved for special use.
+    # The '\\' must come first, so as not to overwrite the other slash replacements.
+    RESERVED_CHARACTERS = (
+        "\\",
+        "+",
+        "-",
+        "(",
+        ")",
+        "{",
+        "}",
+        "[",
+        "]",
+        "^",
+        '"',
+        "~",
+        "*",
+        "?",
+        ":",
+    )
+
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self.path = connection_options.get("PATH")
+        self.k1 = connection_options.get("BM25_K1", 1.2)
+        self.b = connection_options.get("BM25_B", 0.75)
+        self.index = None
+        self.log = logging.getLogger("haystack")
+
+    def setup(self):
+        with INDEXES_LOCK:
+            if self.connection_alias not in INDEXES:
+                INDEXES[self.connection_alias] = InvertedIndex()
+
+            self.index = INDEXES[self.connection_alias]
+
+        self.setup_complete = True
+
+    def _refresh(self):
+        """Loads the index saved at ``PATH``, if it's changed since last time."""
+        if not self.path:
+            return
+
+        try:
+            version = file_version(self.path)
+        except FileNotFoundError:
+            return
+
+        if version != self.index.version:
+            self.index.load(self.path)
+
+    @contextmanager
+    def _writing(self):
+        """
+        Holds the index while it's brought up to date, changed & saved.
+
+        With a ``PATH``, other processes are kept out too, with an exclusive
+        lock on a ``.lock`` file beside it, so their changes aren't lost.
+        """
+        with self.index.lock:
+            if not self.path:
+                yield
+                return
+
+            with open(self.path + ".lock", "a") as lock_file:
+                locks.lock(lock_file, locks.LOCK_EX)
+
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    locks.unlock(lock_file)
+
+    def _commit(self):
+        if self.path:
+            self.index.save(self.path)
+
+    def get_field_types(self, index):
+        """
+        Returns how each field of a ``SearchIndex`` is indexed, by its
+        fieldname. The words of text fields are indexed, facets & other
+        fields are indexed by their whole value (as ``exact``) & fields
+        that aren't indexed are left out.
+        """
+        field_types = {ID: "exact", DJANGO_CT: "exact", DJANGO_ID: "exact"}
+
+        for field in index.fields.values():
+            field_type = field.field_type
+
+            if not field.indexed:
+                field_type = None
+            elif isinstance(field, FacetField) and field_type in TEXT_FIELD_TYPES:
+                field_type = "exact"
+
+            field_types[field.index_fieldname] = field_type
+
+        return field_types
+
+    @invalidates_query_cache
+    def update(self, index, iterable, commit=True):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        field_types = self.get_field_types(index)
+
+        with self._writing():
+            for obj in iterable:
+                try:
+                    doc = index.full_prepare(obj)
+                except SkipDocument:
+                    self.log.debug("Indexing for object `%s` skipped", obj)
+                else:
+                    # Document boosts aren't supported.
+                    doc.pop("boost", None)
+
+                    try:
+                        self.index.add(doc[ID], doc, field_types)
+                    except Exception as e:
+                        if not self.silently_fail:
+                            raise
+
+                        self.log.error(
+                            "%s while preparing object for update"
+                            % e.__class__.__name__,
+                            exc_info=True,
+                            extra={
+                                "data": {"index": index, "object": get_identifier(obj)}
+                            },
+                        )
+
+            if commit:
+                self._commit()
+
+    @invalidates_query_cache
+    def remove(self, obj_or_string, commit=True):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        with self._writing():
+            self.index.remove(get_identifier(obj_or_string))
+
+            if commit:
+                self._commit()
+
+    @invalidates_query_cache
+    def clear(self, models=None, commit=True):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        if models is not None:
+            assert isinstance(models, (list, tuple))
+
+        with self._writing():
+            if models is None:
+                self.index.clear()
+            else:
+                self.index.remove_models({get_model_ct(model) for model in models})
+
+            if commit:
+                self._commit()
+
+    @log_query
+    def search(
+        self,
+        query_string,
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        facets=None,
+        narrow_queries=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        boost=None,
+        **kwargs
+    ):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        query_string = force_str(query_string)
+
+        # A zero length query should return no results.
+        if len(query_string) == 0 or (len(query_string) <= 1 and query_string != "*"):
+            return {"results": [], "hits": 0}
+
+        with self.index.lock:
+            self._refresh()
+            node = QueryParser(query_string).parse()
+            matches = self._evaluate(node) if node is not None else {}
+
+            for narrow_query in narrow_queries or ():
+                node = QueryParser(force_str(narrow_query)).parse()
+                narrowed = self._evaluate(node) if node is not None else {}
+                matches = {
+                    docnum: score
+                    for docnum, score in matches.items()
+                    if docnum in narrowed
+                }
+
+            if boost:
+                self._apply_boost(matches, boost)
+
+            return self._build_response(
+                matches,
+                sort_by=sort_by,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                facets=facets,
+                models=models,
+                limit_to_registered_models=limit_to_registered_models,
+                result_class=result_class,
+                only_fields=only_fields,
+                deferred_fields=deferred_fields,
+            )
+
+    def more_like_this(
+        self,
+        model_instance,
+        additional_query_string=None,
+        start_offset=0,
+        end_offset=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        **kwargs
+    ):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        fieldname = self.get_content_field_name()
+
+        with self.index.lock:
+            self._refresh()
+            docnum = self.index.docnums.get(get_identifier(model_instance))
+
+            if docnum is None:
+                return {"results": [], "hits": 0}
+
+            # Find the documents sharing the words most particular to this one.
+            words = Counter(analyze(self.index.documents[docnum].get(fieldname)))
+            postings = self.index.postings.get(fieldname, {})
+            doc_count = len(self.index.lengths.get(fieldname, ()))
+            top_words = heapq.nlargest(
+                MORE_LIKE_THIS_WORDS,
+                words,
+                key=lambda word: words[word]
+                * math.log(doc_count / len(postings[word][0])),
+            )
+            matches = self._evaluate(
+                ("or", [("term", fieldname, word) for word in top_words])
+            )
+            matches.pop(docnum, None)
+
+            if additional_query_string and additional_query_string != "*":
+                node = QueryParser(force_str(additional_query_string)).parse()
+                narrowed = self._evaluate(node) if node is not None else {}
+                matches = {
+                    docnum: score
+                    for docnum, score in matches.items()
+                    if docnum in narrowed
+                }
+
+            return self._build_response(
+                matches,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                models=models,
+                limit_to_registered_models=limit_to_registered_models,
+                result_class=result_class,
+            )
+
+    def iter_facet(self, query_string, field, page_size=None, **kwargs):
+        # The counts are all in memory already, so there's nothing to page.
+        results = self.search(
+            query_string, end_offset=0, facets={field: {"mincount": 1}}, **kwargs
+        )
+
+        if results.get("facets"):
+            yield from results["facets"]["fields"][field]
+
+    def get_content_field_name(self):
+        from haystack import connections
+
+        return connections[self.connection_alias].get_unified_index().document_field
+
+    def _build_response(
+        self,
+        matches,
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        facets=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+    ):
+        documents = self.index.documents
+
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(
+                settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True
+            )
+
+        if models and len(models):
+            model_choices = {get_model_ct(model) for model in models}
+        elif limit_to_registered_models:
+            model_choices = set(self.build_models_list())
+        else:
+            model_choices = None
+
+        if model_choices is not None:
+            matches = {
+                docnum: score
+                for docnum, score in matches.items()
+                if documents[docnum][DJANGO_CT] in model_choices
+            }
+
+        if result_class is None:
+            result_class = SearchResult
+
+        facet_counts = {}
+
+        if facets:
+            facet_counts = {"fields": {}, "dates": {}, "queries": {}}
+
+            for fieldname, options in facets.items():
+                facet_counts["fields"][fieldname] = self._count_facet(
+                    matches, fieldname, options
+                )
+
+        results = []
+
+        for docnum in self._order(matches, sort_by, start_offset, end_offset):
+            document = documents[docnum]
+            app_label, model_name = document[DJANGO_CT].split(".")
+            additional_fields = {
+                key: value
+                for key, value in document.items()
+                if key not in (ID, DJANGO_CT, DJANGO_ID)
+                and not (only_fields and key not in only_fields)
+                and not (deferred_fields and key in deferred_fields)
+            }
+            results.append(
+                result_class(
+                    app_label,
+                    model_name,
+                    document[DJANGO_ID],
+                    matches[docnum],
+                    **additional_fields
+                )
+            )
+
+        return {
+            "results": results,
+            "hits": len(matches),
+            "facets": facet_counts,
+            "spelling_suggestion": None,
+        }
+
+    def _order(self, matches, sort_by, start_offset=0, end_offset=None):
+        """Returns the docnums of the page of matches, in order."""
+        start_offset = start_offset or 0
+
+        if not sort_by:
+            # Best first, then in the order they were added.
+            def key(docnum):
+                return (-matches[docnum], docnum)
+
+            if end_offset is None:
+                return sorted(matches, key=key)[start_offset:]
+
+            return heapq.nsmallest(end_offset, matches, key=key)[start_offset:]
+
+        docnums = sorted(matches)
+
+        # Sort by the last field first, relying on the sorts being stable.
+        for order_by in reversed(sort_by):
+            fieldname = order_by.lstrip("-")
+            present = []
+            missing = []
+
+            for docnum in docnums:
+                if self.index.documents[docnum].get(fieldname) is None:
+                    missing.append(docnum)
+                else:
+                    present.append(docnum)
+
+            docnums = sort_values(
+                present,
+                key=lambda docnum: normalize(self.index.documents[docnum][fieldname]),
+                reverse=order_by.startswith("-"),
+            )
+            docnums.extend(missing)
+
+        return docnums[start_offset:end_offset]
+
+    def _count_facet(self, matches, fieldname, options):
+        counts = Counter()
+
+        for docnum in matches:
+            counts.update(
+                set(field_values(self.index.documents[docnum].get(fieldname)))
+            )
+
+        mincount = options.get("mincount", 1)
+        facet = sort_values(
+            [(value, count) for value, count in counts.items() if count >= mincount],
+            key=lambda item: (-item[1], normalize(item[0])),
+        )
+
+        if options.get("limit") is not None:
+            facet = facet[: int(options["limit"])]
+
+        return facet
+
+    def _apply_boost(self, matches, boost):
+        """Multiplies the scores of matches holding any of the boosted words."""
+        postings = self.index.postings.get(self.get_content_field_name(), {})
+
+        for text, factor in boost.items():
+            boosted = set()
+
+            for word in analyze(text):
+                if word in postings:
+                    boosted.update(postings[word][0])
+
+            for docnum in boosted.intersection(matches):
+                matches[docnum] *= float(factor)
+
+    def _evaluate(self, node):
+        """Returns the scores of the documents matching a parsed query node."""
+        kind = node[0]
+
+        if kind == "and":
+            positive = [child for child in node[1] if child[0] != "not"]
+            negative = [child[1] for child in node[1] if child[0] == "not"]
+
+            if positive:
+                scored = sorted(map(self._evaluate, positive), key=len)
+                matches = scored[0]
+
+                for other in scored[1:]:
+                    matches = {
+                        docnum: score + other[docnum]
+                        for docnum, score in matches.items()
+                        if docnum in other
+                    }
+            else:
+                matches = dict.fromkeys(self.index.documents, 0.0)
+
+            for child in negative:
+                if matches:
+                    excluded = self._evaluate(child)
+                    matches = {
+                        docnum: score
+                        for docnum, score in matches.items()
+                        if docnum not in excluded
+                    }
+
+            return matches
+
+        if kind == "or":
+            matches = {}
+
+            for child in node[1]:
+                for docnum, score in self._evaluate(child).items():
+                    matches[docnum] = matches.get(docnum, 0.0) + score
+
+            return matches
+
+        if kind == "not":
+            excluded = self._evaluate(node[1])
+            return {
+                docnum: 0.0 for docnum in self.index.documents if docnum not in excluded
+            }
+
+        if kind == "boost":
+            return {
+                docnum: score * node[2]
+                for docnum, score in self._evaluate(node[1]).items()
+            }
+
+        if kind == "all":
+            return dict.fromkeys(self.index.documents, 1.0)
+
+        if kind == "none":
+            return {}
+
+        fieldname = node[1] or self.get_content_field_name()
+
+        if self.index.field_types.get(fieldname) in TEXT_FIELD_TYPES:
+            return getattr(self, "_match_text_%s" % kind)(fieldname, *node[2:])
+
+        return getattr(self, "_match_value_%s" % kind)(fieldname, *node[2:])
+
+    # Matching the words of text fields.
+
+    def _score_word(self, fieldname, word):
+        """Scores the documents holding ``word`` in the field with BM25."""
+        postings = self.index.postings[fieldname].get(word)
+
+        if postings is None:
+            return {}
+
+        docnums, frequencies = postings
+        lengths = self.index.lengths[fieldname]
+        doc_count = len(lengths)
+        average_length = self.index.total_lengths[fieldname] / doc_count or 1
+        idf = math.log(1 + (doc_count - len(docnums) + 0.5) / (len(docnums) + 0.5))
+        k1 = self.k1
+        b = self.b
+
+        return {
+            docnum: idf
+            * frequency
+            * (k1 + 1)
+            / (frequency + k1 * (1 - b + b * lengths[docnum] / average_length))
+            for docnum, frequency in zip(docnums, frequencies)
+        }
+
+    def _score_any(self, fieldname, words):
+        """Scores the documents holding any of ``words`` by the best of them."""
+        matches = {}
+
+        for word in words:
+            for docnum, score in self._score_word(fieldname, word).items():
+                if score > matches.get(docnum, 0.0):
+                    matches[docnum] = score
+
+        return matches
+
+    def _expand(self, fieldname, word):
+        """
+        Returns the words of the field matching ``word``, which is a prefix of
+        them in ``edge_ngram`` fields & any part of them in ``ngram`` fields.
+        """
+        field_type = self.index.field_types[fieldname]
+
+        if field_type == "edge_ngram":
+            vocabulary = self.index.vocabulary(fieldname)
+            start = bisect.bisect_left(vocabulary, word)
+            end = bisect.bisect_left(vocabulary, word + "\U0010ffff")
+            return vocabulary[start:end]
+
+        if field_type == "ngram":
+            return [
+                other for other in self.index.vocabulary(fieldname) if word in other
+            ]
+
+        return [word]
+
+    def _match_text_term(self, fieldname, text):
+        words = analyze(text)
+
+        if len(words) > 1:
+            return self._match_text_phrase(fieldname, text)
+
+        if not words:
+            return {}
+
+        return self._score_any(fieldname, self._expand(fieldname, words[0]))
+
+    def _match_text_phrase(self, fieldname, text):
+        words = analyze(text)
+
+        if not words:
+            return {}
+
+        scored = sorted(
+            (
+                self._score_any(fieldname, self._expand(fieldname, word))
+                for word in words
+            ),
+            key=len,
+        )
+        matches = scored[0]
+
+        for other in scored[1:]:
+            matches = {
+                docnum: score + other[docnum]
+                for docnum, score in matches.items()
+                if docnum in other
+            }
+
+        if len(words) == 1 or self.index.field_types[fieldname] != "string":
+            return matches
+
+        # Check the words are next to each other.
+        return {
+            docnum: score
+            for docnum, score in matches.items()
+            if self._has_phrase(self.index.documents[docnum].get(fieldname), words)
+        }
+
+    def _has_phrase(self, value, words):
+        for item in field_values(value):
+            item_words = analyze(item)
+
+            for start in range(len(item_words) - len(words) + 1):
+                if item_words[start : start + len(words)] == words:
+                    return True
+
+        return False
+
+    def _match_text_wildcard(self, fieldname, pieces):
+        regex = self._wildcard_regex(pieces, lower=True)
+        vocabulary = self.index.vocabulary(fieldname)
+        prefix = ""
+
+        for char, escaped in pieces:
+            if char in "*?" and not escaped:
+                break
+
+            prefix += char.lower()
+
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + "\U0010ffff")
+        return self._score_any(
+            fieldname, [word for word in vocabulary[start:end] if regex.fullmatch(word)]
+        )
+
+    def _match_text_fuzzy(self, fieldname, text, edits):
+        words = analyze(text)
+
+        if not words:
+            return {}
+
+        return self._score_any(
+            fieldname,
+            [
+                word
+                for word in self.index.vocabulary(fieldname)
+                if edit_distance(words[0], word, edits) <= edits
+            ],
+        )
+
+    def _match_text_range(self, fieldname, low, high, include_low, include_high):
+        low = low.lower() if low is not None else None
+        high = high.lower() if high is not None else None
+        return self._score_any(
+            fieldname,
+            [
+                word
+                for word in self.index.vocabulary(fieldname)
+                if self._in_range(word, low, high, include_low, include_high)
+            ],
+        )
+
+    # Matching the whole values of other fields.
+
+    def _convert(self, fieldname, text):
+        """Converts a value from the query to the type of the field."""
+        field_type = self.index.field_types.get(fieldname)
+
+        try:
+            if field_type == "integer":
+                return int(text)
+            elif field_type == "float":
+                return float(text)
+            elif field_type == "boolean":
+                return text.lower() in ("true", "1")
+            elif field_type in ("date", "datetime"):
+                value = parse_datetime(text) or parse_date(text)
+                return None if value is None else normalize(value)
+        except ValueError:
+            return None
+
+        return text
+
+    def _match_values(self, fieldname, predicate):
+        matches = {}
+
+        for value, docnums in self.index.values.get(fieldname, {}).items():
+            try:
+                matched = predicate(value)
+            except TypeError:
+                matched = False
+
+            if matched:
+                matches.update(dict.fromkeys(docnums, 0.0))
+
+        return matches
+
+    def _match_value_term(self, fieldname, text):
+        docnums = self.index.values.get(fieldname, {}).get(
+            self._convert(fieldname, text), ()
+        )
+        return dict.fromkeys(docnums, 0.0)
+
+    _match_value_phrase = _match_value_term
+
+    def _match_value_fuzzy(self, fieldname, text, edits):
+        return self._match_value_term(fieldname, text)
+
+    def _match_value_wildcard(self, fieldname, pieces):
+        regex = self._wildcard_regex(pieces)
+        return self._match_values(
+            fieldname, lambda value: regex.fullmatch(force_str(value))
+        )
+
+    def _match_value_range(self, fieldname, low, high, include_low, include_high):
+        if low is not None:
+            low = self._convert(fieldname, low)
+
+        if high is not None:
+            high = self._convert(fieldname, high)
+
+        return self._match_values(
+            fieldname,
+            lambda value: self._in_range(value, low, high, include_low, include_high),
+        )
+
+    def _in_range(self, value, low, high, include_low, include_high):
+        if low is not None and (value < low or (value == low and not include_low)):
+            return False
+
+        if high is not None and (value > high or (value == high and not include_high)):
+            return False
+
+        return True
+
+    def _wildcard_regex(self, pieces, lower=False):
+        regex = []
+
+        for char, escaped in pieces:
+            if char == "*" and not escaped:
+                regex.append(".*")
+            elif char == "?" and not escaped:
+                regex.append(".")
+            else:
+                regex.append(re.escape(char.lower() if lower else char))
+
+        return re.compile("".join(regex), re.DOTALL)
+
+    def _from_python(self, value):
+        """Converts Python values to a string for the query."""
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        elif isinstance(value, bool):
+            return "true" if value else "false"
+
+        return force_str(value)
+
+
+class MemorySearchQuery(BaseSearchQuery):
+    def build_query_string(self, query_filter):
+        """
+        Builds the query string for a tree of ``SQ`` objects. The boosts go
+        to the backend separately, as ``boost``.
+        """
+        final_query = query_filter.as_query_string(self.build_query_fragment)
+        return final_query or self.matching_all_fragment()
+
+    def build_exact_query(self, query_string):
+        return '"%s"' % query_string.replace("\\", "\\\\").replace('"', '\\"')
+
+    def build_query_fragment(self, field, filter_type, value):
+        from haystack import connections
+
+        if not hasattr(value, "input_type_name"):
+            # Handle when we've got a ``ValuesListQuerySet``...
+            if hasattr(value, "values_list"):
+                value = list(value)
+
+            if isinstance(value, str) and value != " ":
+                # It's not an ``InputType``. Assume ``Clean``.
+                value = Clean(value)
+            else:
+                value = PythonData(value)
+
+        # Prepare the query using the InputType.
+        prepared_value = value.prepare(self)
+
+        # Values are quoted as they were given, rather than cleaned.
+        if value.input_type_name == "clean":
+            raw_value = value.query_string
+        else:
+            raw_value = prepared_value
+
+        # 'content' is a special reserved word, much like 'pk' in
+        # Django's ORM layer. It indicates 'no special field'.
+        if field == "content":
+            index_fieldname = ""
+        else:
+            index_fieldname = "%s:" % connections[
+                self._using
+            ].get_unified_index().get_index_fieldname(field)
+
+        word_filter_types = {
+            "content": "%s",
+            "contains": "*%s*",
+            "endswith": "*%s",
+            "startswith": "%s*",
+            "fuzzy": "%s~",
+        }
+        range_filter_types = {
+            "gt": "{%s TO *}",
+            "gte": "[%s TO *]",
+            "lt": "{* TO %s}",
+            "lte": "[* TO %s]",
+        }
+
+        if value.post_process is False or value.input_type_name in ("exact", "not"):
+            query_frag = prepared_value
+        elif filter_type in word_filter_types:
+            if isinstance(prepared_value, str):
+                words = prepared_value.split()
+            else:
+                words = self.clean(self.backend._from_python(prepared_value)).split()
+
+            query_frag = " AND ".join(
+                word_filter_types[filter_type] % word for word in words
+            )
+
+            if len(words) > 1:
+                query_frag = "(%s)" % query_frag
+        elif filter_type == "in":
+            query_frag = "(%s)" % " OR ".join(
+                self._quote(possible_value) for possible_value in prepared_value
+            )
+        elif filter_type == "range":
+            query_frag = "[%s TO %s]" % (
+                self._quote(prepared_value[0]),
+                self._quote(prepared_value[1]),
+            )
+        elif filter_type == "exact":
+            query_frag = self._quote(raw_value)
+        else:
+            query_frag = range_filter_types[filter_type] % self._quote(raw_value)
+
+        if len(query_frag) and not isinstance(value, Raw):
+            if not query_frag.startswith("(") and not query_frag.endswith(")"):
+                query_frag = "(%s)" % query_frag
+
+        return "%s%s" % (index_fieldname, query_frag)
+
+    def _quote(self, value):
+        return self.build_exact_query(self.backend._from_python(value))
+
+
+class MemoryEngine(BaseEngine):
+    backend = MemorySearchBackend
+    query = MemorySearchQuery
+    thread_safe = True
@@ -130,3 +130,4 @@ class SimpleSearchQuery(BaseSearchQuery):
 class SimpleEngine(BaseEngine):
     backend = SimpleSearchBackend
     query = SimpleSearchQuery
+    thread_safe = True
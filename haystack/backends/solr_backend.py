@@ -1,31 +1,109 @@
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from time import time
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
 import haystack
 from haystack.backends import (
+    SQ,
     BaseEngine,
     BaseSearchBackend,
     BaseSearchQuery,
     EmptyResults,
+    SearchNode,
+    invalidates_query_cache,
     log_query,
+    record_query,
 )
-from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.constants import DEFAULT_ALIAS, DJANGO_CT, DJANGO_ID, ID
 from haystack.exceptions import MissingDependency, MoreLikeThisError, SkipDocument
 from haystack.inputs import Clean, Exact, PythonData, Raw
 from haystack.models import SearchResult
 from haystack.utils import get_identifier, get_model_ct
 from haystack.utils import log as logging
 from haystack.utils.app_loading import haystack_get_model
+from haystack.utils.pooling import (
+    build_session,
+    get_pool,
+    session_pools,
+    summarize_pools,
+)
 
 try:
-    from pysolr import Solr, SolrError
+    from pysolr import Solr, SolrError, safe_urlencode
 except ImportError:
     raise MissingDependency(
         "The 'solr' backend requires the installation of 'pysolr'. Please refer to the documentation."
     )
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Lookups that only narrow the results down, without adding to the score.
+FILTER_LOOKUPS = ("exact", "in", "range", "gt", "gte", "lt", "lte")
+
+
+class AsyncSolr:
+    """
+    Sends ``pysolr.Solr`` searches over ``httpx``, so they can be awaited.
+
+    The URL, handler, decoding & results class all come from the ``Solr``
+    instance, so the responses are the same as ``pysolr`` would give.
+    """
+
+    def __init__(self, solr):
+        self.solr = solr
+        self.client = httpx.AsyncClient(
+            timeout=solr.timeout, auth=solr.auth, verify=solr.verify
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def search(self, q, search_handler=None, **kwargs):
+        params = {"q": q}
+        params.update(kwargs)
+        params.setdefault("wt", "json")
+        custom_handler = search_handler or self.solr.search_handler
+        handler = "select"
+
+        if custom_handler:
+            if self.solr.use_qt_param:
+                params["qt"] = custom_handler
+            else:
+                handler = custom_handler
+
+        url = self.solr._create_full_url("%s/" % handler)
+        params_encoded = safe_urlencode(params, True)
+
+        try:
+            if len(params_encoded) < 1024:
+                response = await self.client.get("%s?%s" % (url, params_encoded))
+            else:
+                # Very long queries are sent as a POST, like ``pysolr`` does.
+                response = await self.client.post(
+                    url,
+                    content=params_encoded,
+                    headers={
+                        "Content-type": "application/x-www-form-urlencoded; "
+                        "charset=utf-8"
+                    },
+                )
+        except httpx.HTTPError as e:
+            raise SolrError("Failed to query Solr at %s: %s" % (url, e))
+
+        if response.status_code != 200:
+            raise SolrError(
+                "Solr responded with an error (HTTP %s): %s"
+                % (response.status_code, self.solr._extract_error(response))
+            )
+
+        return self.solr.results_cls(self.solr.decoder.decode(response.text))
+
 
 class SolrSearchBackend(BaseSearchBackend):
     # Word reserved by Solr for special use.
@@ -55,6 +133,10 @@ class SolrSearchBackend(BaseSearchBackend):
         "/",
     )
 
+    # How many searches ``multi_search`` sends at once, matching the size of
+    # the connection pool ``requests`` keeps per host.
+    MULTI_SEARCH_WORKERS = 10
+
     def __init__(self, connection_alias, **connection_options):
         super().__init__(connection_alias, **connection_options)
 
@@ -69,13 +151,29 @@ class SolrSearchBackend(BaseSearchBackend):
         # Support to `date_facet` on Solr >= 6.6. Olders set `date`
         self.date_facet_field = connection_options.get("DATE_FACET_FIELD", "range")
 
-        self.conn = Solr(
-            connection_options["URL"],
-            timeout=self.timeout,
-            **connection_options.get("KWARGS", {})
-        )
+        # Local params (like "cache=false cost=200") for the filter queries
+        # on each field, keyed by index fieldname.
+        self.fq_local_params = connection_options.get("FQ_LOCAL_PARAMS", {})
+
+        self.pool_size = connection_options.get("POOL_SIZE", 10)
+        self.max_retries = connection_options.get("MAX_RETRIES", 0)
+        self.keepalive = connection_options.get("KEEPALIVE", True)
+
+        kwargs = dict(connection_options.get("KWARGS", {}))
+
+        if "session" not in kwargs:
+            # Every thread & backend instance for the connection shares one
+            # session, and so one pool of connections.
+            kwargs["session"] = get_pool(
+                connection_alias,
+                lambda: build_session(self.pool_size, self.max_retries, self.keepalive),
+                options=(self.pool_size, self.max_retries, self.keepalive),
+            )
+
+        self.conn = Solr(connection_options["URL"], timeout=self.timeout, **kwargs)
         self.log = logging.getLogger("haystack")
 
+    @invalidates_query_cache
     def update(self, index, iterable, commit=True):
         docs = []
 
@@ -106,6 +204,7 @@ class SolrSearchBackend(BaseSearchBackend):
 
                 self.log.error("Failed to add documents to Solr: %s", e, exc_info=True)
 
+    @invalidates_query_cache
     def remove(self, obj_or_string, commit=True):
         solr_id = get_identifier(obj_or_string)
 
@@ -123,6 +222,7 @@ class SolrSearchBackend(BaseSearchBackend):
                 exc_info=True,
             )
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         if models is not None:
             assert isinstance(models, (list, tuple))
@@ -181,6 +281,207 @@ class SolrSearchBackend(BaseSearchBackend):
             distance_point=kwargs.get("distance_point"),
         )
 
+    def get_pool_stats(self):
+        return summarize_pools(session_pools(self.conn.get_session()))
+
+    def multi_search(self, searches):
+        """
+        Runs the searches concurrently, sharing the ``Solr`` connection's HTTP
+        session & its pool of connections.
+        """
+        # Make sure the session exists before the threads go looking for it.
+        self.conn.get_session()
+        start = time()
+
+        with ThreadPoolExecutor(max_workers=self.MULTI_SEARCH_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    self.conn.search,
+                    query_string,
+                    **self.build_search_kwargs(query_string, **kwargs)
+                )
+                if len(query_string)
+                else None
+                for query_string, kwargs in searches
+            ]
+
+        results = []
+
+        for (query_string, kwargs), future in zip(searches, futures):
+            if future is None:
+                results.append({"results": [], "hits": 0})
+                continue
+
+            try:
+                raw_results = future.result()
+            except (IOError, SolrError) as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to query Solr using '%s': %s",
+                    query_string,
+                    e,
+                    exc_info=True,
+                )
+                raw_results = EmptyResults()
+
+            record_query(self, query_string, (), kwargs, start)
+            results.append(
+                self._process_results(
+                    raw_results,
+                    highlight=kwargs.get("highlight"),
+                    result_class=kwargs.get("result_class", SearchResult),
+                    distance_point=kwargs.get("distance_point"),
+                )
+            )
+
+        return results
+
+    def build_async_conn(self):
+        if httpx is None:
+            return None
+
+        return AsyncSolr(self.conn)
+
+    @log_query
+    async def _native_asearch(self, query_string, **kwargs):
+        if len(query_string) == 0:
+            return {"results": [], "hits": 0}
+
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+
+        try:
+            raw_results = await self.get_async_conn().search(
+                query_string, **search_kwargs
+            )
+        except (IOError, SolrError) as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to query Solr using '%s': %s", query_string, e, exc_info=True
+            )
+            raw_results = EmptyResults()
+
+        return self._process_results(
+            raw_results,
+            highlight=kwargs.get("highlight"),
+            result_class=kwargs.get("result_class", SearchResult),
+            distance_point=kwargs.get("distance_point"),
+        )
+
+    def iter_search(self, query_string, chunk_size=None, **kwargs):
+        """
+        Streams every match, ``chunk_size`` documents at a time, using Solr's
+        ``cursorMark`` deep paging.
+        """
+        if len(query_string) == 0:
+            return
+
+        if chunk_size is None:
+            chunk_size = self.batch_size
+
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+        search_kwargs.pop("start", None)
+        search_kwargs["rows"] = chunk_size
+
+        # Cursors require the sort to end on the uniqueKey.
+        sort = search_kwargs.get("sort") or "score desc"
+        search_kwargs["sort"] = "%s, %s asc" % (sort, ID)
+        cursor_mark = "*"
+
+        while True:
+            search_kwargs["cursorMark"] = cursor_mark
+
+            try:
+                raw_results = self.conn.search(query_string, **search_kwargs)
+            except (IOError, SolrError) as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to query Solr using '%s': %s",
+                    query_string,
+                    e,
+                    exc_info=True,
+                )
+                return
+
+            results = self._process_results(
+                raw_results,
+                highlight=kwargs.get("highlight"),
+                result_class=kwargs.get("result_class", SearchResult),
+                distance_point=kwargs.get("distance_point"),
+            )
+
+            if results["results"]:
+                yield results["results"]
+
+            # Solr hands back the same cursor once everything has been seen.
+            next_cursor_mark = getattr(raw_results, "nextCursorMark", None)
+
+            if not raw_results.docs or next_cursor_mark in (None, cursor_mark):
+                return
+
+            cursor_mark = next_cursor_mark
+
+    def iter_facet(self, query_string, field, page_size=None, **kwargs):
+        """
+        Streams every ``(value, count)`` of a field facet, in order of value,
+        fetching ``page_size`` values at a time by ``facet.offset``.
+        """
+        if len(query_string) == 0:
+            return
+
+        if page_size is None:
+            page_size = self.batch_size
+
+        index = haystack.connections[self.connection_alias].get_unified_index()
+        facet_field = index.get_facet_fieldname(field)
+        search_kwargs = self.build_search_kwargs(query_string, **kwargs)
+        search_kwargs.pop("start", None)
+        search_kwargs.update(
+            {
+                "rows": 0,
+                "facet": "on",
+                "facet.field": [facet_field],
+                "facet.limit": page_size,
+                "facet.mincount": 1,
+                # Sorting by value keeps the pages stable.
+                "facet.sort": "index",
+            }
+        )
+        offset = 0
+
+        while True:
+            search_kwargs["facet.offset"] = offset
+
+            try:
+                raw_results = self.conn.search(query_string, **search_kwargs)
+            except (IOError, SolrError) as e:
+                if not self.silently_fail:
+                    raise
+
+                self.log.error(
+                    "Failed to page through the '%s' facet using '%s': %s",
+                    field,
+                    query_string,
+                    e,
+                    exc_info=True,
+                )
+                return
+
+            counts = raw_results.facets.get("facet_fields", {}).get(facet_field, [])
+            values = list(zip(counts[::2], counts[1::2]))
+
+            yield from values
+
+            if len(values) < page_size:
+                return
+
+            offset += page_size
+
     def build_search_kwargs(
         self,
         query_string,
@@ -202,6 +503,8 @@ class SolrSearchBackend(BaseSearchBackend):
         result_class=None,
         stats=None,
         collate=None,
+        only_fields=None,
+        deferred_fields=None,
         **extra_kwargs
     ):
 
@@ -214,6 +517,8 @@ class SolrSearchBackend(BaseSearchBackend):
                 fields = " ".join(fields)
 
             kwargs["fl"] = fields
+        elif only_fields or deferred_fields:
+            kwargs["fl"] = self._build_field_list(only_fields, deferred_fields)
 
         if sort_by is not None:
             if sort_by in ["distance asc", "distance desc"] and distance_point:
@@ -387,6 +692,31 @@ class SolrSearchBackend(BaseSearchBackend):
 
         return kwargs
 
+    def _build_field_list(self, only_fields=None, deferred_fields=None):
+        """
+        Builds the ``fl`` parameter for ``only``/``defer``.
+
+        Solr can't exclude fields from ``fl``, so deferring works from the list
+        of stored fields in the unified index instead.
+        """
+        if only_fields:
+            field_names = set(only_fields)
+        else:
+            unified_index = haystack.connections[
+                self.connection_alias
+            ].get_unified_index()
+            field_names = {
+                field_name
+                for field_name, field in unified_index.all_searchfields().items()
+                if field.stored
+            }
+
+        if deferred_fields:
+            field_names.difference_update(deferred_fields)
+
+        field_names.update((ID, DJANGO_CT, DJANGO_ID))
+        return " ".join(sorted(field_names) + ["score"])
+
     def more_like_this(
         self,
         model_instance,
@@ -758,6 +1088,15 @@ class SolrSearchBackend(BaseSearchBackend):
 
 
 class SolrSearchQuery(BaseSearchQuery):
+    def __init__(self, using=DEFAULT_ALIAS):
+        super().__init__(using=using)
+        # What ``build_filtered_query`` last returned.
+        self._filtered_query = None
+
+    def clear_built_query(self):
+        super().clear_built_query()
+        self._filtered_query = None
+
     def matching_all_fragment(self):
         return "*:*"
 
@@ -866,6 +1205,91 @@ class SolrSearchQuery(BaseSearchQuery):
 
         return "%s%s" % (index_fieldname, query_frag)
 
+    def get_filter_fields(self, child):
+        """
+        Returns the index fieldnames a node (or ``(expression, value)`` child)
+        of the query's tree looks in, or ``None`` if any of its lookups adds
+        to the score.
+        """
+        from haystack import connections
+
+        if isinstance(child, SearchNode):
+            fields = []
+
+            for grandchild in child.children:
+                child_fields = self.get_filter_fields(grandchild)
+
+                if child_fields is None:
+                    return None
+
+                fields.extend(child_fields)
+
+            return fields or None
+
+        expression, value = child
+        field, filter_type = self.query_filter.split_expression(expression)
+
+        # ``InputType`` values & searches on 'content' are query syntax.
+        if field == "content" or hasattr(value, "input_type_name"):
+            return None
+
+        # Strings get searched for word by word, but not anything else.
+        if filter_type == "content" and not isinstance(value, (str, bytes)):
+            filter_type = "exact"
+
+        if filter_type not in FILTER_LOOKUPS:
+            return None
+
+        return [connections[self._using].get_unified_index().get_index_fieldname(field)]
+
+    def build_filter_query(self, child, fields):
+        """
+        Returns the ``fq`` for a node (or ``(expression, value)`` child) of the
+        query's tree, with the first local params the connection's
+        ``FQ_LOCAL_PARAMS`` has for its fields.
+        """
+        filter_query = SearchNode([child]).as_query_string(self.build_query_fragment)
+
+        for field in fields:
+            local_params = self.backend.fq_local_params.get(field)
+
+            if local_params:
+                return "{!%s}%s" % (local_params, filter_query)
+
+        return filter_query
+
+    def build_filtered_query(self):
+        """
+        Splits the query into the query string for its scored parts & the
+        filter queries for lookups that only narrow the results down.
+
+        Solr caches each filter query on its own, so common clauses get
+        reused across searches. Only the ``AND``-ed lookups at the top of the
+        tree are moved out, where that doesn't change which documents match.
+        """
+        if self._filtered_query is None:
+            root = self.query_filter
+            query_filter = SearchNode(connector=root.connector)
+            filter_queries = []
+
+            if root.negated or (root.connector != SQ.AND and len(root) > 1):
+                query_filter = root
+            else:
+                for child in root.children:
+                    fields = self.get_filter_fields(child)
+
+                    if fields is None:
+                        query_filter.children.append(child)
+                    else:
+                        filter_queries.append(self.build_filter_query(child, fields))
+
+            self._filtered_query = (
+                self.build_query_string(query_filter),
+                filter_queries,
+            )
+
+        return self._filtered_query
+
     def build_alt_parser_query(self, parser_name, query_string="", **kwargs):
         if query_string:
             query_string = Clean(query_string).prepare(self)
@@ -946,30 +1370,28 @@ class SolrSearchQuery(BaseSearchQuery):
 
         return search_kwargs
 
-    def run(self, spelling_query=None, **kwargs):
-        """Builds and executes the query. Returns a list of search results."""
-        final_query = self.build_query()
+    def _run_params(self, spelling_query=None, **kwargs):
+        final_query, filter_queries = self.build_filtered_query()
         search_kwargs = self.build_params(spelling_query, **kwargs)
 
+        if filter_queries:
+            search_kwargs["narrow_queries"] = self.narrow_queries.union(filter_queries)
+
         if kwargs:
             search_kwargs.update(kwargs)
 
-        results = self.backend.search(final_query, **search_kwargs)
+        return final_query, search_kwargs
 
-        self._results = results.get("results", [])
-        self._hit_count = results.get("hits", 0)
-        self._facet_counts = self.post_process_facets(results)
+    def _store_results(self, results):
+        super()._store_results(results)
         self._stats = results.get("stats", {})
-        self._spelling_suggestion = results.get("spelling_suggestion", None)
 
-    def run_mlt(self, **kwargs):
-        """Builds and executes the query. Returns a list of search results."""
+    def _mlt_params(self, **kwargs):
         if self._more_like_this is False or self._mlt_instance is None:
             raise MoreLikeThisError(
                 "No instance was provided to determine 'More Like This' results."
             )
 
-        additional_query_string = self.build_query()
         search_kwargs = {
             "start_offset": self.start_offset,
             "result_class": self.result_class,
@@ -979,13 +1401,10 @@ class SolrSearchQuery(BaseSearchQuery):
         if self.end_offset is not None:
             search_kwargs["end_offset"] = self.end_offset - self.start_offset
 
-        results = self.backend.more_like_this(
-            self._mlt_instance, additional_query_string, **search_kwargs
-        )
-        self._results = results.get("results", [])
-        self._hit_count = results.get("hits", 0)
+        return self.build_query(), search_kwargs
 
 
 class SolrEngine(BaseEngine):
     backend = SolrSearchBackend
     query = SolrSearchQuery
+    thread_safe = True
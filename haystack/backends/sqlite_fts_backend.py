@@ -0,0 +1,1245 @@
+"""
+A backend keeping the index in an SQLite database, searched with SQLite's FTS5
+full-text extension.
+
+Nothing needs to be run alongside it & it only needs the ``sqlite3`` module
+that ships with Python, which makes it a good fit for smaller sites.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import warnings
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.encoding import force_str
+
+from haystack.backends import (
+    BaseEngine,
+    BaseSearchBackend,
+    BaseSearchQuery,
+    invalidates_query_cache,
+    log_query,
+)
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.exceptions import MissingDependency, SearchBackendError, SkipDocument
+from haystack.fields import FacetField
+from haystack.inputs import Clean, PythonData
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+from haystack.utils import log as logging
+
+
+def has_fts5():
+    """Checks the SQLite that Python uses was built with FTS5."""
+    conn = sqlite3.connect(":memory:")
+
+    try:
+        conn.execute("CREATE VIRTUAL TABLE fts5_check USING fts5(text)")
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+    return True
+
+
+if not has_fts5():
+    raise MissingDependency(
+        "The 'sqlite_fts' backend requires SQLite to be built with the FTS5 extension."
+    )
+
+DOCUMENTS_TABLE = "haystack_documents"
+FTS_TABLE = "haystack_fts"
+# Holds the stored fields that aren't indexed, as JSON.
+DATA_COLUMN = "haystack_data"
+
+# Fields of these types are searched with FTS5. The rest are compared by value.
+TEXT_FIELD_TYPES = ("string", "edge_ngram")
+SQL_TYPES = {"integer": "INTEGER", "float": "REAL", "boolean": "INTEGER"}
+
+# How many of a document's words are used to find ones like it.
+MORE_LIKE_THIS_WORDS = 50
+
+WORD_REGEX = re.compile(r"\w+")
+MATCH_REGEX = re.compile(r"MATCH '((?:[^']|'')*)'")
+AUTO_QUERY_REGEX = re.compile(r'(NOT )?("(?:[^"]|"")*"|\S+)')
+PHRASE_REGEX = re.compile(r'^"(?:[^"]|"")*"$')
+NARROW_QUERY_REGEX = re.compile(r'^([A-Za-z_][\w.]*):(?:"((?:[^"\\]|\\.)*)"|(\S+))$')
+ESCAPED_REGEX = re.compile(r"\\(.)")
+
+
+def quote_name(name):
+    """Quotes the name of a table or column for SQL."""
+    return '"%s"' % name.replace('"', '""')
+
+
+def quote_value(value):
+    """Turns a value (already converted for SQLite) into an SQL literal."""
+    if value is None:
+        return "NULL"
+    elif isinstance(value, (int, float)):
+        return repr(value)
+
+    return "'%s'" % force_str(value).replace("\x00", "").replace("'", "''")
+
+
+def quote_phrase(text):
+    """Turns text into an FTS5 string, matching its words as a phrase."""
+    return '"%s"' % text.replace('"', '""')
+
+
+def unquote(phrase):
+    """Turns an FTS5 string back into the text ``quote_phrase`` was given."""
+    return phrase[1:-1].replace('""', '"')
+
+
+def add_gap(value, gap_by, gap_amount):
+    """Moves a datetime on by ``gap_amount`` of ``gap_by`` (as in "month")."""
+    if gap_by == "year":
+        return value.replace(year=value.year + gap_amount)
+
+    if gap_by == "month":
+        month = value.month - 1 + gap_amount
+        return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+    return value + timedelta(**{"%ss" % gap_by: gap_amount})
+
+
+def normalize(value):
+    """Makes dates comparable with datetimes."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+
+    return value
+
+
+class Column:
+    """How a field of the ``SearchIndex`` is kept in the documents table."""
+
+    def __init__(self, name, field_type, multivalued=False, boost=1.0, stored=True):
+        self.name = name
+        self.field_type = field_type
+        self.multivalued = multivalued
+        self.boost = boost
+        self.stored = stored
+
+    @property
+    def full_text(self):
+        return self.field_type in TEXT_FIELD_TYPES and not self.multivalued
+
+    @property
+    def sql_type(self):
+        if self.multivalued:
+            return "TEXT"
+
+        return SQL_TYPES.get(self.field_type, "TEXT")
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    # Words reserved by FTS5 for special use. Every word sent to it is quoted,
+    # so there's no need to clean them.
+    RESERVED_WORDS = ("AND", "NOT", "OR", "NEAR")
+    RESERVED_CHARACTERS = ()
+
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self.path = connection_options.get("PATH")
+        self.tokenize = connection_options.get(
+            "TOKENIZE", "porter unicode61 remove_diacritics 2"
+        )
+        self.content_field_name = None
+        self.columns = None
+        # SQLite connections can't be shared between threads.
+        self._local = threading.local()
+
+        if not self.path:
+            raise ImproperlyConfigured(
+                "You must specify a 'PATH' in your settings for connection '%s'."
+                % connection_alias
+            )
+
+        self.log = logging.getLogger("haystack")
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            # Transactions are started explicitly, by ``transaction``.
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            # Let searches carry on while the index is being updated.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+
+        return conn
+
+    def close(self):
+        """
+        Closes the calling thread's connection, which is reopened when next
+        needed. Those of other threads are closed as the threads end.
+        """
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Runs the statements in the block in one (write) transaction."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        conn.execute("COMMIT")
+
+    def setup(self):
+        """
+        Creates the tables, if they don't exist yet.
+
+        Tables made for other fields are left alone, with a warning, as
+        replacing them loses the index. ``clear`` (& so ``rebuild_index``)
+        replaces them.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.columns = None
+        self.get_schema()
+        statements = self.build_table_statements()
+        existing = dict(
+            self.conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE name IN (?, ?)",
+                (DOCUMENTS_TABLE, FTS_TABLE),
+            )
+        )
+
+        if not existing:
+            with self.transaction() as conn:
+                self.create_tables(conn)
+        elif existing != {DOCUMENTS_TABLE: statements[0], FTS_TABLE: statements[1]}:
+            self.log.warning(
+                "The fields of the indexes for connection '%s' have changed since"
+                " its SQLite tables were created. Run rebuild_index to recreate"
+                " them.",
+                self.connection_alias,
+            )
+
+        self.setup_complete = True
+
+    def get_schema(self):
+        """Returns the name of the content field & the columns, by fieldname."""
+        from haystack import connections
+
+        if self.columns is None:
+            self.content_field_name, self.columns = self.build_schema(
+                connections[self.connection_alias]
+                .get_unified_index()
+                .all_searchfields()
+            )
+
+        return self.content_field_name, self.columns
+
+    def build_schema(self, fields):
+        content_field_name = ""
+        columns = {}
+
+        for field_class in fields.values():
+            if field_class.document is True:
+                content_field_name = field_class.index_fieldname
+
+            if not field_class.indexed:
+                continue
+
+            field_type = field_class.field_type
+
+            # Facets are counted by their whole value, rather than searched.
+            if isinstance(field_class, FacetField) and field_type in TEXT_FIELD_TYPES:
+                field_type = "exact"
+
+            columns[field_class.index_fieldname] = Column(
+                field_class.index_fieldname,
+                field_type,
+                multivalued=field_class.is_multivalued,
+                boost=field_class.boost,
+                stored=field_class.stored,
+            )
+
+        # Fail more gracefully than relying on the backend to die if no fields
+        # are found.
+        if not columns:
+            raise SearchBackendError(
+                "No fields were found in any search_indexes. Please correct this before attempting to search."
+            )
+
+        return (content_field_name, columns)
+
+    @property
+    def full_text_columns(self):
+        return [column for column in self.columns.values() if column.full_text]
+
+    def build_table_statements(self):
+        """
+        Returns the statements creating the documents table, the FTS5 table
+        indexing its text columns & then the triggers & indexes keeping them
+        up to date.
+
+        The FTS5 table reads the text from the documents table, rather than
+        keeping a copy of its own.
+        """
+        column_definitions = [
+            '"rowid" INTEGER PRIMARY KEY',
+            "%s TEXT NOT NULL UNIQUE" % quote_name(ID),
+            "%s TEXT NOT NULL" % quote_name(DJANGO_CT),
+            "%s TEXT NOT NULL" % quote_name(DJANGO_ID),
+            "%s TEXT" % quote_name(DATA_COLUMN),
+        ] + [
+            "%s %s" % (quote_name(column.name), column.sql_type)
+            for column in self.columns.values()
+        ]
+        text_columns = ", ".join(
+            quote_name(column.name) for column in self.full_text_columns
+        )
+        statements = [
+            "CREATE TABLE %s (%s)"
+            % (quote_name(DOCUMENTS_TABLE), ", ".join(column_definitions)),
+            "CREATE VIRTUAL TABLE %s USING fts5(%s, content=%s, "
+            "content_rowid='rowid', tokenize=%s)"
+            % (
+                quote_name(FTS_TABLE),
+                text_columns,
+                quote_value(DOCUMENTS_TABLE),
+                quote_value(self.tokenize),
+            ),
+            "CREATE TRIGGER %s AFTER INSERT ON %s BEGIN "
+            "INSERT INTO %s(rowid, %s) VALUES (new.rowid, %s); END"
+            % (
+                quote_name(DOCUMENTS_TABLE + "_insert"),
+                quote_name(DOCUMENTS_TABLE),
+                quote_name(FTS_TABLE),
+                text_columns,
+                ", ".join(
+                    "new.%s" % quote_name(column.name)
+                    for column in self.full_text_columns
+                ),
+            ),
+            "CREATE TRIGGER %s AFTER DELETE ON %s BEGIN "
+            "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.rowid, %s); END"
+            % (
+                quote_name(DOCUMENTS_TABLE + "_delete"),
+                quote_name(DOCUMENTS_TABLE),
+                quote_name(FTS_TABLE),
+                quote_name(FTS_TABLE),
+                text_columns,
+                ", ".join(
+                    "old.%s" % quote_name(column.name)
+                    for column in self.full_text_columns
+                ),
+            ),
+        ]
+
+        # Index the columns that are filtered, sorted & faceted on.
+        for name in [DJANGO_CT] + [
+            column.name
+            for column in self.columns.values()
+            if not column.full_text and not column.multivalued
+        ]:
+            statements.append(
+                "CREATE INDEX %s ON %s (%s)"
+                % (
+                    quote_name("%s_%s" % (DOCUMENTS_TABLE, name)),
+                    quote_name(DOCUMENTS_TABLE),
+                    quote_name(name),
+                )
+            )
+
+        return statements
+
+    def create_tables(self, conn):
+        conn.execute("DROP TABLE IF EXISTS %s" % quote_name(FTS_TABLE))
+        conn.execute("DROP TABLE IF EXISTS %s" % quote_name(DOCUMENTS_TABLE))
+
+        for statement in self.build_table_statements():
+            conn.execute(statement)
+
+    @invalidates_query_cache
+    def update(self, index, iterable, commit=True):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        rows = []
+
+        for obj in iterable:
+            try:
+                doc = index.full_prepare(obj)
+            except SkipDocument:
+                self.log.debug("Indexing for object `%s` skipped", obj)
+            else:
+                rows.append(self._build_row(doc))
+
+        if not rows:
+            return
+
+        names = [ID, DJANGO_CT, DJANGO_ID, DATA_COLUMN] + list(self.columns)
+        insert = "INSERT INTO %s (%s) VALUES (%s)" % (
+            quote_name(DOCUMENTS_TABLE),
+            ", ".join(map(quote_name, names)),
+            ", ".join("?" * len(names)),
+        )
+
+        try:
+            # Replace any older versions of the documents, all at once.
+            with self.transaction() as conn:
+                conn.executemany(
+                    "DELETE FROM %s WHERE %s = ?"
+                    % (quote_name(DOCUMENTS_TABLE), quote_name(ID)),
+                    [(row[0],) for row in rows],
+                )
+                conn.executemany(insert, rows)
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to add documents to SQLite: %s",
+                e,
+                exc_info=True,
+                extra={"data": {"index": index}},
+            )
+
+    def _build_row(self, doc):
+        data = {
+            key: value
+            for key, value in doc.items()
+            if key not in self.columns
+            and key not in (ID, DJANGO_CT, DJANGO_ID, "boost")
+        }
+        row = [
+            doc[ID],
+            doc[DJANGO_CT],
+            force_str(doc[DJANGO_ID]),
+            json.dumps(data, cls=DjangoJSONEncoder) if data else None,
+        ]
+
+        for column in self.columns.values():
+            row.append(self._from_python(doc.get(column.name), column))
+
+        return row
+
+    @invalidates_query_cache
+    def remove(self, obj_or_string, commit=True):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        doc_id = get_identifier(obj_or_string)
+
+        try:
+            with self.transaction() as conn:
+                conn.execute(
+                    "DELETE FROM %s WHERE %s = ?"
+                    % (quote_name(DOCUMENTS_TABLE), quote_name(ID)),
+                    (doc_id,),
+                )
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to remove document '%s' from SQLite: %s",
+                doc_id,
+                e,
+                exc_info=True,
+            )
+
+    @invalidates_query_cache
+    def clear(self, models=None, commit=True):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        if models is not None:
+            assert isinstance(models, (list, tuple))
+
+        try:
+            with self.transaction() as conn:
+                if models is None:
+                    # Much quicker than deleting every row.
+                    self.create_tables(conn)
+                else:
+                    model_cts = [get_model_ct(model) for model in models]
+                    conn.execute(
+                        "DELETE FROM %s WHERE %s IN (%s)"
+                        % (
+                            quote_name(DOCUMENTS_TABLE),
+                            quote_name(DJANGO_CT),
+                            ", ".join("?" * len(model_cts)),
+                        ),
+                        model_cts,
+                    )
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            if models is not None:
+                self.log.error(
+                    "Failed to clear SQLite index of models '%s': %s",
+                    ",".join(model_cts),
+                    e,
+                    exc_info=True,
+                )
+            else:
+                self.log.error("Failed to clear SQLite index: %s", e, exc_info=True)
+
+    def optimize(self):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO %s(%s) VALUES ('optimize')"
+                % (quote_name(FTS_TABLE), quote_name(FTS_TABLE))
+            )
+
+    @log_query
+    def search(
+        self,
+        query_string,
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        fields="",
+        highlight=False,
+        facets=None,
+        date_facets=None,
+        query_facets=None,
+        narrow_queries=None,
+        spelling_query=None,
+        within=None,
+        dwithin=None,
+        distance_point=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        boost=None,
+        **kwargs
+    ):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        query_string = force_str(query_string)
+
+        # A zero length query should return no results.
+        if len(query_string) == 0 or (len(query_string) <= 1 and query_string != "*"):
+            return {"results": [], "hits": 0}
+
+        conditions = []
+
+        if query_string != "*":
+            conditions.append(query_string)
+
+        if query_facets is not None:
+            warnings.warn(
+                "SQLite FTS does not handle query faceting.", Warning, stacklevel=2
+            )
+
+        try:
+            for narrow_query in narrow_queries or ():
+                conditions.append(self.build_narrow_query(force_str(narrow_query)))
+
+            where, params = self._build_where(
+                conditions, models, limit_to_registered_models
+            )
+            return self._build_response(
+                where,
+                params,
+                # Rank the documents by the text the query matched them on.
+                match=" OR ".join(
+                    "(%s)" % expression.replace("''", "'")
+                    for expression in MATCH_REGEX.findall(query_string)
+                ),
+                sort_by=sort_by,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                highlight=highlight,
+                facets=facets,
+                date_facets=date_facets,
+                result_class=result_class,
+                only_fields=only_fields,
+                deferred_fields=deferred_fields,
+                boost=boost,
+            )
+        except (sqlite3.Error, SearchBackendError) as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to query SQLite using '%s': %s", query_string, e, exc_info=True
+            )
+            return {"results": [], "hits": 0}
+
+    def more_like_this(
+        self,
+        model_instance,
+        additional_query_string=None,
+        start_offset=0,
+        end_offset=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        **kwargs
+    ):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        content = self.conn.execute(
+            "SELECT %s FROM %s WHERE %s = ?"
+            % (
+                quote_name(self.content_field_name),
+                quote_name(DOCUMENTS_TABLE),
+                quote_name(ID),
+            ),
+            (get_identifier(model_instance),),
+        ).fetchone()
+
+        if not content or not content[0]:
+            return {"results": [], "hits": 0}
+
+        # Look for any of the document's most common words. BM25 then ranks
+        # the documents sharing the rarer ones first.
+        counts = {}
+
+        for word in WORD_REGEX.findall(content[0].lower()):
+            counts[word] = counts.get(word, 0) + 1
+
+        words = sorted(counts, key=lambda word: (-counts[word], -len(word), word))
+        match = "%s : (%s)" % (
+            quote_name(self.content_field_name),
+            " OR ".join(map(quote_phrase, words[:MORE_LIKE_THIS_WORDS])),
+        )
+        conditions = [
+            self.build_match(match),
+            "%s != %s" % (quote_name(ID), quote_value(get_identifier(model_instance))),
+        ]
+
+        if additional_query_string and additional_query_string != "*":
+            conditions.append(force_str(additional_query_string))
+
+        try:
+            where, params = self._build_where(
+                conditions, models, limit_to_registered_models
+            )
+            return self._build_response(
+                where,
+                params,
+                match=match,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                result_class=result_class,
+            )
+        except sqlite3.Error as e:
+            if not self.silently_fail:
+                raise
+
+            self.log.error(
+                "Failed to fetch More Like This from SQLite for document '%s': %s",
+                get_identifier(model_instance),
+                e,
+                exc_info=True,
+            )
+            return {"results": [], "hits": 0}
+
+    def build_match(self, expression):
+        """Returns the SQL matching the documents to an FTS5 query."""
+        return "%s.rowid IN (SELECT rowid FROM %s WHERE %s MATCH %s)" % (
+            quote_name(DOCUMENTS_TABLE),
+            quote_name(FTS_TABLE),
+            quote_name(FTS_TABLE),
+            quote_value(expression),
+        )
+
+    def build_narrow_query(self, narrow_query):
+        """
+        Turns a narrow query of the ``field:"value"`` form (as
+        ``FacetedSearchForm`` uses) into SQL matching the field's value.
+
+        Narrow queries often come straight from the request, so anything else
+        is refused rather than run as SQL.
+        """
+        from haystack import connections
+
+        match = NARROW_QUERY_REGEX.match(narrow_query)
+
+        if match is None:
+            raise SearchBackendError(
+                "SQLite FTS only narrows by queries of the 'field:\"value\"' form,"
+                " not '%s'." % narrow_query
+            )
+
+        fieldname, quoted, value = match.groups()
+
+        if quoted is not None:
+            value = ESCAPED_REGEX.sub(r"\1", quoted)
+
+        query = connections[self.connection_alias].get_query()
+        return query.build_query_fragment(fieldname, "exact", value)
+
+    def _build_where(self, conditions, models=None, limit_to_registered_models=None):
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(
+                settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True
+            )
+
+        if models and len(models):
+            model_choices = sorted(get_model_ct(model) for model in models)
+        elif limit_to_registered_models:
+            model_choices = self.build_models_list()
+        else:
+            model_choices = []
+
+        where = ["(%s)" % condition for condition in conditions]
+        params = []
+
+        if model_choices:
+            where.append(
+                "%s IN (%s)"
+                % (quote_name(DJANGO_CT), ", ".join("?" * len(model_choices)))
+            )
+            params.extend(model_choices)
+
+        return " AND ".join(where) or "1", params
+
+    def _build_response(
+        self,
+        where,
+        params,
+        match="",
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        highlight=False,
+        facets=None,
+        date_facets=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        boost=None,
+    ):
+        documents = quote_name(DOCUMENTS_TABLE)
+        hits = self.conn.execute(
+            "SELECT COUNT(*) FROM %s WHERE %s" % (documents, where), params
+        ).fetchone()[0]
+
+        facet_counts = {}
+
+        if facets or date_facets:
+            facet_counts = {"fields": {}, "dates": {}, "queries": {}}
+
+            for fieldname, options in (facets or {}).items():
+                facet_counts["fields"][fieldname] = self._count_facet(
+                    where, params, fieldname, options
+                )
+
+            for fieldname, options in (date_facets or {}).items():
+                facet_counts["dates"][fieldname] = self._count_date_facet(
+                    where, params, fieldname, options
+                )
+
+        if result_class is None:
+            result_class = SearchResult
+
+        names = [ID, DJANGO_CT, DJANGO_ID, DATA_COLUMN] + [
+            column.name for column in self.columns.values() if column.stored
+        ]
+        select = ["%s.%s" % (documents, quote_name(name)) for name in names]
+        join = ""
+        score = "0.0"
+        join_params = []
+        highlighted = False
+
+        if match:
+            weights = "".join(
+                ", %r" % float(column.boost) for column in self.full_text_columns
+            )
+            ranked = [
+                "rowid AS haystack_rowid",
+                "-bm25(%s%s) AS haystack_rank" % (quote_name(FTS_TABLE), weights),
+            ]
+            highlighted = highlight and self.columns[self.content_field_name].full_text
+
+            if highlighted:
+                ranked.append(
+                    "snippet(%s, %d, '<em>', '</em>', '...', 32)"
+                    " AS haystack_highlighted"
+                    % (
+                        quote_name(FTS_TABLE),
+                        self.full_text_columns.index(
+                            self.columns[self.content_field_name]
+                        ),
+                    )
+                )
+                select.append("ranked.haystack_highlighted")
+
+            join = (
+                " LEFT JOIN (SELECT %s FROM %s WHERE %s MATCH ?) AS ranked"
+                " ON ranked.haystack_rowid = %s.rowid"
+                % (
+                    ", ".join(ranked),
+                    quote_name(FTS_TABLE),
+                    quote_name(FTS_TABLE),
+                    documents,
+                )
+            )
+            join_params.append(match)
+            score = "COALESCE(ranked.haystack_rank, 0.0)"
+
+        for term, factor in (boost or {}).items():
+            words = WORD_REGEX.findall(force_str(term))
+
+            if words:
+                score += " * (CASE WHEN %s THEN %r ELSE 1.0 END)" % (
+                    self.build_match(" ".join(map(quote_phrase, words))),
+                    float(factor),
+                )
+
+        select.append("%s AS haystack_score" % score)
+
+        if sort_by:
+            order_by = []
+
+            for field in sort_by:
+                direction = "ASC"
+
+                if field.startswith("-"):
+                    field = field[1:]
+                    direction = "DESC"
+
+                # SQLite takes a quoted name it doesn't know for a string, which
+                # would quietly sort by a constant.
+                if field not in self.columns and field not in (
+                    ID,
+                    DJANGO_CT,
+                    DJANGO_ID,
+                ):
+                    raise SearchBackendError(
+                        "Cannot sort by '%s', as it isn't an indexed field." % field
+                    )
+
+                order_by.append("%s %s NULLS LAST" % (quote_name(field), direction))
+        else:
+            order_by = ["haystack_score DESC"]
+
+        order_by.append("%s.rowid" % documents)
+        start_offset = start_offset or 0
+        limit = -1 if end_offset is None else max(end_offset - start_offset, 0)
+        rows = self.conn.execute(
+            "SELECT %s FROM %s%s WHERE %s ORDER BY %s LIMIT ? OFFSET ?"
+            % (", ".join(select), documents, join, where, ", ".join(order_by)),
+            join_params + params + [limit, start_offset],
+        )
+        results = []
+
+        for row in rows:
+            doc_id, django_ct, django_id, data = row[:4]
+            app_label, model_name = django_ct.split(".")
+            additional_fields = json.loads(data) if data else {}
+
+            for name, value in zip(names[4:], row[4:]):
+                additional_fields[name] = self._to_python(value, self.columns[name])
+
+            if highlighted and row[len(names)] is not None:
+                additional_fields["highlighted"] = {
+                    self.content_field_name: [row[len(names)]]
+                }
+
+            if only_fields:
+                additional_fields = {
+                    key: value
+                    for key, value in additional_fields.items()
+                    if key in only_fields
+                }
+
+            if deferred_fields:
+                additional_fields = {
+                    key: value
+                    for key, value in additional_fields.items()
+                    if key not in deferred_fields
+                }
+
+            results.append(
+                result_class(
+                    app_label, model_name, django_id, row[-1], **additional_fields
+                )
+            )
+
+        return {
+            "results": results,
+            "hits": hits,
+            "facets": facet_counts,
+            "spelling_suggestion": None,
+        }
+
+    def _count_facet(self, where, params, fieldname, options):
+        column = self.columns.get(fieldname)
+        value = quote_name(fieldname)
+        source = quote_name(DOCUMENTS_TABLE)
+
+        # Count each of the values of multivalued fields.
+        if column is not None and column.multivalued:
+            value = "facet_values.value"
+            source += ", json_each(%s.%s) AS facet_values" % (
+                quote_name(DOCUMENTS_TABLE),
+                quote_name(fieldname),
+            )
+
+        sql = (
+            "SELECT %s, COUNT(*) FROM %s WHERE (%s) AND %s IS NOT NULL"
+            " GROUP BY %s HAVING COUNT(*) >= ? ORDER BY COUNT(*) DESC, %s"
+            % (value, source, where, value, value, value)
+        )
+        facet_params = params + [options.get("mincount", 1)]
+
+        if options.get("limit") is not None:
+            sql += " LIMIT ?"
+            facet_params.append(int(options["limit"]))
+
+        return [
+            (self._to_python(value, column, multivalued=False), count)
+            for value, count in self.conn.execute(sql, facet_params)
+        ]
+
+    def _count_date_facet(self, where, params, fieldname, options):
+        column = self.columns.get(fieldname)
+        gap_by = options["gap_by"]
+        gap_amount = options.get("gap_amount", 1)
+        start = normalize(options["start_date"])
+        end = normalize(options["end_date"])
+        starts = []
+
+        while start < end:
+            starts.append(start)
+            start = add_gap(start, gap_by, gap_amount)
+
+        if not starts:
+            return []
+
+        # Number the gaps, so the documents can be grouped by them.
+        value = quote_name(fieldname)
+        bounds = starts[1:] + [end]
+        bucket = "CASE %s END" % " ".join(
+            "WHEN %s < %s THEN %d"
+            % (value, quote_value(self._from_python(bound, column)), number)
+            for number, bound in enumerate(bounds)
+        )
+        counts = dict(
+            self.conn.execute(
+                "SELECT %s AS bucket, COUNT(*) FROM %s WHERE (%s) AND %s >= %s"
+                " AND %s < %s GROUP BY bucket"
+                % (
+                    bucket,
+                    quote_name(DOCUMENTS_TABLE),
+                    where,
+                    value,
+                    quote_value(self._from_python(starts[0], column)),
+                    value,
+                    quote_value(self._from_python(bounds[-1], column)),
+                ),
+                params,
+            )
+        )
+        return [(start, counts.get(number, 0)) for number, start in enumerate(starts)]
+
+    def _from_python(self, value, column=None):
+        """Converts Python values to ones SQLite can store."""
+        if value is None:
+            return None
+
+        if isinstance(value, (list, tuple, set)):
+            return json.dumps(
+                [self._from_python(item) for item in value], cls=DjangoJSONEncoder
+            )
+
+        if isinstance(value, bool):
+            return int(value)
+
+        if column is not None and column.field_type == "boolean":
+            return int(force_str(value).lower() in ("true", "1"))
+
+        if isinstance(value, datetime):
+            if column is not None and column.field_type == "date":
+                value = value.date()
+        elif isinstance(value, date):
+            if column is not None and column.field_type == "datetime":
+                value = datetime(value.year, value.month, value.day)
+
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+
+        if isinstance(value, (int, float)):
+            return value
+
+        return force_str(value)
+
+    def _to_python(self, value, column, multivalued=None):
+        """Converts values stored in SQLite back to Python ones."""
+        if value is None or column is None:
+            return value
+
+        if multivalued is None:
+            multivalued = column.multivalued
+
+        if multivalued:
+            return json.loads(value)
+
+        if column.field_type == "boolean":
+            return bool(value)
+
+        try:
+            if column.field_type == "datetime":
+                return parse_datetime(value) or value
+            elif column.field_type == "date":
+                return parse_date(value[:10]) or value
+        except (TypeError, ValueError):
+            pass
+
+        return value
+
+
+class SQLiteFTSSearchQuery(BaseSearchQuery):
+    def build_query_string(self, query_filter):
+        """
+        Builds the SQL condition for a tree of ``SQ`` objects. The boosts go
+        to the backend separately, as ``boost``.
+        """
+        final_query = query_filter.as_query_string(self.build_query_fragment)
+        return final_query or self.matching_all_fragment()
+
+    def clean(self, query_fragment):
+        """
+        Every value ends up quoted, as an FTS5 string or an SQL literal, so
+        there's nothing to clean.
+        """
+        return query_fragment
+
+    def build_exact_query(self, query_string):
+        return quote_phrase(query_string)
+
+    def build_query_fragment(self, field, filter_type, value):
+        """
+        Builds an SQL condition on the documents table for the filter. Text
+        fields are searched through FTS5, the rest compared by value.
+        """
+        from haystack import connections
+
+        if not hasattr(value, "input_type_name"):
+            # Handle when we've got a ``ValuesListQuerySet``...
+            if hasattr(value, "values_list"):
+                value = list(value)
+
+            if isinstance(value, str) and value != " ":
+                # It's not an ``InputType``. Assume ``Clean``.
+                value = Clean(value)
+            else:
+                value = PythonData(value)
+
+        content_field_name, columns = self.backend.get_schema()
+
+        # 'content' is a special reserved word, much like 'pk' in
+        # Django's ORM layer. It indicates 'no special field'.
+        if field == "content":
+            index_fieldname = content_field_name
+        else:
+            index_fieldname = (
+                connections[self._using].get_unified_index().get_index_fieldname(field)
+            )
+
+        column = columns.get(index_fieldname) or Column(index_fieldname, "exact")
+
+        if value.input_type_name == "auto_query":
+            return self.build_auto_query(column, value.prepare(self))
+
+        if value.input_type_name == "raw":
+            # Raw values are FTS5 queries for text fields. The rest are
+            # compared with the value as it was given, never run as SQL.
+            if column.full_text:
+                return self._match(column, value.prepare(self))
+
+            return self.build_value_query(column, filter_type, value.prepare(self))
+
+        if value.input_type_name == "not":
+            return "NOT %s" % self.build_query_fragment(
+                field, filter_type, Clean(value.query_string)
+            )
+
+        if value.input_type_name == "exact" and filter_type == "content":
+            filter_type = "exact"
+
+        # Use the values as they were given, rather than prepared for a query.
+        if value.input_type_name in ("clean", "exact"):
+            query_value = value.query_string
+        else:
+            query_value = value.prepare(self)
+
+        if column.full_text and filter_type in (
+            "content",
+            "exact",
+            "startswith",
+            "fuzzy",
+            "in",
+        ):
+            return self._match(
+                column, self.build_text_query(column, filter_type, query_value)
+            )
+
+        return self.build_value_query(column, filter_type, query_value)
+
+    def build_text_query(self, column, filter_type, query_value):
+        """Builds the FTS5 query for a filter on a text field."""
+        if filter_type == "in":
+            return " OR ".join(
+                quote_phrase(self.backend._from_python(item)) for item in query_value
+            )
+
+        text = self.backend._from_python(query_value)
+
+        if filter_type == "exact":
+            return quote_phrase(text)
+
+        # FTS5 has no fuzzy matching, so fuzzy filters match the words as they are.
+        words = text.split()
+        template = "%s"
+
+        if filter_type == "startswith" or column.field_type == "edge_ngram":
+            template = "%s*"
+
+        return " AND ".join(template % quote_phrase(word) for word in words)
+
+    def build_value_query(self, column, filter_type, query_value):
+        """Builds the SQL comparing the values of a field for a filter."""
+        operand = quote_name(column.name)
+
+        if column.multivalued:
+            operand = "multivalued.value"
+
+        if filter_type == "in":
+            condition = "%s IN (%s)" % (
+                operand,
+                ", ".join(self._quote(column, item) for item in query_value) or "NULL",
+            )
+        elif filter_type == "range":
+            condition = "%s BETWEEN %s AND %s" % (
+                operand,
+                self._quote(column, query_value[0]),
+                self._quote(column, query_value[1]),
+            )
+        elif filter_type in ("contains", "startswith", "endswith") or (
+            column.field_type == "ngram" and filter_type == "content"
+        ):
+            pattern = (
+                force_str(self.backend._from_python(query_value))
+                .replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+
+            if filter_type != "startswith":
+                pattern = "%" + pattern
+
+            if filter_type != "endswith":
+                pattern += "%"
+
+            condition = "%s LIKE %s ESCAPE '\\'" % (operand, quote_value(pattern))
+        else:
+            operator = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}.get(
+                filter_type, "="
+            )
+            condition = "%s %s %s" % (
+                operand,
+                operator,
+                self._quote(column, query_value),
+            )
+
+        if column.multivalued:
+            return "EXISTS (SELECT 1 FROM json_each(%s.%s) AS multivalued WHERE %s)" % (
+                quote_name(DOCUMENTS_TABLE),
+                quote_name(column.name),
+                condition,
+            )
+
+        return "(%s)" % condition
+
+    def build_auto_query(self, column, prepared_query):
+        """
+        Turns the query ``AutoQuery`` prepares (words & phrases, some of them
+        negated) into a search of a text field.
+        """
+        include = []
+        exclude = []
+
+        for negated, token in AUTO_QUERY_REGEX.findall(prepared_query):
+            if not PHRASE_REGEX.match(token):
+                token = quote_phrase(token)
+
+            (exclude if negated else include).append(token)
+
+        if not include and not exclude:
+            return "(0)"
+
+        if not column.full_text:
+            return "(%s)" % " AND ".join(
+                [
+                    "%s = %s" % (quote_name(column.name), quote_value(unquote(token)))
+                    for token in include
+                ]
+                + [
+                    "%s != %s" % (quote_name(column.name), quote_value(unquote(token)))
+                    for token in exclude
+                ]
+            )
+
+        if not include:
+            return "NOT %s" % self._match(column, " OR ".join(exclude))
+
+        query = " AND ".join(include)
+
+        if exclude:
+            query = "(%s) NOT (%s)" % (query, " OR ".join(exclude))
+
+        return self._match(column, query)
+
+    def _match(self, column, query):
+        return "(%s)" % self.backend.build_match(
+            "%s : (%s)" % (quote_name(column.name), query)
+        )
+
+    def _quote(self, column, value):
+        return quote_value(self.backend._from_python(value, column))
+
+
+class SQLiteFTSEngine(BaseEngine):
+    backend = SQLiteFTSSearchBackend
+    query = SQLiteFTSSearchQuery
+    thread_safe = True
+
+    def reset_sessions(self):
+        if self._backend is not None:
+            self._backend.close()
+
+        super().reset_sessions()
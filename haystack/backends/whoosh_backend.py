@@ -15,7 +15,9 @@ from haystack.backends import (
     BaseSearchBackend,
     BaseSearchQuery,
     EmptyResults,
+    invalidates_query_cache,
     log_query,
+    reserved_characters_pattern,
 )
 from haystack.constants import (
     DJANGO_CT,
@@ -49,7 +51,9 @@ from whoosh.fields import BOOLEAN, DATETIME
 from whoosh.fields import ID as WHOOSH_ID
 from whoosh.fields import IDLIST, KEYWORD, NGRAM, NGRAMWORDS, NUMERIC, TEXT, Schema
 from whoosh.filedb.filestore import FileStorage, RamStorage
-from whoosh.highlight import ContextFragmenter, HtmlFormatter
+from whoosh.highlight import ContextFragmenter
+from whoosh.highlight import Highlighter as WhooshHighlighter
+from whoosh.highlight import HtmlFormatter
 from whoosh.highlight import highlight as whoosh_highlight
 from whoosh.qparser import FuzzyTermPlugin, QueryParser
 from whoosh.searching import ResultsPage
@@ -108,6 +112,9 @@ class WhooshSearchBackend(BaseSearchBackend):
         self.use_file_storage = True
         self.post_limit = getattr(connection_options, "POST_LIMIT", 128 * 1024 * 1024)
         self.path = connection_options.get("PATH")
+        self.highlight_chars = connection_options.get("HIGHLIGHT_CHARS", False)
+        # The backend is shared between threads, so each keeps its own searcher.
+        self._local = threading.local()
 
         if connection_options.get("STORAGE", "file") != "file":
             self.use_file_storage = False
@@ -231,6 +238,9 @@ class WhooshSearchBackend(BaseSearchBackend):
                     analyzer=field_class.analyzer or StemmingAnalyzer(),
                     field_boost=field_class.boost,
                     sortable=True,
+                    # Store where each term is, so it can be highlighted
+                    # without re-tokenizing the document.
+                    chars=self.highlight_chars and field_class.document is True,
                 )
 
             if field_class.document is True:
@@ -246,9 +256,10 @@ class WhooshSearchBackend(BaseSearchBackend):
 
         return (content_field_name, Schema(**schema_fields))
 
+    @invalidates_query_cache
     def update(self, index, iterable, commit=True):
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         self.index = self.index.refresh()
         writer = AsyncWriter(self.index)
@@ -289,9 +300,10 @@ class WhooshSearchBackend(BaseSearchBackend):
             if writer.ident is not None:
                 writer.join()
 
+    @invalidates_query_cache
     def remove(self, obj_or_string, commit=True):
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         self.index = self.index.refresh()
         whoosh_id = get_identifier(obj_or_string)
@@ -309,9 +321,10 @@ class WhooshSearchBackend(BaseSearchBackend):
                 exc_info=True,
             )
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         self.index = self.index.refresh()
 
@@ -353,21 +366,17 @@ class WhooshSearchBackend(BaseSearchBackend):
             self.storage.clean()
 
         # Recreate everything.
-        self.setup()
+        with self.setup_lock:
+            self.setup()
 
     def optimize(self):
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         self.index = self.index.refresh()
         self.index.optimize()
 
     def calculate_page(self, start_offset=0, end_offset=None):
-        # Prevent against Whoosh throwing an error. Requires an end_offset
-        # greater than 0.
-        if end_offset is not None and end_offset <= 0:
-            end_offset = 1
-
         # Determine the page.
         page_num = 0
 
@@ -377,6 +386,11 @@ class WhooshSearchBackend(BaseSearchBackend):
         if start_offset is None:
             start_offset = 0
 
+        # Prevent against Whoosh throwing an error. Requires a page of at
+        # least one result, even when only a count is wanted.
+        if end_offset <= start_offset:
+            end_offset = start_offset + 1
+
         page_length = end_offset - start_offset
 
         if page_length and page_length > 0:
@@ -386,42 +400,60 @@ class WhooshSearchBackend(BaseSearchBackend):
         page_num += 1
         return page_num, page_length
 
-    @log_query
-    def search(
-        self,
-        query_string,
-        sort_by=None,
-        start_offset=0,
-        end_offset=None,
-        fields="",
-        highlight=False,
-        facets=None,
-        date_facets=None,
-        query_facets=None,
-        narrow_queries=None,
-        spelling_query=None,
-        within=None,
-        dwithin=None,
-        distance_point=None,
-        models=None,
-        limit_to_registered_models=None,
-        result_class=None,
-        **kwargs
+    def _build_narrow_queries(
+        self, narrow_queries=None, models=None, limit_to_registered_models=None
     ):
-        if not self.setup_complete:
-            self.setup()
+        """
+        Returns the ``narrow_queries``, plus one limiting the results to the
+        ``models`` (or the registered ones) if there are any.
+        """
+        if limit_to_registered_models is None:
+            limit_to_registered_models = getattr(
+                settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True
+            )
 
-        # A zero length query should return no results.
-        if len(query_string) == 0:
-            return {"results": [], "hits": 0}
+        if models and len(models):
+            model_choices = sorted(get_model_ct(model) for model in models)
+        elif limit_to_registered_models:
+            # Using narrow queries, limit the results to only models handled
+            # with the current routers.
+            model_choices = self.build_models_list()
+        else:
+            model_choices = []
 
-        query_string = force_str(query_string)
+        if len(model_choices) > 0:
+            if narrow_queries is None:
+                narrow_queries = set()
 
-        # A one-character query (non-wildcard) gets nabbed by a stopwords
-        # filter and should yield zero results.
-        if len(query_string) <= 1 and query_string != "*":
-            return {"results": [], "hits": 0}
+            narrow_queries.add(
+                " OR ".join(["%s:%s" % (DJANGO_CT, rm) for rm in model_choices])
+            )
+
+        return narrow_queries
 
+    def _narrow(self, searcher, narrow_queries):
+        """
+        Returns the documents matching all of the ``narrow_queries``, stopping
+        at the first one that matches nothing.
+        """
+        narrowed_results = None
+
+        for nq in narrow_queries:
+            recent_narrowed_results = searcher.search(
+                self.parser.parse(force_str(nq)), limit=None
+            )
+
+            if len(recent_narrowed_results) <= 0:
+                return recent_narrowed_results
+
+            if narrowed_results is not None:
+                narrowed_results.filter(recent_narrowed_results)
+            else:
+                narrowed_results = recent_narrowed_results
+
+        return narrowed_results
+
+    def _build_sort_by(self, sort_by):
         reverse = False
 
         if sort_by is not None:
@@ -455,6 +487,88 @@ class WhooshSearchBackend(BaseSearchBackend):
 
             sort_by = sort_by_list
 
+        return sort_by, reverse
+
+    @property
+    def shared_searcher(self):
+        return getattr(self._local, "shared_searcher", None)
+
+    @shared_searcher.setter
+    def shared_searcher(self, searcher):
+        self._local.shared_searcher = searcher
+
+    def _refresh_index(self):
+        # A shared searcher stays on the version of the index it was opened on.
+        if self.shared_searcher is None:
+            self.index = self.index.refresh()
+
+    def _open_searcher(self):
+        if self.shared_searcher is not None:
+            return self.shared_searcher
+
+        return self.index.searcher()
+
+    def _close_searcher(self, searcher):
+        if searcher is not None and searcher is not self.shared_searcher:
+            searcher.close()
+
+    def multi_search(self, searches):
+        """
+        Runs the searches one after another, but all against a single
+        searcher, so the index is only opened & read once.
+        """
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        self.index = self.index.refresh()
+        self.shared_searcher = self.index.searcher()
+
+        try:
+            return super().multi_search(searches)
+        finally:
+            self.shared_searcher.close()
+            self.shared_searcher = None
+
+    @log_query
+    def search(
+        self,
+        query_string,
+        sort_by=None,
+        start_offset=0,
+        end_offset=None,
+        fields="",
+        highlight=False,
+        facets=None,
+        date_facets=None,
+        query_facets=None,
+        narrow_queries=None,
+        spelling_query=None,
+        within=None,
+        dwithin=None,
+        distance_point=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        **kwargs
+    ):
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        # A zero length query should return no results.
+        if len(query_string) == 0:
+            return {"results": [], "hits": 0}
+
+        query_string = force_str(query_string)
+
+        # A one-character query (non-wildcard) gets nabbed by a stopwords
+        # filter and should yield zero results.
+        if len(query_string) <= 1 and query_string != "*":
+            return {"results": [], "hits": 0}
+
+        sort_by, reverse = self._build_sort_by(sort_by)
+
         group_by = []
         facet_types = {}
         if facets is not None:
@@ -487,53 +601,25 @@ class WhooshSearchBackend(BaseSearchBackend):
             )
 
         narrowed_results = None
-        self.index = self.index.refresh()
-
-        if limit_to_registered_models is None:
-            limit_to_registered_models = getattr(
-                settings, "HAYSTACK_LIMIT_TO_REGISTERED_MODELS", True
-            )
-
-        if models and len(models):
-            model_choices = sorted(get_model_ct(model) for model in models)
-        elif limit_to_registered_models:
-            # Using narrow queries, limit the results to only models handled
-            # with the current routers.
-            model_choices = self.build_models_list()
-        else:
-            model_choices = []
-
-        if len(model_choices) > 0:
-            if narrow_queries is None:
-                narrow_queries = set()
-
-            narrow_queries.add(
-                " OR ".join(["%s:%s" % (DJANGO_CT, rm) for rm in model_choices])
-            )
-
+        self._refresh_index()
+        narrow_queries = self._build_narrow_queries(
+            narrow_queries, models, limit_to_registered_models
+        )
         narrow_searcher = None
 
         if narrow_queries is not None:
             # Potentially expensive? I don't see another way to do it in Whoosh...
-            narrow_searcher = self.index.searcher()
-
-            for nq in narrow_queries:
-                recent_narrowed_results = narrow_searcher.search(
-                    self.parser.parse(force_str(nq)), limit=None
-                )
+            narrow_searcher = self._open_searcher()
+            narrowed_results = self._narrow(narrow_searcher, narrow_queries)
 
-                if len(recent_narrowed_results) <= 0:
-                    return {"results": [], "hits": 0}
-
-                if narrowed_results is not None:
-                    narrowed_results.filter(recent_narrowed_results)
-                else:
-                    narrowed_results = recent_narrowed_results
+            if narrowed_results is not None and len(narrowed_results) <= 0:
+                self._close_searcher(narrow_searcher)
+                return {"results": [], "hits": 0}
 
-        self.index = self.index.refresh()
+        self._refresh_index()
+        searcher = self._open_searcher()
 
-        if self.index.doc_count():
-            searcher = self.index.searcher()
+        if searcher.doc_count():
             parsed_query = self.parser.parse(query_string)
 
             # In the event of an invalid/stopworded query, recover gracefully.
@@ -547,6 +633,8 @@ class WhooshSearchBackend(BaseSearchBackend):
                 "sortedby": sort_by,
                 "reverse": reverse,
                 "groupedby": group_by,
+                # Record the terms each hit matched, to highlight them.
+                "terms": highlight and self.highlight_chars,
             }
 
             # Handle the case where the results have been narrowed.
@@ -573,14 +661,16 @@ class WhooshSearchBackend(BaseSearchBackend):
                 spelling_query=spelling_query,
                 result_class=result_class,
                 facet_types=facet_types,
+                only_fields=only_fields,
+                deferred_fields=deferred_fields,
             )
-            searcher.close()
-
-            if hasattr(narrow_searcher, "close"):
-                narrow_searcher.close()
-
+            self._close_searcher(searcher)
+            self._close_searcher(narrow_searcher)
             return results
         else:
+            self._close_searcher(searcher)
+            self._close_searcher(narrow_searcher)
+
             if self.include_spelling:
                 if spelling_query:
                     spelling_suggestion = self.create_spelling_suggestion(
@@ -597,6 +687,98 @@ class WhooshSearchBackend(BaseSearchBackend):
                 "spelling_suggestion": spelling_suggestion,
             }
 
+    def iter_search(
+        self,
+        query_string,
+        chunk_size=None,
+        sort_by=None,
+        highlight=False,
+        narrow_queries=None,
+        models=None,
+        limit_to_registered_models=None,
+        result_class=None,
+        only_fields=None,
+        deferred_fields=None,
+        **kwargs
+    ):
+        """
+        Streams every match, ``chunk_size`` documents at a time.
+
+        The query is run once against a single searcher and the matches are
+        then walked page by page, rather than re-running the search (and
+        re-scoring everything up to the requested page) for every chunk.
+        """
+        if not self.setup_complete:
+            self.ensure_setup()
+
+        query_string = force_str(query_string)
+
+        if len(query_string) == 0 or (len(query_string) <= 1 and query_string != "*"):
+            return
+
+        if chunk_size is None:
+            chunk_size = self.batch_size
+
+        sort_by, reverse = self._build_sort_by(sort_by)
+        self.index = self.index.refresh()
+        narrow_queries = self._build_narrow_queries(
+            narrow_queries, models, limit_to_registered_models
+        )
+
+        if not self.index.doc_count():
+            return
+
+        parsed_query = self.parser.parse(query_string)
+
+        if parsed_query is None:
+            return
+
+        searcher = self.index.searcher()
+
+        try:
+            narrowed_results = self._narrow(searcher, narrow_queries or ())
+
+            if narrowed_results is not None and len(narrowed_results) <= 0:
+                return
+
+            search_kwargs = {
+                "limit": None,
+                "sortedby": sort_by,
+                "reverse": reverse,
+                "terms": highlight and self.highlight_chars,
+            }
+
+            if narrowed_results is not None:
+                search_kwargs["filter"] = narrowed_results
+
+            try:
+                raw_results = searcher.search(parsed_query, **search_kwargs)
+            except ValueError:
+                if not self.silently_fail:
+                    raise
+
+                return
+
+            for page_num in range(1, (len(raw_results) // chunk_size) + 2):
+                raw_page = ResultsPage(raw_results, page_num, chunk_size)
+
+                if raw_page.pagenum < page_num:
+                    break
+
+                results = self._process_results(
+                    raw_page,
+                    highlight=highlight,
+                    query_string=query_string,
+                    result_class=result_class,
+                    only_fields=only_fields,
+                    deferred_fields=deferred_fields,
+                )
+
+                if results["results"]:
+                    yield results["results"]
+        finally:
+            searcher.close()
+
     def more_like_this(
         self,
         model_instance,
@@ -609,7 +791,7 @@ class WhooshSearchBackend(BaseSearchBackend):
         **kwargs
     ):
         if not self.setup_complete:
-            self.setup()
+            self.ensure_setup()
 
         field_name = self.content_field_name
         narrow_queries = set()
@@ -710,6 +892,8 @@ class WhooshSearchBackend(BaseSearchBackend):
         spelling_query=None,
         result_class=None,
         facet_types=None,
+        only_fields=None,
+        deferred_fields=None,
     ):
         from haystack import connections
 
@@ -756,6 +940,9 @@ class WhooshSearchBackend(BaseSearchBackend):
                                 lst.insert(i, none_entry)
                                 break
 
+        if highlight:
+            highlight_hit = self._build_highlighter(raw_page, query_string)
+
         for doc_offset, raw_result in enumerate(raw_page):
             score = raw_page.score(doc_offset) or 0
             app_label, model_name = raw_result[DJANGO_CT].split(".")
@@ -767,6 +954,14 @@ class WhooshSearchBackend(BaseSearchBackend):
                     index = unified_index.get_index(model)
                     string_key = str(key)
 
+                    # Whoosh hands back every stored field; drop the ones
+                    # excluded by ``only``/``defer`` before converting them.
+                    if string_key not in (ID, DJANGO_CT, DJANGO_ID) and (
+                        (only_fields and string_key not in only_fields)
+                        or (deferred_fields and string_key in deferred_fields)
+                    ):
+                        continue
+
                     if string_key in index.fields and hasattr(
                         index.fields[string_key], "convert"
                     ):
@@ -787,16 +982,8 @@ class WhooshSearchBackend(BaseSearchBackend):
                 del additional_fields[DJANGO_ID]
 
                 if highlight:
-                    sa = StemmingAnalyzer()
-                    formatter = WhooshHtmlFormatter("em")
-                    terms = [token.text for token in sa(query_string)]
-
-                    whoosh_result = whoosh_highlight(
-                        additional_fields.get(self.content_field_name),
-                        terms,
-                        sa,
-                        ContextFragmenter(),
-                        formatter,
+                    whoosh_result = highlight_hit(
+                        raw_result, additional_fields.get(self.content_field_name)
                     )
                     additional_fields["highlighted"] = {
                         self.content_field_name: [whoosh_result]
@@ -826,6 +1013,35 @@ class WhooshSearchBackend(BaseSearchBackend):
             "spelling_suggestion": spelling_suggestion,
         }
 
+    def _build_highlighter(self, raw_page, query_string):
+        """
+        Sets up highlighting once for a page of results, returning a function
+        that highlights the content of a hit.
+
+        With ``HIGHLIGHT_CHARS``, the terms each hit matched are highlighted
+        using the character positions stored in the index. Otherwise, the
+        content is re-tokenized to find the terms in the query.
+        """
+        formatter = WhooshHtmlFormatter("em")
+        fragmenter = ContextFragmenter()
+
+        if self.highlight_chars and raw_page.results.has_matched_terms():
+            highlighter = WhooshHighlighter(fragmenter=fragmenter, formatter=formatter)
+
+            def highlight_hit(hit, text):
+                return highlighter.highlight_hit(
+                    hit, self.content_field_name, text=text
+                )
+
+        else:
+            analyzer = StemmingAnalyzer()
+            terms = [token.text for token in analyzer(query_string)]
+
+            def highlight_hit(hit, text):
+                return whoosh_highlight(text, terms, analyzer, fragmenter, formatter)
+
+        return highlight_hit
+
     def create_spelling_suggestion(self, query_string):
         spelling_suggestion = None
         reader = self.index.reader()
@@ -941,17 +1157,16 @@ class WhooshSearchQuery(BaseSearchQuery):
         to escape reserved characters. Instead, the whole word should be
         quoted.
         """
-        words = query_fragment.split()
+        reserved_words = self.backend.RESERVED_WORDS
+        pattern = reserved_characters_pattern(tuple(self.backend.RESERVED_CHARACTERS))
         cleaned_words = []
 
-        for word in words:
-            if word in self.backend.RESERVED_WORDS:
-                word = word.replace(word, word.lower())
+        for word in query_fragment.split():
+            if word in reserved_words:
+                word = word.lower()
 
-            for char in self.backend.RESERVED_CHARACTERS:
-                if char in word:
-                    word = "'%s'" % word
-                    break
+            if pattern is not None and pattern.search(word):
+                word = "'%s'" % word
 
             cleaned_words.append(word)
 
@@ -1102,3 +1317,4 @@ class WhooshSearchQuery(BaseSearchQuery):
 class WhooshEngine(BaseEngine):
     backend = WhooshSearchBackend
     query = WhooshSearchQuery
+    thread_safe = True
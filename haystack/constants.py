@@ -46,6 +46,18 @@ REPR_OUTPUT_SIZE = 20
 # Number of SearchResults to load at a time.
 ITERATOR_LOAD_PER_QUERY = getattr(settings, "HAYSTACK_ITERATOR_LOAD_PER_QUERY", 10)
 
+# Number of SearchResults to fetch at a time when iterating with ``load_all``,
+# which costs a database query per model for each batch.
+LOAD_ALL_CHUNK_SIZE = getattr(settings, "HAYSTACK_LOAD_ALL_CHUNK_SIZE", 100)
+
+# Fraction of extra SearchResults to fetch with ``load_all``, standing in for
+# any whose objects have gone from the database.
+LOAD_ALL_MARGIN = getattr(settings, "HAYSTACK_LOAD_ALL_MARGIN", 0.1)
+
+# Maximum number of pages of results a SearchQuerySet keeps cached. ``None``
+# means unbounded.
+RESULT_CACHE_MAX_PAGES = getattr(settings, "HAYSTACK_RESULT_CACHE_MAX_PAGES", None)
+
 
 # A marker class in the hierarchy to indicate that it handles search data.
 class Indexable:
@@ -1,10 +1,10 @@
 from django.conf import settings
-from django.core.paginator import Paginator
 from django.views.generic import FormView
 from django.views.generic.edit import FormMixin
 from django.views.generic.list import MultipleObjectMixin
 
 from .forms import FacetedSearchForm, ModelSearchForm
+from .paginator import SearchPaginator
 from .query import SearchQuerySet
 
 RESULTS_PER_PAGE = getattr(settings, "HAYSTACK_SEARCH_RESULTS_PER_PAGE", 20)
@@ -43,7 +43,7 @@ class SearchMixin(MultipleObjectMixin, FormMixin):
     context_object_name = None
     paginate_by = RESULTS_PER_PAGE
     paginate_orphans = 0
-    paginator_class = Paginator
+    paginator_class = SearchPaginator
     page_kwarg = "page"
     form_name = "form"
     search_field = "q"
@@ -20,3 +20,12 @@ class Command(BaseCommand):
                 "  - Model: %s by Index: %s"
                 % (index.__name__, unified_index.get_indexes()[index])
             )
+
+        # Report how long the unified index took to build, which grows with
+        # the number of apps & indexes.
+        unified_index.all_searchfields()
+
+        for stage in ("indexes", "fields"):
+            self.stdout.write(
+                "Collected the %s in %.3fs." % (stage, unified_index.timings[stage])
+            )
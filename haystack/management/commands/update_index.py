@@ -395,33 +395,25 @@ class Command(BaseCommand):
                         smart_bytes(pk) for pk in qs.values_list("pk", flat=True)
                     }
 
-                # Since records may still be in the search index but not the local database
-                # we'll use that to create batches for processing.
-                # See https://github.com/django-haystack/django-haystack/issues/1186
-                index_total = (
-                    SearchQuerySet(using=backend.connection_alias).models(model).count()
-                )
-
                 # Retrieve PKs from the index. Note that this cannot be a numeric range query because although
                 # pks are normally numeric they can be non-numeric UUIDs or other custom values. To reduce
                 # load on the search engine, we only retrieve the pk field, which will be checked against the
                 # full list obtained from the database, and the id field, which will be used to delete the
-                # record should it be found to be stale.
+                # record should it be found to be stale. Records may still be in the search index but not the
+                # local database, so the index is streamed rather than paged by offset.
+                # See https://github.com/django-haystack/django-haystack/issues/1186
                 index_pks = SearchQuerySet(using=backend.connection_alias).models(model)
                 index_pks = index_pks.values_list("pk", "id")
 
                 # We'll collect all of the record IDs which are no longer present in the database and delete
                 # them after walking the entire index. This uses more memory than the incremental approach but
-                # avoids needing the pagination logic below to account for both commit modes:
+                # avoids needing to account for both commit modes while the index is being walked:
                 stale_records = set()
 
-                for start in range(0, index_total, batch_size):
-                    upper_bound = start + batch_size
-
-                    # If the database pk is no longer present, queue the index key for removal:
-                    for pk, rec_id in index_pks[start:upper_bound]:
-                        if smart_bytes(pk) not in database_pks:
-                            stale_records.add(rec_id)
+                # If the database pk is no longer present, queue the index key for removal:
+                for pk, rec_id in index_pks.iterator(chunk_size=batch_size):
+                    if smart_bytes(pk) not in database_pks:
+                        stale_records.add(rec_id)
 
                 if stale_records:
                     if self.verbosity >= 1:
@@ -21,9 +21,9 @@ class SearchResult:
     A single search result. The actual object is loaded lazily by accessing
     object; until then this object only stores the model, pk, and score.
 
-    Note that iterating over SearchResults and getting the object for each
-    result will do O(N) database queries, which may not fit your needs for
-    performance.
+    Results that came from a ``SearchQuerySet`` know the rest of their page,
+    so the first access of ``object`` loads the objects for the whole page,
+    with one query per model.
     """
 
     def __init__(self, app_label, model_name, pk, score, **kwargs):
@@ -36,6 +36,8 @@ class SearchResult:
         self._additional_fields = []
         self._point_of_origin = kwargs.pop("_point_of_origin", None)
         self._distance = kwargs.pop("_distance", None)
+        self._using = kwargs.pop("_using", None)
+        self._siblings = None
         self.stored_fields = None
         self.log = self._get_log()
 
@@ -66,16 +68,70 @@ class SearchResult:
     def _get_searchindex(self):
         from haystack import connections
 
-        return connections[DEFAULT_ALIAS].get_unified_index().get_index(self.model)
+        using = self._using or DEFAULT_ALIAS
+        return connections[using].get_unified_index().get_index(self.model)
 
     searchindex = property(_get_searchindex)
 
+    def _load_siblings(self):
+        """
+        Loads the objects for the page of results this one came from, with
+        one query per model. Returns the models that were loaded.
+        """
+        from haystack import connections
+        from haystack.utils.identity_map import load_objects
+
+        siblings, self._siblings = self._siblings, None
+        using = self._using or DEFAULT_ALIAS
+        models_results = {}
+
+        for result in siblings:
+            if not isinstance(result, SearchResult):
+                continue
+
+            # Each page is only loaded once.
+            result._siblings = None
+
+            if result._object is None and result.model is not None:
+                models_results.setdefault(result.model, []).append(result)
+
+        ui = connections[using].get_unified_index()
+        loaded = set()
+
+        for model, results in models_results.items():
+            try:
+                queryset = ui.get_index(model).read_queryset(using=using)
+            except NotHandled:
+                # Left to the individual lookups, which fall back to the
+                # default manager.
+                continue
+
+            to_python = model._meta.pk.to_python
+            pks = [to_python(result.pk) for result in results]
+            objects = load_objects((using, model, "read_queryset"), queryset, pks)
+
+            for result, pk in zip(results, pks):
+                result._object = objects.get(pk)
+
+            loaded.add(model)
+
+        return loaded
+
     def _get_object(self):
         if self._object is None:
             if self.model is None:
                 self.log.error("Model could not be found for SearchResult '%s'.", self)
                 return None
 
+            if self._siblings and self.model in self._load_siblings():
+                if self._object is None:
+                    self.log.error(
+                        "Object could not be found in database for SearchResult '%s'.",
+                        self,
+                    )
+
+                return self._object
+
             try:
                 try:
                     self._object = self.searchindex.read_queryset().get(pk=self.pk)
@@ -237,6 +293,8 @@ class SearchResult:
         # ``threading.Lock``, which doesn't pickle well.
         ret_dict = self.__dict__.copy()
         del ret_dict["log"]
+        # The rest of the page isn't worth pickling along with each result.
+        ret_dict["_siblings"] = None
         return ret_dict
 
     def __setstate__(self, data_dict):
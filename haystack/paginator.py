@@ -0,0 +1,39 @@
+from django.core.paginator import Paginator
+
+
+class SearchPaginator(Paginator):
+    """
+    A ``Paginator`` for ``SearchQuerySet`` objects that fetches a page of
+    results & the total count in a single request to the backend.
+
+    Django's ``Paginator`` asks for the count before it slices out the page,
+    which costs a count-only query followed by a second query for the page
+    itself. Here the page is fetched first & the count comes back with it.
+    """
+
+    def page(self, number):
+        self.prefetch(number)
+        return super().page(number)
+
+    def prefetch(self, number):
+        """
+        Loads the results for page ``number`` into the ``SearchQuerySet``'s
+        cache, if the count isn't known yet.
+
+        Invalid page numbers are left for ``validate_number`` to complain
+        about.
+        """
+        if "count" in self.__dict__:
+            return
+
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return
+
+        if number < 1:
+            return
+
+        bottom = (number - 1) * self.per_page
+        # Include the orphans, which may be folded into the last page.
+        self.object_list[bottom : bottom + self.per_page + self.orphans]
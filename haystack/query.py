@@ -1,13 +1,26 @@
+import math
 import operator
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 
+from asgiref.sync import sync_to_async
+from django.db import connections as db_connections
+
 from haystack import connection_router, connections
 from haystack.backends import SQ
-from haystack.constants import DEFAULT_OPERATOR, ITERATOR_LOAD_PER_QUERY
+from haystack.constants import (
+    DEFAULT_OPERATOR,
+    ITERATOR_LOAD_PER_QUERY,
+    LOAD_ALL_CHUNK_SIZE,
+    LOAD_ALL_MARGIN,
+    RESULT_CACHE_MAX_PAGES,
+)
 from haystack.exceptions import NotHandled
 from haystack.inputs import AutoQuery, Raw
 from haystack.utils import log as logging
+from haystack.utils.identity_map import load_objects
+from haystack.utils.result_cache import ResultCache
 
 
 class SearchQuerySet:
@@ -22,17 +35,22 @@ class SearchQuerySet:
         # been forced with the ``.using`` method.
         self._using = using
         self.query = None
-        self._determine_backend()
 
         # If ``query`` is present, it should override even what the routers
-        # think.
+        # think, so there's no need to ask them.
         if query is not None:
             self.query = query
+        else:
+            self._determine_backend()
 
-        self._result_cache = []
+        self._result_cache = ResultCache(
+            ITERATOR_LOAD_PER_QUERY, max_pages=RESULT_CACHE_MAX_PAGES
+        )
         self._result_count = None
         self._cache_full = False
         self._load_all = False
+        self._load_all_chunk_size = LOAD_ALL_CHUNK_SIZE
+        self._load_all_prefetch = False
         self._ignored_result_count = 0
         self.log = logging.getLogger("haystack")
 
@@ -116,69 +134,134 @@ class SearchQuerySet:
         if len(self) <= 0:
             return True
 
-        try:
-            self._result_cache.index(None)
-            return False
-        except ValueError:
-            # No ``None``s found in the results. Check the length of the cache.
-            return len(self._result_cache) > 0
+        return self._result_cache.is_full()
 
     def _manual_iter(self):
         # If we're here, our cache isn't fully populated.
-        # For efficiency, fill the cache as we go if we run out of results.
+        # For efficiency, fill the cache a page at a time as we go.
         # Also, this can't be part of the __iter__ method due to Python's rules
         # about generator functions.
         current_position = 0
-        current_cache_max = 0
+        chunk_size = self._result_cache.page_size
+        prefetcher = None
+        prefetched = None
 
-        while True:
-            if len(self._result_cache) > 0:
-                try:
-                    current_cache_max = self._result_cache.index(None)
-                except ValueError:
-                    current_cache_max = len(self._result_cache)
+        if self._load_all:
+            # Loading the objects costs a query per model for each chunk, so
+            # take bigger bites.
+            chunk_size = max(self._load_all_chunk_size, chunk_size)
 
-            while current_position < current_cache_max:
-                yield self._result_cache[current_position]
-                current_position += 1
+            if self._load_all_prefetch:
+                prefetcher = ThreadPoolExecutor(max_workers=1)
 
-            if self._cache_is_full():
-                return
+        try:
+            while True:
+                end = current_position + chunk_size
+                results = self._result_cache.get_range(current_position, end)
+
+                if results is None:
+                    if prefetched is not None:
+                        self._use_prefetched(prefetched)
+                        prefetched = None
+
+                    # We've run out of cached results and haven't hit our limit.
+                    # Fill more of the cache.
+                    if not self._fill_cache(current_position, end):
+                        return
+
+                    results = self._result_cache.get_range(current_position, end)
+
+                    if prefetcher is not None:
+                        prefetched = self._prefetch(prefetcher, end, end + chunk_size)
+
+                if not results:
+                    return
+
+                yield from results
+                current_position += len(results)
+        finally:
+            if prefetcher is not None:
+                # The worker's database connections (if the backend used any)
+                # aren't reused.
+                prefetcher.submit(db_connections.close_all)
+                prefetcher.shutdown()
+
+    def _prefetch(self, executor, start, end):
+        """
+        Starts fetching the results from ``start`` to ``end`` in the
+        background, unless they're cached or past the end.
 
-            # We've run out of results and haven't hit our limit.
-            # Fill more of the cache.
-            if not self._fill_cache(
-                current_position, current_position + ITERATOR_LOAD_PER_QUERY
-            ):
-                return
+        Only the search runs in the background. The objects are loaded by the
+        calling thread, on its own database connection, so they're the same
+        as without ``prefetch`` (uncommitted changes included).
+        """
+        if self._result_cache.count is not None and start >= self._result_cache.count:
+            return None
+
+        if self._result_cache.get_range(start, end) is not None:
+            return None
+
+        _, fill_start, fill_end = self._fill_window(start, end)
+        query = self.query._clone()
+        query.set_limits(*self._query_window(fill_start, fill_end))
+        kwargs = self._query_kwargs()
+
+        def prefetch():
+            query.get_results(**kwargs)
+            return query
+
+        return executor.submit(prefetch)
+
+    def _use_prefetched(self, future):
+        """
+        Hands the results fetched by ``_prefetch`` to the next
+        ``_fill_cache``, which fetches them itself if the prefetch failed (or
+        it needs different results after all).
+        """
+        try:
+            self.query = future.result()
+        except Exception:
+            self.log.warning("Failed to prefetch search results.", exc_info=True)
+
+    def _load_all_objects(self, results):
+        """
+        Returns the objects for the ``results``, keyed by model & then pk.
+        """
+        models_pks = {}
+        loaded_objects = {}
+
+        # Remember the search position for each result so we don't have to resort later.
+        for result in results:
+            models_pks.setdefault(result.model, []).append(result.pk)
+
+        # Load the objects for each model in turn.
+        for model in models_pks:
+            loaded_objects[model] = self._load_model_objects(model, models_pks[model])
+
+        return loaded_objects
 
     def post_process_results(self, results):
         to_cache = []
 
         # Check if we wish to load all objects.
         if self._load_all:
-            models_pks = {}
-            loaded_objects = {}
+            loaded_objects = self._load_all_objects(results)
 
-            # Remember the search position for each result so we don't have to resort later.
-            for result in results:
-                models_pks.setdefault(result.model, []).append(result.pk)
-
-            # Load the objects for each model in turn.
-            for model in models_pks:
-                loaded_objects[model] = self._load_model_objects(
-                    model, models_pks[model]
-                )
+            # The engine hands back primary keys as strings, so convert them
+            # the way each model's primary key field would (int, UUID, etc).
+            pk_converters = {
+                model: model._meta.pk.to_python
+                for model, model_objects in loaded_objects.items()
+                if model_objects
+            }
 
         for result in results:
             if self._load_all:
 
                 model_objects = loaded_objects.get(result.model, {})
-                # Try to coerce a primary key object that matches the models pk
-                # We have to deal with semi-arbitrary keys being cast from strings (UUID, int, etc)
+
                 if model_objects:
-                    result_klass = type(next(iter(model_objects)))
-                    result.pk = result_klass(result.pk)
+                    result.pk = pk_converters[result.model](result.pk)
 
                     try:
                         result._object = model_objects[result.pk]
@@ -186,94 +269,235 @@ class SearchQuerySet:
                         # The object was either deleted since we indexed or should
                         # be ignored for other reasons such as an overriden 'load_all_queryset';
                         # fail silently.
-                        self._ignored_result_count += 1
-
-                        # avoid an unfilled None at the end of the result cache
-                        self._result_cache.pop()
                         continue
                 else:
                     # No objects were returned -- possible due to SQS nesting such as
                     # XYZ.objects.filter(id__gt=10) where the amount ignored are
                     # exactly equal to the ITERATOR_LOAD_PER_QUERY
-                    del self._result_cache[: len(results)]
-                    self._ignored_result_count += len(results)
-                    break
+                    continue
 
             to_cache.append(result)
 
+        if not self._load_all:
+            # Let the results load their objects together, from the same
+            # connection they came from, the first time one is needed.
+            for result in to_cache:
+                result._siblings = to_cache
+                result._using = self.query._using
+
         return to_cache
 
+    def _process_window(self, results, wanted=None):
+        """
+        Post-processes ``results``, keeping no more than ``wanted`` of them.
+        Returns those, along with how many of the ``results`` they used up.
+        """
+        processed = self.post_process_results(results)
+
+        if wanted is None or len(processed) <= wanted:
+            return processed, len(results)
+
+        # Only ``load_all`` skips results & it keeps the rest as they are, so
+        # the last one kept shows how far through the results it got.
+        processed = processed[:wanted]
+
+        if not processed:
+            return processed, 0
+
+        for consumed, result in enumerate(results, 1):
+            if result is processed[-1]:
+                return processed, consumed
+
+        return processed, wanted
+
     def _load_model_objects(self, model, pks):
         try:
             ui = connections[self.query._using].get_unified_index()
             index = ui.get_index(model)
             objects = index.read_queryset(using=self.query._using)
-            return objects.in_bulk(pks)
+            return load_objects(
+                (self.query._using, model, "read_queryset"), objects, pks
+            )
         except NotHandled:
             self.log.warning("Model '%s' not handled by the routers.", model)
             # Revert to old behaviour
             return model._default_manager.in_bulk(pks)
 
-    def _fill_cache(self, start, end, **kwargs):
-        # Tell the query where to start from and how many we'd like.
-        self.query._reset()
+    def _query_kwargs(self):
+        """Returns any extra kwargs to fetch results from the query with."""
+        return {}
 
+    def _fill_window(self, start, end):
+        """
+        Returns the first page from ``start`` that isn't cached, along with
+        the range of results covering whole pages from there to ``end``.
+        """
         if start is None:
             start = 0
 
-        query_start = start
-        query_start += self._ignored_result_count
-        query_end = end
-        if query_end is not None:
-            query_end += self._ignored_result_count
+        first_page, last_page = self._result_cache.missing_span(start, end)
+        fill_start = first_page * self._result_cache.page_size
+        fill_end = None
+
+        if last_page is not None:
+            fill_end = (last_page + 1) * self._result_cache.page_size
 
+        return first_page, fill_start, fill_end
+
+    def _query_window(self, fill_start, fill_end):
+        """
+        Returns the range of the engine's results to fetch to fill the cache
+        from ``fill_start`` to ``fill_end``.
+
+        With ``load_all``, a few extra results are fetched in case some of the
+        objects have gone from the database, rather than going back for more.
+        """
+        query_start = fill_start + self._ignored_result_count
+        query_end = None
+
+        if fill_end is not None:
+            query_end = fill_end + self._ignored_result_count
+
+            if self._load_all:
+                query_end += math.ceil((fill_end - fill_start) * LOAD_ALL_MARGIN)
+
+        return query_start, query_end
+
+    def _limit_query(self, query_start, query_end):
+        """
+        Points the query at a new range of results, unless it already holds
+        exactly those.
+        """
+        if (
+            self.query._results is not None
+            and self.query.start_offset == query_start
+            and self.query.end_offset == query_end
+        ):
+            return
+
+        self.query._reset()
+        self.query.clear_limits()
         self.query.set_limits(query_start, query_end)
+
+    def _fill_cache(self, start, end):
+        # Only fetch whole pages, and only the ones we don't have yet.
+        first_page, fill_start, fill_end = self._fill_window(start, end)
+        kwargs = self._query_kwargs()
+
+        # Tell the query where to start from and how many we'd like.
+        query_start, query_end = self._query_window(fill_start, fill_end)
+        self._limit_query(query_start, query_end)
         results = self.query.get_results(**kwargs)
 
         if results is None or len(results) == 0:
-            # trim missing stuff from the result cache
-            self._result_cache = self._result_cache[:start]
+            # There's nothing from here on.
+            self._result_cache.set_count(fill_start)
             return False
 
-        # Setup the full cache now that we know how many results there are.
-        # We need the ``None``s as placeholders to know what parts of the
-        # cache we have/haven't filled.
-        # Using ``None`` like this takes up very little memory. In testing,
-        # an array of 100,000 ``None``s consumed less than .5 Mb, which ought
-        # to be an acceptable loss for consistent and more efficient caching.
-        if len(self._result_cache) == 0:
-            self._result_cache = [None] * self.query.get_count()
-
-        fill_start, fill_end = start, end
-        if fill_end is None:
-            fill_end = self.query.get_count()
-        cache_start = fill_start
+        to_cache = []
 
         while True:
-            to_cache = self.post_process_results(results)
+            room = None
 
-            # Assign by slice.
-            self._result_cache[cache_start : cache_start + len(to_cache)] = to_cache
+            if fill_end is not None:
+                room = fill_end - fill_start - len(to_cache)
 
-            if None in self._result_cache[start:end]:
-                fill_start = fill_end
-                fill_end += ITERATOR_LOAD_PER_QUERY
-                cache_start += len(to_cache)
+            processed, consumed = self._process_window(results, room)
+            self._ignored_result_count += consumed - len(processed)
+            to_cache.extend(processed)
 
-                # Tell the query where to start from and how many we'd like.
-                self.query._reset()
-                self.query.set_limits(fill_start, fill_end)
-                results = self.query.get_results()
+            total = self.query.get_count() - self._ignored_result_count
+            wanted = total if fill_end is None else min(fill_end, total)
 
-                if results is None or len(results) == 0:
-                    # No more results. Trim missing stuff from the result cache
-                    self._result_cache = self._result_cache[:cache_start]
-                    break
-            else:
+            if query_end is None or fill_start + len(to_cache) >= wanted:
+                break
+
+            # Some results were skipped, so fetch more to fill the gap.
+            query_start = query_end
+            query_end = query_start + wanted - fill_start - len(to_cache)
+            self._limit_query(query_start, query_end)
+            results = self.query.get_results(**kwargs)
+
+            if results is None or len(results) == 0:
                 break
 
+        if fill_end is None or fill_start + len(to_cache) < fill_end:
+            # We've reached the end of the results.
+            total = fill_start + len(to_cache)
+
+        self._result_cache.set_count(total)
+        self._result_cache.add_pages(first_page, to_cache)
         return True
 
+    async def _afill_cache(self, start, end):
+        """
+        Awaitable version of ``_fill_cache``.
+
+        The backend is queried through its async API, then the usual fill
+        (which may need the database to load objects) runs in a worker thread,
+        picking up the results that were just fetched.
+        """
+        first_page, fill_start, fill_end = self._fill_window(start, end)
+        self._limit_query(*self._query_window(fill_start, fill_end))
+        await self.query.aget_results(**self._query_kwargs())
+        return await sync_to_async(self._fill_cache)(start, end)
+
+    def iterator(self, chunk_size=None, **kwargs):
+        """
+        Streams every result without populating the result cache.
+
+        The backend fetches ``chunk_size`` results per request (defaulting to
+        the connection's ``BATCH_SIZE``), using a cursor where the engine
+        provides one, so memory use and the cost of each request stay flat.
+        """
+        if self._cache_is_full():
+            yield from self._result_cache
+            return
+
+        kwargs = dict(self._query_kwargs(), **kwargs)
+
+        for results in self.query._clone().iter_results(chunk_size, **kwargs):
+            yield from self.post_process_results(results)
+
+    def facet_iterator(self, field, page_size=None):
+        """
+        Streams every ``(value, count)`` of the facet on ``field`` across the
+        matching results, however many values there are.
+
+        The backend fetches ``page_size`` values per request (defaulting to
+        the connection's ``BATCH_SIZE``), so no single response has to hold
+        them all.
+        """
+        yield from self.query._clone().iter_facet(field, page_size)
+
+    async def __aiter__(self):
+        if self._cache_is_full():
+            for result in self._result_cache:
+                yield result
+
+            return
+
+        current_position = 0
+        page_size = self._result_cache.page_size
+
+        while True:
+            end = current_position + page_size
+            results = self._result_cache.get_range(current_position, end)
+
+            if results is None:
+                if not await self._afill_cache(current_position, end):
+                    return
+
+                results = self._result_cache.get_range(current_position, end)
+
+            if not results:
+                return
+
+            for result in results:
+                yield result
+
+            current_position += len(results)
+
     def __getitem__(self, k):
         """
         Retrieves an item or slice from the set of results.
@@ -290,7 +514,7 @@ class SearchQuerySet:
         # a slice to simply the logic and will `.pop()` at the end as needed.
         if isinstance(k, slice):
             is_slice = True
-            start = k.start
+            start = k.start or 0
 
             if k.stop is not None:
                 bound = int(k.stop)
@@ -302,20 +526,24 @@ class SearchQuerySet:
             bound = k + 1
 
         # We need check to see if we need to populate more of the cache.
-        if len(self._result_cache) <= 0 or (
-            None in self._result_cache[start:bound] and not self._cache_is_full()
-        ):
+        results = self._result_cache.get_range(start, bound)
+
+        if results is None:
             try:
                 self._fill_cache(start, bound)
             except StopIteration:
                 # There's nothing left, even though the bound is higher.
                 pass
 
+            results = self._result_cache.get_range(start, bound) or []
+
         # Cache should be full enough for our needs.
         if is_slice:
-            return self._result_cache[start:bound]
+            return results
+        elif not results:
+            raise IndexError("SearchQuerySet index out of range")
         else:
-            return self._result_cache[start]
+            return results[0]
 
     # Methods that return a SearchQuerySet.
     def all(self):  # noqa A003
@@ -394,6 +622,43 @@ class SearchQuerySet:
         clone.query.set_result_class(klass)
         return clone
 
+    def only(self, *fields):
+        """
+        Restricts the stored fields fetched for each result to those provided.
+
+        Results are still ``SearchResult`` objects, just without the other
+        stored fields attached.
+        """
+        clone = self._clone()
+        clone.query.add_only_fields(fields)
+        return clone
+
+    def defer(self, *fields):
+        """
+        Skips fetching the provided stored fields for each result.
+
+        Passing ``None`` clears any previously deferred fields.
+        """
+        clone = self._clone()
+
+        if fields == (None,):
+            clone.query.clear_deferred_fields()
+        else:
+            clone.query.add_deferred_fields(fields)
+
+        return clone
+
+    def cache(self, timeout=None):
+        """
+        Caches the responses from the backend for ``timeout`` seconds.
+
+        Uses the connection's ``CACHE`` & ``CACHE_TIMEOUT`` options by default.
+        A ``timeout`` of ``0`` skips the cache.
+        """
+        clone = self._clone()
+        clone.query.set_cache(timeout)
+        return clone
+
     def boost(self, term, boost):
         """Boosts a certain aspect of the query."""
         clone = self._clone()
@@ -475,10 +740,22 @@ class SearchQuerySet:
         """Passes a raw query directly to the backend."""
         return self.filter(content=Raw(query_string, **kwargs))
 
-    def load_all(self):
-        """Efficiently populates the objects in the search results."""
+    def load_all(self, chunk_size=None, prefetch=False):
+        """
+        Efficiently populates the objects in the search results.
+
+        Iterating fetches ``chunk_size`` results at a time (defaulting to
+        ``HAYSTACK_LOAD_ALL_CHUNK_SIZE``). With ``prefetch``, the next chunk
+        is fetched from the engine in the background while the current one
+        is being used.
+        """
         clone = self._clone()
         clone._load_all = True
+
+        if chunk_size is not None:
+            clone._load_all_chunk_size = chunk_size
+
+        clone._load_all_prefetch = prefetch
         return clone
 
     def auto_query(self, query_string, fieldname="content"):
@@ -526,6 +803,30 @@ class SearchQuerySet:
         """Returns the total number of matching results."""
         return len(self)
 
+    async def acount(self):
+        """
+        Returns the total number of matching results, without blocking the
+        event loop.
+        """
+        if self._result_count is None:
+            # Some backends give weird, false-y values here. Convert to zero.
+            self._result_count = await self.query.aget_count() or 0
+
+        return self._result_count - self._ignored_result_count
+
+    async def aget_results(self, start=0, end=None):
+        """
+        Returns the results from ``start`` to ``end`` (just like slicing),
+        without blocking the event loop.
+        """
+        results = self._result_cache.get_range(start, end)
+
+        if results is None:
+            await self._afill_cache(start, end)
+            results = self._result_cache.get_range(start, end) or []
+
+        return results
+
     def best_match(self):
         """Returns the best/top search result that matches the query."""
         return self[0]
@@ -556,6 +857,17 @@ class SearchQuerySet:
             clone = self._clone()
             return clone.query.get_facet_counts()
 
+    async def afacet_counts(self):
+        """
+        Returns the facet counts found by the query, without blocking the
+        event loop.
+        """
+        if self.query.has_run():
+            return await self.query.aget_facet_counts()
+        else:
+            clone = self._clone()
+            return await clone.query.aget_facet_counts()
+
     def stats_results(self):
         """
         Returns the stats results found by the query.
@@ -594,6 +906,17 @@ class SearchQuerySet:
             clone = self._clone()
             return clone.query.get_spelling_suggestion(preferred_query)
 
+    async def aspelling_suggestion(self, preferred_query=None):
+        """
+        Returns the spelling suggestion found by the query, without blocking
+        the event loop.
+        """
+        if self.query.has_run():
+            return await self.query.aget_spelling_suggestion(preferred_query)
+        else:
+            clone = self._clone()
+            return await clone.query.aget_spelling_suggestion(preferred_query)
+
     def values(self, *fields):
         """
         Returns a list of dictionaries, each containing the key/value pairs for
@@ -633,6 +956,8 @@ class SearchQuerySet:
         query = self.query._clone()
         clone = klass(query=query)
         clone._load_all = self._load_all
+        clone._load_all_chunk_size = self._load_all_chunk_size
+        clone._load_all_prefetch = self._load_all_prefetch
         return clone
 
 
@@ -651,15 +976,24 @@ class EmptySearchQuerySet(SearchQuerySet):
 
     def _clone(self, klass=None):
         clone = super()._clone(klass=klass)
-        clone._result_cache = []
+        clone._result_cache.set_count(0)
         return clone
 
     def _fill_cache(self, start, end):
         return False
 
+    async def _afill_cache(self, start, end):
+        return False
+
+    async def acount(self):
+        return 0
+
     def facet_counts(self):
         return {}
 
+    async def afacet_counts(self):
+        return {}
+
 
 class ValuesListSearchQuerySet(SearchQuerySet):
     """
@@ -683,11 +1017,10 @@ class ValuesListSearchQuerySet(SearchQuerySet):
         clone._flat = self._flat
         return clone
 
-    def _fill_cache(self, start, end):
+    def _query_kwargs(self):
         query_fields = set(self._internal_fields)
         query_fields.update(self._fields)
-        kwargs = {"fields": query_fields}
-        return super()._fill_cache(start, end, **kwargs)
+        return {"fields": query_fields}
 
     def post_process_results(self, results):
         to_cache = []
@@ -710,12 +1043,6 @@ class ValuesSearchQuerySet(ValuesListSearchQuerySet):
     ``ValuesQuerySet``.
     """
 
-    def _fill_cache(self, start, end):
-        query_fields = set(self._internal_fields)
-        query_fields.update(self._fields)
-        kwargs = {"fields": query_fields}
-        return super(ValuesListSearchQuerySet, self)._fill_cache(start, end, **kwargs)
-
     def post_process_results(self, results):
         to_cache = []
 
@@ -733,7 +1060,6 @@ class RelatedSearchQuerySet(SearchQuerySet):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._load_all_querysets = {}
-        self._result_cache = []
 
     def _load_model_objects(self, model, pks):
         if model in self._load_all_querysets:
@@ -746,7 +1072,9 @@ class RelatedSearchQuerySet(SearchQuerySet):
                 ui = connections[self.query._using].get_unified_index()
                 index = ui.get_index(model)
                 qs = index.load_all_queryset()
-                return qs.in_bulk(pks)
+                return load_objects(
+                    (self.query._using, model, "load_all_queryset"), qs, pks
+                )
             except NotHandled:
                 # The model returned doesn't seem to be handled by the
                 # routers. We should silently fail and populate
@@ -769,3 +1097,80 @@ class RelatedSearchQuerySet(SearchQuerySet):
         clone = super()._clone(klass=klass)
         clone._load_all_querysets = self._load_all_querysets
         return clone
+
+
+def multi_search(querysets, start=0, end=None):
+    """
+    Fetches the results from ``start`` to ``end`` for several
+    ``SearchQuerySet`` objects at once, sending the searches to each backend
+    together rather than one round-trip at a time.
+
+    ``end`` defaults to a page of results on from ``start``. Each
+    ``SearchQuerySet``'s cache is populated from the combined response, so
+    slicing, ``count``, ``facet_counts`` & ``spelling_suggestion`` don't query
+    again. Returns the ``querysets``.
+    """
+    to_fill = []
+    pending = {}
+
+    for sqs in querysets:
+        sqs_end = end
+
+        if sqs_end is None:
+            sqs_end = start + sqs._result_cache.page_size
+
+        if sqs._cache_is_full():
+            continue
+
+        if sqs._result_cache.get_range(start, sqs_end) is not None:
+            continue
+
+        to_fill.append((sqs, sqs_end))
+
+        if sqs.query._more_like_this:
+            # More Like This can't be batched, so it's filled on its own below.
+            continue
+
+        first_page, fill_start, fill_end = sqs._fill_window(start, sqs_end)
+        sqs._limit_query(*sqs._query_window(fill_start, fill_end))
+
+        if sqs.query._results is not None:
+            continue
+
+        query_string, kwargs = sqs.query._search_params(**sqs._query_kwargs())
+        pending.setdefault(sqs.query.backend, []).append((sqs, query_string, kwargs))
+
+    for backend, searches in pending.items():
+        to_search = []
+
+        for sqs, query_string, kwargs in searches:
+            query_cache = sqs.query._get_query_cache()
+
+            if query_cache is None:
+                to_search.append((sqs, query_string, kwargs, None, None))
+                continue
+
+            key, results = query_cache.lookup("search", query_string, kwargs)
+
+            if results is not None:
+                sqs.query._store_search_results(results)
+            else:
+                to_search.append((sqs, query_string, kwargs, query_cache, key))
+
+        if not to_search:
+            continue
+
+        responses = backend.multi_search(
+            [(query_string, kwargs) for _, query_string, kwargs, _, _ in to_search]
+        )
+
+        for (sqs, _, _, query_cache, key), results in zip(to_search, responses):
+            if query_cache is not None:
+                query_cache.store(key, results, sqs.query.cache_timeout)
+
+            sqs.query._store_search_results(results)
+
+    for sqs, sqs_end in to_fill:
+        sqs._fill_cache(start, sqs_end)
+
+    return querysets
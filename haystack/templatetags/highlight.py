@@ -1,12 +1,40 @@
+from functools import lru_cache
+
 from django import template
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
 from haystack.utils import importlib
+from haystack.utils.highlighting import Highlighter
 
 register = template.Library()
 
 
+@lru_cache(maxsize=None)
+def get_highlighter_class(path=None):
+    """
+    Returns the highlighter class at ``path`` (the
+    ``HAYSTACK_CUSTOM_HIGHLIGHTER`` setting), importing it only once. Falls
+    back to the default ``Highlighter``.
+    """
+    if not path:
+        return Highlighter
+
+    # Do the import dance.
+    try:
+        path_bits = path.split(".")
+        highlighter_path, highlighter_classname = (
+            ".".join(path_bits[:-1]),
+            path_bits[-1],
+        )
+        highlighter_module = importlib.import_module(highlighter_path)
+        return getattr(highlighter_module, highlighter_classname)
+    except (ImportError, AttributeError) as e:
+        raise ImproperlyConfigured(
+            "The highlighter '%s' could not be imported: %s" % (path, e)
+        )
+
+
 class HighlightNode(template.Node):
     def __init__(
         self, text_block, query, html_tag=None, css_class=None, max_length=None
@@ -26,6 +54,10 @@ class HighlightNode(template.Node):
         if max_length is not None:
             self.max_length = template.Variable(max_length)
 
+        self.highlighter_class = get_highlighter_class(
+            getattr(settings, "HAYSTACK_CUSTOM_HIGHLIGHTER", None)
+        )
+
     def render(self, context):
         text_block = self.text_block.resolve(context)
         query = self.query.resolve(context)
@@ -40,33 +72,16 @@ class HighlightNode(template.Node):
         if self.max_length is not None:
             kwargs["max_length"] = self.max_length.resolve(context)
 
-        # Handle a user-defined highlighting function.
-        if (
-            hasattr(settings, "HAYSTACK_CUSTOM_HIGHLIGHTER")
-            and settings.HAYSTACK_CUSTOM_HIGHLIGHTER
-        ):
-            # Do the import dance.
-            try:
-                path_bits = settings.HAYSTACK_CUSTOM_HIGHLIGHTER.split(".")
-                highlighter_path, highlighter_classname = (
-                    ".".join(path_bits[:-1]),
-                    path_bits[-1],
-                )
-                highlighter_module = importlib.import_module(highlighter_path)
-                highlighter_class = getattr(highlighter_module, highlighter_classname)
-            except (ImportError, AttributeError) as e:
-                raise ImproperlyConfigured(
-                    "The highlighter '%s' could not be imported: %s"
-                    % (settings.HAYSTACK_CUSTOM_HIGHLIGHTER, e)
-                )
-        else:
-            from haystack.utils.highlighting import Highlighter
-
-            highlighter_class = Highlighter
-
-        highlighter = highlighter_class(query, **kwargs)
-        highlighted_text = highlighter.highlight(text_block)
-        return highlighted_text
+        # Share the highlighter (& so the parsed query) between everything
+        # highlighted with the same query during this render, like the results
+        # on a page.
+        highlighters = context.render_context.setdefault(self, {})
+        key = (query, tuple(sorted(kwargs.items())))
+
+        if key not in highlighters:
+            highlighters[key] = self.highlighter_class(query, **kwargs)
+
+        return highlighters[key].highlight(text_block)
 
 
 @register.tag
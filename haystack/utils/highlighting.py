@@ -1,6 +1,25 @@
+import re
+from functools import lru_cache
+
 from django.utils.html import strip_tags
 
 
+@lru_cache(maxsize=128)
+def words_pattern(words):
+    """
+    Returns a compiled regex finding every place any of the ``words`` (a
+    ``frozenset``) starts, in a single pass over the text.
+
+    The alternation sits in a lookahead so words found inside other words are
+    found too. The longest words come first, so a match is always the longest
+    word starting there.
+    """
+    alternation = "|".join(
+        re.escape(word) for word in sorted(words, key=lambda word: (-len(word), word))
+    )
+    return re.compile("(?=(%s))" % alternation)
+
+
 class Highlighter:
     css_class = "highlighted"
     html_tag = "span"
@@ -30,29 +49,30 @@ class Highlighter:
         return self.render_html(highlight_locations, start_offset, end_offset)
 
     def find_highlightable_words(self):
-        # Use a set so we only do this once per unique word.
-        word_positions = {}
+        word_positions = {word: [] for word in self.query_words}
 
-        # Pre-compute the length.
-        end_offset = len(self.text_block)
-        lower_text_block = self.text_block.lower()
+        if not word_positions:
+            return word_positions
 
-        for word in self.query_words:
-            if word not in word_positions:
-                word_positions[word] = []
+        # Where the next match of each word may start, so a word's matches
+        # don't overlap each other (though they may overlap other words).
+        next_offsets = dict.fromkeys(word_positions, 0)
 
-            start_offset = 0
+        # Any shorter words that are a prefix of a word start in the same place.
+        prefixes = {
+            word: [other for other in word_positions if word.startswith(other)]
+            for word in word_positions
+        }
 
-            while start_offset < end_offset:
-                next_offset = lower_text_block.find(word, start_offset, end_offset)
+        pattern = words_pattern(frozenset(word_positions))
 
-                # If we get a -1 out of find, it wasn't found. Bomb out and
-                # start the next word.
-                if next_offset == -1:
-                    break
+        for match in pattern.finditer(self.text_block.lower()):
+            offset = match.start()
 
-                word_positions[word].append(next_offset)
-                start_offset = next_offset + len(word)
+            for word in prefixes[match.group(1)]:
+                if offset >= next_offsets[word]:
+                    word_positions[word].append(offset)
+                    next_offsets[word] = offset + len(word)
 
         return word_positions
 
@@ -60,51 +80,42 @@ class Highlighter:
         best_start = 0
         best_end = self.max_length
 
-        # First, make sure we have words.
-        if not len(highlight_locations):
-            return (best_start, best_end)
+        # Gather every position where a word was found, in ascending order.
+        words_found = sorted(
+            offset
+            for offset_list in highlight_locations.values()
+            for offset in offset_list
+        )
 
-        words_found = []
-
-        # Next, make sure we found any words at all.
-        for _, offset_list in highlight_locations.items():
-            if len(offset_list):
-                # Add all of the locations to the list.
-                words_found.extend(offset_list)
-
-        if not len(words_found):
+        if not words_found:
             return (best_start, best_end)
 
         if len(words_found) == 1:
             return (words_found[0], words_found[0] + self.max_length)
 
-        # Sort the list so it's in ascending order.
-        words_found = sorted(words_found)
+        if words_found[0] > self.max_length:
+            best_start = words_found[0]
+            best_end = best_start + self.max_length
 
-        # We now have a denormalized list of all positions were a word was
-        # found. We'll iterate through and find the densest window we can by
-        # counting the number of found offsets (-1 to fit in the window).
+        # Find the densest window starting at a found word, sliding the end of
+        # the window along as the start moves. Only replace if we have a bigger
+        # (not equal density) so we give deference to windows earlier in the
+        # document. A word alone in its window doesn't count.
         highest_density = 0
-
-        if words_found[:-1][0] > self.max_length:
-            best_start = words_found[:-1][0]
-            best_end = best_start + self.max_length
+        end = 0
 
         for count, start in enumerate(words_found[:-1]):
-            current_density = 1
+            end = max(end, count + 1)
 
-            for end in words_found[count + 1 :]:
-                if end - start < self.max_length:
-                    current_density += 1
-                else:
-                    current_density = 0
+            while end < len(words_found) and words_found[end] - start < self.max_length:
+                end += 1
 
-                # Only replace if we have a bigger (not equal density) so we
-                # give deference to windows earlier in the document.
-                if current_density > highest_density:
-                    best_start = start
-                    best_end = start + self.max_length
-                    highest_density = current_density
+            density = end - count
+
+            if density > 1 and density > highest_density:
+                best_start = start
+                best_end = start + self.max_length
+                highest_density = density
 
         return (best_start, best_end)
 
@@ -113,12 +124,11 @@ class Highlighter:
         text = self.text_block[start_offset:end_offset]
 
         # Invert highlight_locations to a location -> term list
-        term_list = []
-
-        for term, locations in highlight_locations.items():
-            term_list += [(loc - start_offset, term) for loc in locations]
-
-        loc_to_term = sorted(term_list)
+        loc_to_term = sorted(
+            (loc - start_offset, term)
+            for term, locations in highlight_locations.items()
+            for loc in locations
+        )
 
         # Prepare the highlight template
         if self.css_class:
@@ -128,38 +138,31 @@ class Highlighter:
 
         hl_end = "</%s>" % self.html_tag
 
-        # Copy the part from the start of the string to the first match,
-        # and there replace the match with a highlighted version.
-        highlighted_chunk = ""
-        matched_so_far = 0
-        prev = 0
-        prev_str = ""
+        # Copy the text between the matches, replacing each match with a
+        # highlighted version.
+        chunks = []
+        copied = 0
+
+        if start_offset > 0:
+            chunks.append("...")
 
         for cur, cur_str in loc_to_term:
+            # Skip matches outside of the window or overlapping the last one.
+            if cur < copied:
+                continue
+
             # This can be in a different case than cur_str
             actual_term = text[cur : cur + len(cur_str)]
 
             # Handle incorrect highlight_locations by first checking for the term
             if actual_term.lower() == cur_str:
-                if cur < prev + len(prev_str):
-                    continue
-
-                highlighted_chunk += (
-                    text[prev + len(prev_str) : cur] + hl_start + actual_term + hl_end
-                )
-                prev = cur
-                prev_str = cur_str
-
-                # Keep track of how far we've copied so far, for the last step
-                matched_so_far = cur + len(actual_term)
+                chunks.extend((text[copied:cur], hl_start, actual_term, hl_end))
+                copied = cur + len(actual_term)
 
         # Don't forget the chunk after the last term
-        highlighted_chunk += text[matched_so_far:]
-
-        if start_offset > 0:
-            highlighted_chunk = "...%s" % highlighted_chunk
+        chunks.append(text[copied:])
 
         if end_offset < len(self.text_block):
-            highlighted_chunk = "%s..." % highlighted_chunk
+            chunks.append("...")
 
-        return highlighted_chunk
+        return "".join(chunks)
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+
+from asgiref.local import Local
+
+# Holds the identity map for the current request (or ``identity_map`` block),
+# shared with code it runs through ``sync_to_async``.
+_local = Local()
+
+
+def get_identity_map():
+    """Returns the identity map in use, or ``None`` if there isn't one."""
+    return getattr(_local, "objects", None)
+
+
+def start_identity_map(**kwargs):
+    """Starts a fresh identity map. Connected to ``request_started``."""
+    _local.objects = {}
+
+
+def end_identity_map(**kwargs):
+    """Drops the identity map. Connected to ``request_finished``."""
+    _local.objects = None
+
+
+@contextmanager
+def identity_map():
+    """
+    Shares the objects loaded by ``load_all`` for the duration of the block,
+    as happens during each request. Reuses the identity map already in use,
+    if there is one.
+    """
+    if get_identity_map() is not None:
+        yield get_identity_map()
+        return
+
+    start_identity_map()
+
+    try:
+        yield get_identity_map()
+    finally:
+        end_identity_map()
+
+
+def load_objects(key, queryset, pks):
+    """
+    Returns ``queryset.in_bulk(pks)``, only querying for the objects that
+    haven't already been loaded under ``key`` in the identity map.
+    """
+    objects = get_identity_map()
+
+    if objects is None:
+        return queryset.in_bulk(pks)
+
+    loaded = objects.setdefault(key, {})
+    missing = [pk for pk in pks if str(pk) not in loaded]
+
+    if missing:
+        found = queryset.in_bulk(missing)
+
+        for obj in found.values():
+            loaded[str(obj.pk)] = obj
+
+        # Remember the ones that are gone too, so they aren't asked for again.
+        for pk in missing:
+            loaded.setdefault(str(pk), None)
+
+    in_bulk = {}
+
+    for pk in pks:
+        obj = loaded[str(pk)]
+
+        if obj is not None:
+            in_bulk[obj.pk] = obj
+
+    return in_bulk
@@ -3,6 +3,7 @@ import inspect
 import threading
 import warnings
 from collections import OrderedDict
+from time import time
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -11,6 +12,7 @@ from django.utils.module_loading import module_has_submodule
 from haystack import constants
 from haystack.exceptions import NotHandled, SearchFieldError
 from haystack.utils import importlib
+from haystack.utils import log as logging
 from haystack.utils.app_loading import haystack_get_app_modules
 
 
@@ -90,8 +92,15 @@ def load_router(full_router_path):
 class ConnectionHandler:
     def __init__(self, connections_info):
         self.connections_info = connections_info
+        # Engines (& so their backends) that say they're ``thread_safe`` are
+        # shared by every thread, with only the query logs kept per thread.
+        # The rest get one per thread.
+        self._connections = {}
+        self._lock = threading.Lock()
         self.thread_local = threading.local()
-        self._index = None
+        # The ``UnifiedIndex`` for each connection, shared by its engines in
+        # every thread so it's only built once.
+        self._unified_indexes = {}
 
     def ensure_defaults(self, alias):
         try:
@@ -104,26 +113,56 @@ class ConnectionHandler:
         if not conn.get("ENGINE"):
             conn["ENGINE"] = "haystack.backends.simple_backend.SimpleEngine"
 
-    def __getitem__(self, key):
+    def _thread_connections(self):
         if not hasattr(self.thread_local, "connections"):
             self.thread_local.connections = {}
-        elif key in self.thread_local.connections:
-            return self.thread_local.connections[key]
+
+        return self.thread_local.connections
+
+    def __getitem__(self, key):
+        if key in self._connections:
+            return self._connections[key]
+
+        thread_connections = self._thread_connections()
+
+        if key in thread_connections:
+            return thread_connections[key]
 
         self.ensure_defaults(key)
-        self.thread_local.connections[key] = load_backend(
-            self.connections_info[key]["ENGINE"]
-        )(using=key)
-        return self.thread_local.connections[key]
+        engine_class = load_backend(self.connections_info[key]["ENGINE"])
+
+        if not getattr(engine_class, "thread_safe", False):
+            thread_connections[key] = self._build_engine(engine_class, key)
+            return thread_connections[key]
+
+        with self._lock:
+            if key not in self._connections:
+                self._connections[key] = self._build_engine(engine_class, key)
+
+        return self._connections[key]
+
+    def _build_engine(self, engine_class, key):
+        engine = engine_class(using=key)
+        engine.connection_handler = self
+        return engine
+
+    def get_unified_index(self, engine):
+        """
+        Returns the ``UnifiedIndex`` shared by the engines for the connection,
+        building it with the first engine that asks for it.
+        """
+        with self._lock:
+            if engine.using not in self._unified_indexes:
+                self._unified_indexes[engine.using] = engine.build_unified_index()
+
+            return self._unified_indexes[engine.using]
 
     def reload(self, key):
-        if not hasattr(self.thread_local, "connections"):
-            self.thread_local.connections = {}
-        try:
-            del self.thread_local.connections[key]
-        except KeyError:
-            pass
+        with self._lock:
+            self._connections.pop(key, None)
+            self._unified_indexes.pop(key, None)
 
+        self._thread_connections().pop(key, None)
         return self.__getitem__(key)
 
     def all(self):  # noqa A003
@@ -176,15 +215,25 @@ class ConnectionRouter:
 
 class UnifiedIndex:
     # Used to collect all the indexes into a cohesive whole.
+    #
+    # It's shared by every thread, so it's built (lazily) behind a lock. Finding
+    # the index for a model doesn't need the unified fields, so those are only
+    # collected once something asks for them.
     def __init__(self, excluded_indexes=None):
         self._indexes = {}
         self.fields = OrderedDict()
         self._built = False
+        self._fields_built = False
         self.excluded_indexes = excluded_indexes or []
         self.excluded_indexes_ids = {}
         self.document_field = constants.DOCUMENT_FIELD
         self._fieldnames = {}
         self._facet_fieldnames = {}
+        self._facet_lookups = {}
+        self._copied_fields = set()
+        self._lock = threading.RLock()
+        self.timings = {}
+        self.log = logging.getLogger("haystack")
 
     @property
     def indexes(self):
@@ -228,33 +277,91 @@ class UnifiedIndex:
         return indexes
 
     def reset(self):
-        self._indexes = {}
+        with self._lock:
+            self._indexes = {}
+            self._built = False
+            self._reset_fields()
+
+    def _reset_fields(self):
         self.fields = OrderedDict()
-        self._built = False
+        self._fields_built = False
         self._fieldnames = {}
         self._facet_fieldnames = {}
+        self._facet_lookups = {}
+        self._copied_fields = set()
 
     def build(self, indexes=None):
+        with self._lock:
+            self._build_indexes(indexes)
+            self._build_fields()
+
+    def _build_indexes(self, indexes=None):
         self.reset()
+        start = time()
 
         if indexes is None:
             indexes = self.collect_indexes()
 
+        model_indexes = {}
+
         for index in indexes:
             model = index.get_model()
 
-            if model in self._indexes:
+            if model in model_indexes:
                 raise ImproperlyConfigured(
                     "Model '%s' has more than one 'SearchIndex`` handling it. "
                     "Please exclude either '%s' or '%s' using the 'EXCLUDED_INDEXES' "
                     "setting defined in 'settings.HAYSTACK_CONNECTIONS'."
-                    % (model, self._indexes[model], index)
+                    % (model, model_indexes[model], index)
                 )
 
-            self._indexes[model] = index
-            self.collect_fields(index)
+            model_indexes[model] = index
 
+        self._indexes = model_indexes
         self._built = True
+        self.timings["indexes"] = time() - start
+        self.log.debug(
+            "Collected %d search indexes in %.3fs.",
+            len(model_indexes),
+            self.timings["indexes"],
+        )
+
+    def _build_fields(self):
+        self._reset_fields()
+        start = time()
+
+        for index in self._indexes.values():
+            self.collect_fields(index)
+
+        # Work out what ``get_facet_fieldname`` answers for each field upfront.
+        for fieldname, field_object in self.fields.items():
+            if hasattr(field_object, "facet_for"):
+                self._facet_lookups[fieldname] = (
+                    field_object.facet_for or field_object.instance_name
+                )
+            else:
+                self._facet_lookups[fieldname] = (
+                    self._facet_fieldnames.get(fieldname) or fieldname
+                )
+
+        self._fields_built = True
+        self.timings["fields"] = time() - start
+        self.log.debug(
+            "Collected %d search fields in %.3fs.",
+            len(self.fields),
+            self.timings["fields"],
+        )
+
+    def _ensure_built(self, fields=False):
+        if self._built and (self._fields_built or not fields):
+            return
+
+        with self._lock:
+            if not self._built:
+                self._build_indexes()
+
+            if fields and not self._fields_built:
+                self._build_fields()
 
     def collect_fields(self, index):
         for fieldname, field_object in index.fields.items():
@@ -285,10 +392,10 @@ class UnifiedIndex:
                 else:
                     self._facet_fieldnames[field_object.instance_name] = fieldname
 
-            # Copy the field in so we've got a unified schema.
+            # Add the field in so we've got a unified schema. It's only copied
+            # once another index's options need merging into it.
             if field_object.index_fieldname not in self.fields:
                 self.fields[field_object.index_fieldname] = field_object
-                self.fields[field_object.index_fieldname] = copy.copy(field_object)
             else:
                 # If the field types are different, we can mostly
                 # safely ignore this. The exception is ``MultiValueField``,
@@ -296,12 +403,17 @@ class UnifiedIndex:
                 # values.
                 if field_object.is_multivalued:
                     old_field = self.fields[field_object.index_fieldname]
-                    self.fields[field_object.index_fieldname] = field_object
                     self.fields[field_object.index_fieldname] = copy.copy(field_object)
+                    self._copied_fields.add(field_object.index_fieldname)
 
                     # Switch it so we don't have to dupe the remaining
                     # checks.
                     field_object = old_field
+                elif field_object.index_fieldname not in self._copied_fields:
+                    self.fields[field_object.index_fieldname] = copy.copy(
+                        self.fields[field_object.index_fieldname]
+                    )
+                    self._copied_fields.add(field_object.index_fieldname)
 
                 # We've already got this field in the list. Ensure that
                 # what we hand back is a superset of all options that
@@ -322,9 +434,7 @@ class UnifiedIndex:
                     self.fields[field_object.index_fieldname].null = True
 
     def get_indexes(self):
-        if not self._built:
-            self.build()
-
+        self._ensure_built()
         return self._indexes
 
     def get_indexed_models(self):
@@ -332,9 +442,7 @@ class UnifiedIndex:
         return list(self.get_indexes().keys())
 
     def get_index_fieldname(self, field):
-        if not self._built:
-            self.build()
-
+        self._ensure_built(fields=True)
         return self._fieldnames.get(field) or field
 
     def get_index(self, model_klass):
@@ -347,25 +455,9 @@ class UnifiedIndex:
         return indexes[model_klass]
 
     def get_facet_fieldname(self, field):
-        if not self._built:
-            self.build()
-
-        for fieldname, field_object in self.fields.items():
-            if fieldname != field:
-                continue
-
-            if hasattr(field_object, "facet_for"):
-                if field_object.facet_for:
-                    return field_object.facet_for
-                else:
-                    return field_object.instance_name
-            else:
-                return self._facet_fieldnames.get(field) or field
-
-        return field
+        self._ensure_built(fields=True)
+        return self._facet_lookups.get(field, field)
 
     def all_searchfields(self):
-        if not self._built:
-            self.build()
-
+        self._ensure_built(fields=True)
         return self.fields
@@ -0,0 +1,108 @@
+import os
+import threading
+
+# Shared clients, keyed by connection alias & process id.
+POOLS = {}
+
+pools_lock = threading.Lock()
+
+
+def get_pool(connection_alias, build, options=None):
+    """
+    Returns the client shared by every thread & backend instance using the
+    connection in this process, calling ``build`` to create it when needed.
+
+    The client is rebuilt if ``options`` change. Processes never share one,
+    so forked workers (like ``update_index --workers``) get their own sockets.
+    """
+    key = (connection_alias, os.getpid())
+    entry = POOLS.get(key)
+
+    if entry is None or entry[0] != options:
+        with pools_lock:
+            entry = POOLS.get(key)
+
+            if entry is None or entry[0] != options:
+                entry = POOLS[key] = (options, build())
+
+    return entry[1]
+
+
+def clear_pools(connection_alias=None):
+    """Forgets the shared clients for the connection (or all of them)."""
+    with pools_lock:
+        for key in list(POOLS):
+            if connection_alias is None or key[0] == connection_alias:
+                del POOLS[key]
+
+
+def build_session(pool_size=10, max_retries=0, keepalive=True):
+    """
+    Returns a ``requests.Session`` that keeps up to ``pool_size`` connections
+    open per host & retries ``max_retries`` times on connection errors.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=max_retries, backoff_factor=0.1),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if not keepalive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+def session_pools(session):
+    """Returns the ``urllib3`` connection pools of a ``requests.Session``."""
+    pools = []
+
+    for adapter in set(session.adapters.values()):
+        manager_pools = adapter.poolmanager.pools
+
+        for key in manager_pools.keys():
+            pool = manager_pools.get(key)
+
+            if pool is not None:
+                pools.append(pool)
+
+    return pools
+
+
+def summarize_pools(pools):
+    """
+    Adds up how full a set of ``urllib3`` connection pools are.
+
+    ``connections`` counts the connections each pool has opened, ``idle``
+    those waiting to be reused & ``max_size`` how many each pool will keep.
+    """
+    stats = {"pools": 0, "max_size": 0, "connections": 0, "idle": 0, "requests": 0}
+
+    for pool in pools:
+        stats["pools"] += 1
+        stats["connections"] += pool.num_connections
+        stats["requests"] += pool.num_requests
+
+        if pool.pool is not None:
+            stats["max_size"] += pool.pool.maxsize
+            stats["idle"] += sum(
+                1 for conn in list(pool.pool.queue) if conn is not None
+            )
+
+    return stats
+
+
+def get_pool_stats(using):
+    """
+    Returns the connection pool usage for the connection in this process, or
+    ``None`` if its backend doesn't talk HTTP.
+    """
+    from haystack import connections
+
+    return connections[using].get_backend().get_pool_stats()
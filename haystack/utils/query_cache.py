@@ -0,0 +1,161 @@
+import datetime
+import decimal
+import hashlib
+import threading
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models import Model
+
+from haystack.utils import get_identifier
+
+# Hit & miss counts for this process, keyed by connection alias. Backends are
+# shared between threads, so they're only changed while holding the lock.
+STATS = {}
+STATS_LOCK = threading.Lock()
+
+PLAIN_TYPES = (
+    str,
+    bytes,
+    int,
+    float,
+    bool,
+    type(None),
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    decimal.Decimal,
+)
+
+
+def normalize(value):
+    """
+    Turns search kwargs into a structure whose ``repr`` is stable, so the
+    same query always maps to the same cache key.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), normalize(val)) for key, val in value.items()))
+
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((normalize(val) for val in value), key=repr))
+
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(val) for val in value)
+
+    if isinstance(value, type):
+        return "%s.%s" % (value.__module__, value.__qualname__)
+
+    if isinstance(value, Model):
+        return get_identifier(value)
+
+    if isinstance(value, PLAIN_TYPES):
+        return value
+
+    # Things like ``Point`` or ``D`` have no useful ``repr``.
+    return "%s(%s)" % (type(value).__name__, value)
+
+
+class QueryCache:
+    """
+    Stores the responses from a search backend in one of Django's caches.
+
+    Keys include a generation token for the connection, which is replaced
+    whenever the backend's index changes, so everything cached before then
+    is simply never read again.
+    """
+
+    def __init__(self, connection_alias, cache_alias=None, timeout=DEFAULT_TIMEOUT):
+        self.connection_alias = connection_alias
+        self.cache = caches[cache_alias or DEFAULT_CACHE_ALIAS]
+        self.timeout = timeout
+        self.generation_key = "haystack:%s:generation" % connection_alias
+
+    def get_generation(self):
+        generation = self.cache.get(self.generation_key)
+
+        if generation is None:
+            # Another process may get in first, so re-read what won.
+            self.cache.add(self.generation_key, uuid4().hex, None)
+            generation = self.cache.get(self.generation_key)
+
+        return generation
+
+    def invalidate(self):
+        self.cache.delete(self.generation_key)
+
+    def make_key(self, kind, query_string, kwargs):
+        params = repr((kind, query_string, normalize(kwargs)))
+        return "haystack:%s:%s:%s" % (
+            self.connection_alias,
+            self.get_generation(),
+            hashlib.md5(params.encode("utf-8")).hexdigest(),
+        )
+
+    def lookup(self, kind, query_string, kwargs):
+        """
+        Returns the cache key for the query & the cached response, which is
+        ``None`` on a miss.
+        """
+        key = self.make_key(kind, query_string, kwargs)
+        results = self.cache.get(key)
+
+        with STATS_LOCK:
+            stats = STATS.setdefault(self.connection_alias, {"hits": 0, "misses": 0})
+
+            if results is not None:
+                stats["hits"] += 1
+            else:
+                stats["misses"] += 1
+
+        return key, results
+
+    def store(self, key, results, timeout=None):
+        # A search that failed silently looks just like one without any
+        # matches, so don't hang on to those.
+        if results.get("hits"):
+            if timeout is None:
+                timeout = self.timeout
+
+            self.cache.set(key, results, timeout)
+
+    def fetch(self, kind, query_string, kwargs, search, timeout=None):
+        """
+        Returns the cached response for the query, calling ``search`` to get
+        (& cache) it on a miss.
+        """
+        key, results = self.lookup(kind, query_string, kwargs)
+
+        if results is None:
+            results = search()
+            self.store(key, results, timeout)
+
+        return results
+
+    async def afetch(self, kind, query_string, kwargs, search, timeout=None):
+        """
+        Awaitable version of ``fetch``, for a ``search`` that returns an
+        awaitable.
+        """
+        key, results = await sync_to_async(self.lookup)(kind, query_string, kwargs)
+
+        if results is None:
+            results = await search()
+            await sync_to_async(self.store)(key, results, timeout)
+
+        return results
+
+
+def get_query_cache_stats(using):
+    """
+    Returns the number of query cache hits & misses for the connection in
+    this process.
+    """
+    with STATS_LOCK:
+        return dict(STATS.get(using, {"hits": 0, "misses": 0}))
+
+
+def reset_query_cache_stats():
+    with STATS_LOCK:
+        STATS.clear()
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    A sparse cache of search results, held in fixed-size pages keyed by page
+    number.
+
+    Only the pages that have been fetched take up memory, however many hits
+    the search has, and looking up a slice only touches the pages it spans.
+    ``count`` is the total number of results, once it's known.
+
+    If ``max_pages`` is set, the least recently used pages are evicted once
+    more than that many are cached.
+    """
+
+    def __init__(self, page_size, max_pages=None):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.count = None
+        self._pages = OrderedDict()
+        self._filled = 0
+
+    def __len__(self):
+        # The number of results actually cached, not the number of hits.
+        return self._filled
+
+    def __iter__(self):
+        for page_num in sorted(self._pages):
+            yield from self._pages[page_num]
+
+    def set_count(self, count):
+        # Skipped results only ever shrink the total, so never grow it back.
+        if self.count is None or count < self.count:
+            self.count = count
+
+    def is_full(self):
+        return self.count is not None and self._filled >= self.count
+
+    def missing_span(self, start, end=None):
+        """
+        Returns the first & last page numbers needed to cover ``start`` to
+        ``end`` that aren't cached yet. The last page is ``None`` if ``end``
+        is.
+        """
+        first_page = start // self.page_size
+        last_page = None
+
+        if end is not None:
+            last_page = max(end - 1, start) // self.page_size
+
+        while first_page in self._pages and (
+            last_page is None or first_page < last_page
+        ):
+            first_page += 1
+
+        while last_page is not None and last_page > first_page:
+            if last_page not in self._pages:
+                break
+
+            last_page -= 1
+
+        return first_page, last_page
+
+    def get_range(self, start, end=None):
+        """
+        Returns the cached results from ``start`` to ``end``, or ``None`` if
+        any of the pages needed aren't cached.
+        """
+        if self.count is not None and (end is None or end > self.count):
+            end = self.count
+
+        if end is None:
+            return None
+
+        if start >= end:
+            return []
+
+        first_page = start // self.page_size
+        results = []
+
+        for page_num in range(first_page, (end - 1) // self.page_size + 1):
+            page = self._pages.get(page_num)
+
+            if page is None:
+                return None
+
+            self._pages.move_to_end(page_num)
+            results.extend(page)
+
+        offset = first_page * self.page_size
+        return results[start - offset : end - offset]
+
+    def add_pages(self, first_page, results):
+        """
+        Caches ``results`` as consecutive pages, starting at ``first_page``.
+
+        A trailing partial page is only kept if it's the last page of the
+        results.
+        """
+        added = set()
+
+        for offset in range(0, len(results), self.page_size):
+            page = results[offset : offset + self.page_size]
+            page_num = first_page + offset // self.page_size
+            end = page_num * self.page_size + len(page)
+
+            if len(page) < self.page_size and end != self.count:
+                break
+
+            self._filled += len(page) - len(self._pages.get(page_num, ()))
+            self._pages[page_num] = page
+            self._pages.move_to_end(page_num)
+            added.add(page_num)
+
+        if self.max_pages is None:
+            return
+
+        # Evict the least recently used pages, sparing the ones just added so
+        # the caller can still read them back.
+        while len(self._pages) > self.max_pages:
+            page_num = next(iter(self._pages))
+
+            if page_num in added:
+                break
+
+            self._filled -= len(self._pages.pop(page_num))
@@ -1,9 +1,10 @@
 from django.conf import settings
-from django.core.paginator import InvalidPage, Paginator
+from django.core.paginator import InvalidPage
 from django.http import Http404
 from django.shortcuts import render
 
 from haystack.forms import FacetedSearchForm, ModelSearchForm
+from haystack.paginator import SearchPaginator
 from haystack.query import EmptySearchQuerySet
 
 RESULTS_PER_PAGE = getattr(settings, "HAYSTACK_SEARCH_RESULTS_PER_PAGE", 20)
@@ -105,10 +106,7 @@ class SearchView:
         if page_no < 1:
             raise Http404("Pages should be 1 or greater.")
 
-        start_offset = (page_no - 1) * self.results_per_page
-        self.results[start_offset : start_offset + self.results_per_page]
-
-        paginator = Paginator(self.results, self.results_per_page)
+        paginator = SearchPaginator(self.results, self.results_per_page)
 
         try:
             page = paginator.page(page_no)
@@ -229,7 +227,7 @@ def basic_search(
     else:
         form = form_class(searchqueryset=searchqueryset, load_all=load_all)
 
-    paginator = Paginator(results, results_per_page or RESULTS_PER_PAGE)
+    paginator = SearchPaginator(results, results_per_page or RESULTS_PER_PAGE)
 
     try:
         page = paginator.page(int(request.GET.get("page", 1)))
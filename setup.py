@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 from setuptools import setup
 
-install_requires = ["Django>=2.2"]
+install_requires = ["Django>=2.2", "asgiref>=3.2"]
 
 tests_require = [
     "pysolr>=3.7.0",
@@ -44,7 +44,6 @@ setup(
         "Operating System :: OS Independent",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.5",
         "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
@@ -52,6 +51,7 @@ setup(
         "Topic :: Utilities",
     ],
     zip_safe=False,
+    python_requires=">=3.6",
     install_requires=install_requires,
     tests_require=tests_require,
     extras_require={
@@ -1,12 +1,15 @@
 import datetime
+from unittest.mock import patch
 
+import elasticsearch
 from django.contrib.gis.measure import D
 from django.test import TestCase
 
-from haystack import connections
+from haystack import connections, indexes
 from haystack.inputs import Exact
 from haystack.models import SearchResult
 from haystack.query import SQ, SearchQuerySet
+from haystack.utils.loading import UnifiedIndex
 
 from ..core.models import AnotherMockModel, MockModel
 
@@ -178,6 +181,19 @@ class Elasticsearch7SearchQueryTestCase(TestCase):
         self.assertEqual(len(sqs.query.narrow_queries), 1)
         self.assertEqual(sqs.query.narrow_queries.pop(), "foo:(moof)")
 
+    def test_build_search_kwargs_only_defer(self):
+        backend = connections["elasticsearch"].get_backend()
+        search_kwargs = backend.build_search_kwargs("where")
+        self.assertFalse("_source" in search_kwargs)
+
+        search_kwargs = backend.build_search_kwargs(
+            "where", only_fields={"name"}, deferred_fields={"text", "django_id"}
+        )
+        self.assertEqual(
+            search_kwargs["_source"],
+            {"includes": ["django_ct", "django_id", "name"], "excludes": ["text"]},
+        )
+
     def test_build_query_with_dwithin_range(self):
         from django.contrib.gis.geos import Point
 
@@ -197,3 +213,235 @@ class Elasticsearch7SearchQueryTestCase(TestCase):
                 "location_field": {"lat": 2.3456789, "lon": 1.2345678},
             },
         )
+
+
+class Elasticsearch7FilterMockSearchIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True)
+    name = indexes.CharField(model_attr="author", faceted=True)
+    pub_date = indexes.DateTimeField(model_attr="pub_date")
+    rating = indexes.IntegerField(null=True)
+
+    def get_model(self):
+        return MockModel
+
+
+class Elasticsearch7FilterContextTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_ui = connections["elasticsearch"].get_unified_index()
+        self.ui = UnifiedIndex()
+        self.ui.build(indexes=[Elasticsearch7FilterMockSearchIndex()])
+        connections["elasticsearch"]._index = self.ui
+
+        self.sq = connections["elasticsearch"].get_query()
+
+    def tearDown(self):
+        connections["elasticsearch"]._index = self.old_ui
+        super().tearDown()
+
+    def test_filterable_fields(self):
+        backend = connections["elasticsearch"].get_backend()
+        self.assertEqual(
+            backend.get_filterable_fields(),
+            {"django_ct", "django_id", "name_exact", "pub_date", "rating"},
+        )
+
+    def test_exact_lookups_become_filters(self):
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(SQ(name="daniel"))
+        self.sq.add_filter(SQ(name_exact__exact="Daniel"))
+        self.sq.add_filter(SQ(pub_date__lte=datetime.datetime(2009, 2, 10, 1, 59)))
+        self.sq.add_filter(SQ(rating__in=[1, 2]))
+        self.sq.add_filter(SQ(rating__range=[3, 5]))
+        self.sq.add_filter(~SQ(rating=4) | SQ(rating__gt=8))
+
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(query_string, "((why) AND name:(daniel))")
+        self.assertEqual(
+            search_kwargs["filter_clauses"],
+            [
+                {"term": {"name_exact": "Daniel"}},
+                {"range": {"pub_date": {"lte": "2009-02-10T01:59:00"}}},
+                {"terms": {"rating": [1, 2]}},
+                {"range": {"rating": {"gte": 3, "lte": 5}}},
+                {
+                    "bool": {
+                        "should": [
+                            {"bool": {"must_not": [{"term": {"rating": 4}}]}},
+                            {"range": {"rating": {"gt": 8}}},
+                        ]
+                    }
+                },
+            ],
+        )
+
+        # The full query string is still there for display.
+        self.assertIn('rating:("1" OR "2")', self.sq.build_query())
+
+    def test_or_stays_in_query_string(self):
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(SQ(rating=4), use_or=True)
+
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(query_string, "((why) OR rating:(4))")
+        self.assertNotIn("filter_clauses", search_kwargs)
+
+    def test_only_filters(self):
+        self.sq.add_filter(SQ(rating=4))
+        self.sq.add_filter(SQ(name_exact=Exact("Daniel")))
+
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(query_string, 'name_exact:("Daniel")')
+        self.assertEqual(search_kwargs["filter_clauses"], [{"term": {"rating": 4}}])
+
+        # Strings searched for word by word need the query string.
+        self.sq.add_filter(SQ(name_exact="Daniel Lindsley"))
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(
+            query_string,
+            '(name_exact:("Daniel") AND name_exact:(Daniel AND Lindsley))',
+        )
+
+    def test_narrow_queries(self):
+        self.sq.add_narrow_query('name_exact:"Daniel \\"Danno\\" Lindsley"')
+        self.sq.add_narrow_query('name:"Daniel"')
+
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(query_string, "*:*")
+        self.assertEqual(search_kwargs["narrow_queries"], {'name:"Daniel"'})
+        self.assertEqual(
+            search_kwargs["filter_clauses"],
+            [{"term": {"name_exact": 'Daniel "Danno" Lindsley'}}],
+        )
+
+    def test_build_search_kwargs_filter_clauses(self):
+        backend = connections["elasticsearch"].get_backend()
+        search_kwargs = backend.build_search_kwargs(
+            "why", filter_clauses=[{"term": {"rating": 4}}], models=[MockModel]
+        )
+        self.assertEqual(
+            search_kwargs["query"]["bool"]["filter"],
+            {
+                "bool": {
+                    "must": [
+                        {"terms": {"django_ct": ["core.mockmodel"]}},
+                        {"term": {"rating": 4}},
+                    ]
+                }
+            },
+        )
+
+    def test_facet_iterator(self):
+        backend = connections["elasticsearch"].get_backend()
+        pages = [
+            {
+                "aggregations": {
+                    "name": {
+                        "after_key": {"name": "b"},
+                        "buckets": [
+                            {"key": {"name": "a"}, "doc_count": 3},
+                            {"key": {"name": "b"}, "doc_count": 1},
+                        ],
+                    }
+                }
+            },
+            {
+                "aggregations": {
+                    "name": {
+                        "after_key": {"name": "c"},
+                        "buckets": [{"key": {"name": "c"}, "doc_count": 2}],
+                    }
+                }
+            },
+        ]
+        sqs = SearchQuerySet(using="elasticsearch").filter(rating=4)
+
+        with patch.object(backend, "setup_complete", True), patch.object(
+            backend.conn, "search", side_effect=pages
+        ) as search:
+            self.assertEqual(
+                list(sqs.facet_iterator("name", page_size=2)),
+                [("a", 3), ("b", 1), ("c", 2)],
+            )
+
+        self.assertEqual(search.call_count, 2)
+        body = search.call_args[1]["body"]
+        self.assertEqual(body["size"], 0)
+        self.assertIn(
+            {"term": {"rating": 4}}, body["query"]["bool"]["filter"]["bool"]["must"]
+        )
+        self.assertEqual(
+            body["aggs"],
+            {
+                "name": {
+                    "composite": {
+                        "size": 2,
+                        "sources": [{"name": {"terms": {"field": "name_exact"}}}],
+                        "after": {"name": "b"},
+                    }
+                }
+            },
+        )
+
+
+class Elasticsearch7MappingFingerprintTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.backend = connections["elasticsearch"].get_backend()
+        self.old_mapping = self.backend.existing_mapping
+        self.backend.existing_mapping = None
+
+    def tearDown(self):
+        self.backend.existing_mapping = self.old_mapping
+        super().tearDown()
+
+    def test_setup(self):
+        indices = self.backend.conn.indices
+        missing = elasticsearch.NotFoundError(404, "index_not_found_exception", {})
+
+        with patch.object(indices, "get_mapping", side_effect=missing), patch.object(
+            indices, "create"
+        ) as create, patch.object(indices, "put_mapping") as put_mapping:
+            self.backend.setup()
+
+        self.assertTrue(create.called)
+        body = put_mapping.call_args[1]["body"]
+        fingerprint = self.backend.get_mapping_fingerprint(
+            {"properties": body["properties"]}
+        )
+        self.assertEqual(body["_meta"], {"haystack_fingerprint": fingerprint})
+
+        # Another process only fetches the fingerprint, which matches.
+        self.backend.existing_mapping = None
+        stored = {self.backend.index_name: {"mappings": {"_meta": body["_meta"]}}}
+
+        with patch.object(
+            indices, "get_mapping", return_value=stored
+        ) as get_mapping, patch.object(indices, "put_mapping") as put_mapping:
+            self.backend.setup()
+
+        self.assertEqual(
+            get_mapping.call_args[1]["filter_path"],
+            "*.mappings._meta,*.mappings.*._meta",
+        )
+        self.assertFalse(put_mapping.called)
+
+    def test_setup_skip_mapping_check(self):
+        indices = self.backend.conn.indices
+
+        with patch.object(self.backend, "skip_mapping_check", True), patch.object(
+            indices, "get_mapping", return_value={}
+        ) as get_mapping, patch.object(indices, "create"), patch.object(
+            indices, "put_mapping"
+        ) as put_mapping:
+            self.backend.setup()
+            self.assertFalse(get_mapping.called)
+
+            # Once the index has been cleared, the mapping is checked again.
+            self.backend.existing_mapping = {}
+            self.backend.setup()
+
+        self.assertEqual(get_mapping.call_count, 1)
+        self.assertEqual(put_mapping.call_count, 1)
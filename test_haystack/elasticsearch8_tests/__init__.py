@@ -0,0 +1,22 @@
+import unittest
+import warnings
+
+from haystack.utils import log as logging
+
+warnings.simplefilter("ignore", Warning)
+
+
+def setup():
+    log = logging.getLogger("haystack")
+    try:
+        import elasticsearch
+
+        if not ((8, 0, 0) <= elasticsearch.__version__ < (9, 0, 0)):
+            raise ImportError
+    except ImportError:
+        log.error(
+            "Skipping ElasticSearch 8 tests: 'elasticsearch>=8.0.0,<9.0.0' not installed."
+        )
+        raise unittest.SkipTest("'elasticsearch>=8.0.0,<9.0.0' not installed.")
+
+    # The tests answer with recorded responses, so no server is needed.
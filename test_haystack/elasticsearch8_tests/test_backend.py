@@ -0,0 +1,439 @@
+import copy
+import datetime
+import unittest
+from unittest.mock import patch
+
+import elasticsearch
+from django.test import TestCase
+
+from haystack import connections, indexes
+from haystack.exceptions import SearchBackendError
+from haystack.utils.loading import UnifiedIndex
+
+from ..core.models import MockModel
+
+if not ((8, 0, 0) <= elasticsearch.__version__ < (9, 0, 0)):
+    raise unittest.SkipTest("'elasticsearch>=8.0.0,<9.0.0' not installed.")
+
+
+class RecordedNamespace:
+    def __init__(self, client, prefix=""):
+        self._client = client
+        self._prefix = prefix
+
+    def options(self, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        name = self._prefix + name
+
+        def method(**kwargs):
+            # The backend reuses (& changes) what it sends between requests.
+            self._client.calls.append((name, copy.deepcopy(kwargs)))
+            responses = self._client.responses.get(name, [])
+            response = responses.pop(0) if responses else {}
+
+            if isinstance(response, Exception):
+                raise response
+
+            return response
+
+        return method
+
+
+class RecordedElasticsearch(RecordedNamespace):
+    """
+    Stands in for the client, recording each call & answering with the
+    responses recorded for it (in order).
+    """
+
+    def __init__(self, **responses):
+        super().__init__(self)
+        self.responses = {
+            name.replace("__", "."): list(values) for name, values in responses.items()
+        }
+        self.calls = []
+        self.indices = RecordedNamespace(self, "indices.")
+
+    def called(self, name):
+        return [kwargs for method, kwargs in self.calls if method == name]
+
+
+def hit(pk, sort=None):
+    raw_hit = {
+        "_id": "core.mockmodel.%s" % pk,
+        "_score": 1.0,
+        "_source": {
+            "django_ct": "core.mockmodel",
+            "django_id": str(pk),
+            "name": "daniel%s" % pk,
+        },
+    }
+
+    if sort is not None:
+        raw_hit["sort"] = sort
+
+    return raw_hit
+
+
+def page(*hits, **extra):
+    raw_results = {"hits": {"total": {"value": len(hits)}, "hits": list(hits)}}
+    raw_results.update(extra)
+    return raw_results
+
+
+class Elasticsearch8MockSearchIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True, model_attr="foo")
+    name = indexes.CharField(model_attr="author", faceted=True, boost=2.0)
+    pub_date = indexes.DateTimeField(model_attr="pub_date")
+
+    def get_model(self):
+        return MockModel
+
+
+class Elasticsearch8SearchBackendTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_ui = connections["elasticsearch"].get_unified_index()
+        self.ui = UnifiedIndex()
+        self.smmi = Elasticsearch8MockSearchIndex()
+        self.ui.build(indexes=[self.smmi])
+        connections["elasticsearch"]._index = self.ui
+
+        self.sb = connections["elasticsearch"].get_backend()
+        self.old_conn = self.sb.conn
+        self.sb.setup_complete = True
+        self.sb.silently_fail = True
+
+    def tearDown(self):
+        self.sb.conn = self.old_conn
+        self.sb.setup_complete = False
+        connections["elasticsearch"]._index = self.old_ui
+        super().tearDown()
+
+    def test_setup(self):
+        missing = elasticsearch.NotFoundError("index_not_found_exception", None, {})
+        self.sb.conn = RecordedElasticsearch(indices__get_mapping=[missing])
+        self.sb.setup_complete = False
+        self.sb.existing_mapping = {}
+        self.sb.setup()
+
+        self.assertTrue(self.sb.setup_complete)
+        self.assertEqual(
+            self.sb.conn.called("indices.create"),
+            [
+                {
+                    "index": self.sb.index_name,
+                    "settings": self.sb.DEFAULT_SETTINGS["settings"],
+                }
+            ],
+        )
+        put_mapping = self.sb.conn.called("indices.put_mapping")[0]
+        properties = put_mapping["properties"]
+        self.assertEqual(properties["name"], {"type": "text", "analyzer": "snowball"})
+        self.assertEqual(properties["name_exact"], {"type": "keyword"})
+        self.assertEqual(properties["django_ct"], {"type": "keyword"})
+
+        # The mapping's fingerprint is stored alongside it.
+        fingerprint = self.sb.get_mapping_fingerprint({"properties": properties})
+        self.assertEqual(put_mapping["meta"], {"haystack_fingerprint": fingerprint})
+
+        # An unchanged mapping isn't fetched or sent again.
+        self.sb.conn = RecordedElasticsearch()
+        self.sb.setup()
+        self.assertEqual(self.sb.conn.calls, [])
+
+        # A new worker only fetches the fingerprint to compare.
+        self.sb.existing_mapping = None
+        self.sb.conn = RecordedElasticsearch(
+            indices__get_mapping=[
+                {self.sb.index_name: {"mappings": {"_meta": put_mapping["meta"]}}}
+            ]
+        )
+        self.sb.setup()
+        self.assertEqual(
+            self.sb.conn.called("indices.get_mapping")[0]["filter_path"],
+            "*.mappings._meta,*.mappings.*._meta",
+        )
+        self.assertEqual(self.sb.conn.called("indices.put_mapping"), [])
+
+    def test_setup_skip_mapping_check(self):
+        self.sb.conn = RecordedElasticsearch()
+        self.sb.setup_complete = False
+        self.sb.existing_mapping = None
+        self.sb.skip_mapping_check = True
+
+        try:
+            self.sb.setup()
+        finally:
+            self.sb.skip_mapping_check = False
+
+        self.assertTrue(self.sb.setup_complete)
+        self.assertEqual(self.sb.content_field_name, "text")
+        self.assertEqual(self.sb.conn.calls, [])
+
+    def test_update(self):
+        self.sb.conn = RecordedElasticsearch()
+        mock = MockModel(
+            id=1, author="daniel1", foo="bar", pub_date=datetime.datetime(2009, 2, 25)
+        )
+
+        with patch("haystack.backends.elasticsearch8_backend.bulk") as bulk:
+            self.sb.update(self.smmi, [mock])
+
+        (conn, actions), kwargs = bulk.call_args
+        self.assertEqual(len(actions), 1)
+        self.assertEqual(actions[0]["_op_type"], "index")
+        self.assertEqual(actions[0]["_index"], self.sb.index_name)
+        self.assertEqual(actions[0]["_id"], "core.mockmodel.1")
+        self.assertEqual(actions[0]["_source"]["name"], "daniel1")
+        self.assertEqual(actions[0]["_source"]["pub_date"], "2009-02-25T00:00:00")
+        self.assertEqual(
+            self.sb.conn.called("indices.refresh"), [{"index": self.sb.index_name}]
+        )
+
+    def test_clear(self):
+        self.sb.conn = RecordedElasticsearch()
+        self.sb.clear(models=[MockModel])
+        self.assertEqual(
+            self.sb.conn.called("delete_by_query"),
+            [
+                {
+                    "index": self.sb.index_name,
+                    "query": {"terms": {"django_ct": ["core.mockmodel"]}},
+                    "refresh": True,
+                }
+            ],
+        )
+
+    def test_search(self):
+        self.sb.conn = RecordedElasticsearch(search=[page(hit(1), hit(2))])
+        results = self.sb.search("*:*", start_offset=10, end_offset=20)
+
+        self.assertEqual(results["hits"], 2)
+        self.assertEqual([result.pk for result in results["results"]], ["1", "2"])
+
+        search = self.sb.conn.called("search")[0]
+        self.assertNotIn("body", search)
+        self.assertEqual(search["index"], self.sb.index_name)
+        self.assertEqual(search["from_"], 10)
+        self.assertEqual(search["size"], 10)
+        self.assertEqual(search["source"], True)
+        self.assertEqual(search["query"]["bool"]["must"], {"match_all": {}})
+
+    def test_client_kwargs(self):
+        # Body keys the client takes under other names are renamed.
+        self.assertEqual(
+            self.sb._client_kwargs(
+                {"from": 5, "_source": ["name"], "query": {"match_all": {}}},
+                routing="a",
+            ),
+            {
+                "from_": 5,
+                "source": ["name"],
+                "query": {"match_all": {}},
+                "routing": "a",
+            },
+        )
+        # The body wins over a URL parameter of the same name.
+        self.assertEqual(
+            self.sb._client_kwargs({"_source": ["name"]}, _source=True),
+            {"source": ["name"]},
+        )
+
+        self.sb.conn = RecordedElasticsearch(search=[page(hit(1))])
+        self.sb.search("*:*", only_fields={"name"})
+        search = self.sb.conn.called("search")[0]
+        self.assertNotIn("from", search)
+        self.assertNotIn("_source", search)
+        self.assertEqual(search["from_"], 0)
+        self.assertEqual(
+            search["source"], {"includes": ["django_ct", "django_id", "name"]}
+        )
+
+    def test_date_facets(self):
+        date_facets = {
+            "pub_date": {
+                "start_date": datetime.datetime(2008, 1, 1),
+                "end_date": datetime.datetime(2009, 1, 1),
+                "gap_by": "month",
+                "gap_amount": 3,
+            }
+        }
+        search_kwargs = self.sb.build_search_kwargs("*:*", date_facets=date_facets)
+        self.assertEqual(
+            search_kwargs["aggs"]["pub_date"]["date_histogram"],
+            {"field": "pub_date", "calendar_interval": "month"},
+        )
+
+        date_facets["pub_date"].update(gap_by="day", gap_amount=2)
+        search_kwargs = self.sb.build_search_kwargs("*:*", date_facets=date_facets)
+        self.assertEqual(
+            search_kwargs["aggs"]["pub_date"]["date_histogram"],
+            {"field": "pub_date", "fixed_interval": "2d"},
+        )
+
+    def test_multi_search(self):
+        self.sb.conn = RecordedElasticsearch(
+            msearch=[
+                {
+                    "responses": [
+                        page(hit(1)),
+                        {"status": 400, "error": {"type": "parsing_exception"}},
+                    ]
+                }
+            ]
+        )
+        results = self.sb.multi_search(
+            [("*:*", {}), ("", {}), ("name:(daniel)", {"end_offset": 5})]
+        )
+
+        self.assertEqual([result["hits"] for result in results], [1, 0, 0])
+        self.assertEqual(results[0]["results"][0].pk, "1")
+
+        msearch = self.sb.conn.called("msearch")
+        self.assertEqual(len(msearch), 1)
+        self.assertEqual(msearch[0]["index"], self.sb.index_name)
+        searches = msearch[0]["searches"]
+        self.assertEqual(len(searches), 4)
+        self.assertEqual(searches[3]["size"], 5)
+
+    def test_multi_search_errors(self):
+        error = {"status": 400, "error": {"type": "parsing_exception"}}
+        searches = [("*:*", {}), ("name:(daniel)", {})]
+
+        # An error for one search is logged & only that search comes back empty...
+        self.sb.conn = RecordedElasticsearch(
+            msearch=[{"responses": [page(hit(1)), error]}]
+        )
+
+        with self.assertLogs("haystack", "ERROR") as logs:
+            results = self.sb.multi_search(searches)
+
+        self.assertEqual([result["hits"] for result in results], [1, 0])
+        self.assertIn("parsing_exception", logs.output[0])
+
+        # ...or raised, when not failing silently.
+        self.sb.silently_fail = False
+        self.sb.conn = RecordedElasticsearch(
+            msearch=[{"responses": [page(hit(1)), error]}]
+        )
+
+        with self.assertRaises(SearchBackendError):
+            self.sb.multi_search(searches)
+
+        # A failed request fails every search in it.
+        self.sb.silently_fail = True
+        self.sb.conn = RecordedElasticsearch(
+            msearch=[elasticsearch.ConnectionError("Connection refused")]
+        )
+
+        with self.assertLogs("haystack", "ERROR"):
+            results = self.sb.multi_search(searches)
+
+        self.assertEqual([result["hits"] for result in results], [0, 0])
+
+    def test_iter_search(self):
+        self.sb.conn = RecordedElasticsearch(
+            open_point_in_time=[{"id": "pit-1"}],
+            search=[
+                page(hit(1, [1.0, 10]), hit(2, [1.0, 11]), pit_id="pit-2"),
+                page(hit(3, [0.5, 12]), pit_id="pit-3"),
+            ],
+        )
+        chunks = list(self.sb.iter_search("*:*", chunk_size=2))
+
+        self.assertEqual(
+            [[result.pk for result in chunk] for chunk in chunks], [["1", "2"], ["3"]]
+        )
+        self.assertEqual(
+            self.sb.conn.called("open_point_in_time"),
+            [{"index": self.sb.index_name, "keep_alive": "5m"}],
+        )
+
+        first, second = self.sb.conn.called("search")
+        self.assertNotIn("index", first)
+        self.assertEqual(first["pit"]["id"], "pit-1")
+        self.assertEqual(first["sort"][-1], {"_shard_doc": {"order": "asc"}})
+        self.assertEqual(second["pit"]["id"], "pit-2")
+        self.assertEqual(second["search_after"], [1.0, 11])
+
+        # The point in time is always closed, using its latest id.
+        self.assertEqual(self.sb.conn.called("close_point_in_time"), [{"id": "pit-3"}])
+
+    def test_iter_search_error(self):
+        error = elasticsearch.ConnectionError("Connection refused")
+        self.sb.conn = RecordedElasticsearch(
+            open_point_in_time=[{"id": "pit-1"}],
+            search=[page(hit(1, [1.0, 10]), hit(2, [1.0, 11]), pit_id="pit-2"), error],
+        )
+
+        with self.assertLogs("haystack", "ERROR"):
+            chunks = list(self.sb.iter_search("*:*", chunk_size=2))
+
+        self.assertEqual(
+            [[result.pk for result in chunk] for chunk in chunks], [["1", "2"]]
+        )
+        # The point in time is still closed.
+        self.assertEqual(self.sb.conn.called("close_point_in_time"), [{"id": "pit-2"}])
+
+        # When not failing silently, the error is raised once it's closed, even
+        # if closing it fails too.
+        self.sb.silently_fail = False
+        self.sb.conn = RecordedElasticsearch(
+            open_point_in_time=[{"id": "pit-1"}],
+            search=[error],
+            close_point_in_time=[error],
+        )
+
+        with self.assertRaises(elasticsearch.ConnectionError):
+            list(self.sb.iter_search("*:*", chunk_size=2))
+
+        self.assertEqual(self.sb.conn.called("close_point_in_time"), [{"id": "pit-1"}])
+
+    def test_iter_facet(self):
+        self.sb.conn = RecordedElasticsearch(
+            search=[
+                {
+                    "aggregations": {
+                        "name": {
+                            "after_key": {"name": "b"},
+                            "buckets": [
+                                {"key": {"name": "a"}, "doc_count": 3},
+                                {"key": {"name": "b"}, "doc_count": 1},
+                            ],
+                        }
+                    }
+                },
+                {
+                    "aggregations": {
+                        "name": {
+                            "after_key": {"name": "c"},
+                            "buckets": [{"key": {"name": "c"}, "doc_count": 2}],
+                        }
+                    }
+                },
+            ]
+        )
+        self.assertEqual(
+            list(self.sb.iter_facet("*:*", "name", page_size=2)),
+            [("a", 3), ("b", 1), ("c", 2)],
+        )
+
+        first, second = self.sb.conn.called("search")
+        self.assertEqual(first["size"], 0)
+        self.assertNotIn("after", first["aggs"]["name"]["composite"])
+        composite = second["aggs"]["name"]["composite"]
+        self.assertEqual(
+            composite["sources"], [{"name": {"terms": {"field": "name_exact"}}}]
+        )
+        self.assertEqual(composite["size"], 2)
+        self.assertEqual(composite["after"], {"name": "b"})
+
+    def test_build_schema(self):
+        content_field_name, mapping = self.sb.build_schema(self.ui.all_searchfields())
+        self.assertEqual(content_field_name, "text")
+        # Index-time boosts aren't supported by Elasticsearch 8.
+        self.assertNotIn("boost", mapping["name"])
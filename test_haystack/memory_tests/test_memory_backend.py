@@ -0,0 +1,334 @@
+import os
+import threading
+from datetime import datetime
+from tempfile import mkdtemp
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from haystack import connections, indexes
+from haystack.backends import memory_backend
+from haystack.backends.memory_backend import MemorySearchBackend, QueryParser
+from haystack.query import SearchQuerySet
+from haystack.utils.loading import UnifiedIndex
+
+from ..core.models import AnotherMockModel, MockModel
+
+
+class MemoryMockSearchIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True, model_attr="foo")
+    name = indexes.CharField(model_attr="author", faceted=True)
+    pub_date = indexes.DateTimeField(model_attr="pub_date")
+
+    def get_model(self):
+        return MockModel
+
+
+class MemoryAutocompleteSearchIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True, model_attr="author")
+    name_auto = indexes.EdgeNgramField(model_attr="author")
+
+    def get_model(self):
+        return AnotherMockModel
+
+
+class MemorySearchBackendTestCase(TestCase):
+    fixtures = ["bulk_data.json"]
+
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_ui = connections["memory"].get_unified_index()
+        self.ui = UnifiedIndex()
+        self.mmsi = MemoryMockSearchIndex()
+        self.ui.build(indexes=[self.mmsi])
+        connections["memory"]._index = self.ui
+
+        self.sb = connections["memory"].get_backend()
+        self.sb.clear()
+        self.sb.update(self.mmsi, MockModel.objects.all())
+        self.sqs = SearchQuerySet("memory")
+
+    def tearDown(self):
+        self.sb.clear()
+        connections["memory"]._index = self.old_ui
+        super().tearDown()
+
+    def pks(self, results):
+        return [int(result.pk) for result in results["results"]]
+
+    def test_update(self):
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+
+        # Updating a document replaces it.
+        obj = MockModel.objects.get(pk=1)
+        obj.author = "daniel4"
+        self.sb.update(self.mmsi, [obj])
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+        self.assertEqual(self.pks(self.sb.search("name:daniel4")), [1])
+        self.assertEqual(self.sb.search("name:daniel1")["hits"], 6)
+
+    def test_remove(self):
+        self.sb.remove(MockModel.objects.get(pk=1))
+        self.assertEqual(self.sb.search("*")["hits"], 22)
+        self.assertEqual(self.sb.search("registering")["hits"], 0)
+
+        # The postings of the other documents are left alone.
+        self.assertEqual(self.pks(self.sb.search("name:daniel1"))[0], 5)
+        self.sb.remove("core.mockmodel.5")
+        self.assertEqual(self.sb.search("name:daniel1")["hits"], 5)
+
+    def test_clear(self):
+        self.sb.clear(models=[AnotherMockModel])
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+
+        self.sb.clear(models=[MockModel])
+        self.assertEqual(self.sb.search("*")["hits"], 0)
+
+        self.sb.update(self.mmsi, MockModel.objects.all())
+        self.sb.clear()
+        self.assertEqual(self.sb.search("*")["hits"], 0)
+
+    def test_search(self):
+        # No query string should always yield zero results.
+        self.assertEqual(self.sb.search(""), {"hits": 0, "results": []})
+
+        self.assertEqual(self.sb.search("searchquery")["hits"], 4)
+        self.assertEqual(self.pks(self.sb.search("searchquery")), [7, 10, 9, 11])
+        self.assertEqual(self.sb.search("SearchQuery OR SearchIndex")["hits"], 12)
+        self.assertEqual(self.pks(self.sb.search("searchquery AND -most")), [7, 9, 11])
+        self.assertEqual(self.pks(self.sb.search('"stored fields"')), [20])
+        self.assertEqual(self.pks(self.sb.search("(search* AND name:daniel2)"))[0], 8)
+        self.assertEqual(self.pks(self.sb.search("registring~1")), [1])
+
+        result = self.sb.search("registering")["results"][0]
+        self.assertEqual(result.app_label, "core")
+        self.assertEqual(result.model_name, "mockmodel")
+        self.assertEqual(result.name, "daniel1")
+        self.assertEqual(result.pub_date, datetime(2009, 6, 18, 6, 0))
+        self.assertGreater(result.score, 0)
+
+    def test_scoring(self):
+        # Rarer words count for more.
+        self.assertGreater(
+            self.sb.search("registering")["results"][0].score,
+            self.sb.search("haystack")["results"][0].score,
+        )
+
+        # So do documents matching more of the query.
+        results = self.sb.search("searchquery OR intermediary")["results"]
+        self.assertEqual(int(results[0].pk), 9)
+        self.assertGreater(results[0].score, results[1].score)
+
+    def test_pagination(self):
+        everything = self.pks(self.sb.search("*", sort_by=["pub_date"]))
+        self.assertEqual(everything[:3], [1, 3, 2])
+
+        page = self.sb.search("*", sort_by=["pub_date"], start_offset=5, end_offset=10)
+        self.assertEqual(page["hits"], 23)
+        self.assertEqual(self.pks(page), everything[5:10])
+
+        page = self.sb.search("search", start_offset=2, end_offset=4)
+        self.assertEqual(self.pks(page), self.pks(self.sb.search("search"))[2:4])
+
+    def test_sort_by(self):
+        results = self.sb.search("*", sort_by=["name", "-pub_date"])
+        self.assertEqual(self.pks(results)[:3], [18, 11, 9])
+        self.assertEqual(self.pks(results)[-1], 3)
+
+    def test_filters(self):
+        self.assertEqual(self.sb.search("name:daniel1")["hits"], 7)
+        self.assertEqual(self.sb.search("name:daniel*")["hits"], 23)
+        self.assertEqual(self.sb.search('name:("daniel1" OR "daniel3")')["hits"], 16)
+        self.assertEqual(self.sb.search("NOT name:daniel1")["hits"], 16)
+        self.assertEqual(
+            self.sb.search("pub_date:[2009-07-17T00:00:00 TO *]")["hits"], 21
+        )
+        self.assertEqual(
+            self.pks(self.sb.search("pub_date:{* TO 2009-06-18T08:00:00}")), [1]
+        )
+        self.assertEqual(
+            self.sb.search("*", narrow_queries={"name:daniel2", "haystack"})["hits"], 3
+        )
+
+        # Through the ``SearchQuerySet``.
+        self.assertEqual(self.sqs.filter(name="daniel1").count(), 7)
+        self.assertEqual(self.sqs.filter(name__in=["daniel1", "daniel2"]).count(), 14)
+        self.assertEqual(self.sqs.exclude(name="daniel3").count(), 14)
+        self.assertEqual(self.sqs.filter(name__startswith="dan").count(), 23)
+        self.assertEqual(
+            self.sqs.filter(pub_date__lt=datetime(2009, 7, 17, 2, 30)).count(), 4
+        )
+        self.assertEqual(
+            self.sqs.filter(
+                pub_date__range=[datetime(2009, 7, 17), datetime(2009, 7, 17, 3, 30)]
+            ).count(),
+            4,
+        )
+        self.assertEqual(
+            [result.pk for result in self.sqs.filter(content="searchquery")],
+            ["7", "10", "9", "11"],
+        )
+        self.assertEqual(self.sqs.auto_query('"stored fields" -foo').count(), 1)
+
+    def test_facets(self):
+        self.assertEqual(
+            self.sb.search("*", facets={"name": {}})["facets"],
+            {
+                "fields": {"name": [("daniel3", 9), ("daniel1", 7), ("daniel2", 7)]},
+                "dates": {},
+                "queries": {},
+            },
+        )
+        self.assertEqual(
+            self.sb.search("searchindex", facets={"name": {"limit": 1}})["facets"][
+                "fields"
+            ],
+            {"name": [("daniel3", 4)]},
+        )
+        self.assertEqual(
+            self.sqs.filter(name="daniel1").facet("name").facet_counts(),
+            {"fields": {"name": [("daniel1", 7)]}, "dates": {}, "queries": {}},
+        )
+
+    def test_edge_ngram(self):
+        amsi = MemoryAutocompleteSearchIndex()
+        self.ui.build(indexes=[self.mmsi, amsi])
+        self.sb.update(amsi, AnotherMockModel.objects.all())
+
+        self.assertEqual(
+            self.sqs.models(AnotherMockModel).autocomplete(name_auto="dan").count(), 2
+        )
+        self.assertEqual(
+            self.sqs.models(AnotherMockModel).autocomplete(name_auto="ann").count(), 0
+        )
+
+    def test_more_like_this(self):
+        results = self.sb.more_like_this(MockModel.objects.get(pk=11))
+        self.assertGreater(results["hits"], 0)
+        self.assertNotIn(11, self.pks(results))
+
+        results = self.sb.more_like_this(
+            MockModel.objects.get(pk=11), additional_query_string="name:daniel3"
+        )
+        self.assertEqual({result.name for result in results["results"]}, {"daniel3"})
+
+    def test_iter_facet(self):
+        self.assertEqual(
+            list(self.sb.iter_facet("*", "name", page_size=2)),
+            [("daniel3", 9), ("daniel1", 7), ("daniel2", 7)],
+        )
+
+    def test_shared_index(self):
+        # Backends for the same connection share an index.
+        backend = MemorySearchBackend("memory")
+        self.assertEqual(backend.search("*")["hits"], 23)
+
+        # But the index is only saved to & loaded from disk with a ``PATH``.
+        path = os.path.join(mkdtemp(prefix="haystack-memory-tests-"), "index")
+        saved = MemorySearchBackend("memory_saved", PATH=path)
+        saved.update(self.mmsi, MockModel.objects.all())
+        self.assertTrue(os.path.exists(path))
+
+        try:
+            del memory_backend.INDEXES["memory_saved"]
+            loaded = MemorySearchBackend("memory_saved", PATH=path)
+            self.assertEqual(
+                loaded.search("name:daniel1", models=[MockModel])["hits"], 7
+            )
+            # Dates are loaded back as dates, not the strings they're saved as.
+            self.assertEqual(
+                loaded.search(
+                    "pub_date:{* TO 2009-06-18T08:00:00}", models=[MockModel]
+                )["hits"],
+                1,
+            )
+
+            # Changes on disk are picked up.
+            saved.remove("core.mockmodel.1")
+            self.assertEqual(
+                loaded.search("name:daniel1", models=[MockModel])["hits"], 6
+            )
+        finally:
+            memory_backend.INDEXES.pop("memory_saved", None)
+
+    def test_concurrent_writers(self):
+        # Writers in other processes (a connection each, here) take turns, so
+        # neither overwrites what the other saved.
+        path = os.path.join(mkdtemp(prefix="haystack-memory-tests-"), "index")
+        first = MemorySearchBackend("memory_first", PATH=path)
+        second = MemorySearchBackend("memory_second", PATH=path)
+        objects = list(MockModel.objects.all()[:2])
+        writer = threading.Thread(target=second.update, args=(self.mmsi, objects[1:]))
+        first.ensure_setup()
+        add = first.index.add
+        blocked = []
+
+        def add_while_writing(*args):
+            # Start the second writer part-way through the first.
+            writer.start()
+            writer.join(0.2)
+            blocked.append(writer.is_alive())
+            return add(*args)
+
+        try:
+            with patch.object(first.index, "add", side_effect=add_while_writing):
+                first.update(self.mmsi, objects[:1])
+
+            writer.join()
+            self.assertEqual(blocked, [True])
+            loaded = MemorySearchBackend("memory_loaded", PATH=path)
+            self.assertEqual(loaded.search("*", models=[MockModel])["hits"], 2)
+        finally:
+            for alias in ("memory_first", "memory_second", "memory_loaded"):
+                memory_backend.INDEXES.pop(alias, None)
+
+
+class QueryParserTestCase(TestCase):
+    def test_parse(self):
+        self.assertEqual(QueryParser("hello").parse(), ("term", None, "hello"))
+        self.assertEqual(QueryParser("*").parse(), ("all",))
+        self.assertEqual(
+            QueryParser("(hello AND world)").parse(),
+            ("and", [("term", None, "hello"), ("term", None, "world")]),
+        )
+        self.assertEqual(
+            QueryParser('name:("a b" OR c*) -d').parse(),
+            (
+                "and",
+                [
+                    (
+                        "or",
+                        [
+                            ("phrase", "name", "a b"),
+                            ("wildcard", "name", [("c", False), ("*", False)]),
+                        ],
+                    ),
+                    ("not", ("term", None, "d")),
+                ],
+            ),
+        )
+        self.assertEqual(
+            QueryParser("pub_date:{* TO 2009-07-17T00:00:00]").parse(),
+            ("range", "pub_date", None, "2009-07-17T00:00:00", False, True),
+        )
+        self.assertEqual(
+            QueryParser(r"foo\:bar~1 baz^2").parse(),
+            (
+                "and",
+                [
+                    ("fuzzy", None, "foo:bar", 1),
+                    ("boost", ("term", None, "baz"), 2.0),
+                ],
+            ),
+        )
+
+    def test_parse_malformed(self):
+        self.assertEqual(QueryParser("").parse(), None)
+        self.assertEqual(QueryParser("((hello").parse(), ("term", None, "hello"))
+        self.assertEqual(
+            QueryParser("hello) world]").parse(),
+            ("and", [("term", None, "hello"), ("term", None, "world")]),
+        )
+        self.assertEqual(QueryParser("AND OR NOT").parse(), None)
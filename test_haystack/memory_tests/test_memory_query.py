@@ -0,0 +1,65 @@
+import datetime
+
+from django.test import TestCase
+
+from haystack import connections
+from haystack.inputs import AutoQuery, Exact
+from haystack.query import SQ
+
+
+class MemorySearchQueryTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.sq = connections["memory"].get_query()
+
+    def test_build_query_all(self):
+        self.assertEqual(self.sq.build_query(), "*")
+
+    def test_build_query_single_word(self):
+        self.sq.add_filter(SQ(content="hello"))
+        self.assertEqual(self.sq.build_query(), "(hello)")
+
+    def test_build_query_multiple_words_and(self):
+        self.sq.add_filter(SQ(content="hello world"))
+        self.assertEqual(self.sq.build_query(), "(hello AND world)")
+
+    def test_build_query_not(self):
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(~SQ(title="foo"))
+        self.assertEqual(self.sq.build_query(), "((why) AND NOT (title:(foo)))")
+
+    def test_build_query_reserved_characters(self):
+        self.sq.add_filter(SQ(content="hello:world"))
+        self.assertEqual(self.sq.build_query(), r"(hello\:world)")
+
+    def test_build_query_multiple_filter_types(self):
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(SQ(pub_date__lte=datetime.datetime(2009, 2, 10, 1, 59)))
+        self.sq.add_filter(SQ(title__gte="B"))
+        self.sq.add_filter(SQ(id__in=[1, 2, 3]))
+        self.sq.add_filter(SQ(rating__range=[3, 5]))
+        self.assertEqual(
+            self.sq.build_query(),
+            '((why) AND pub_date:([* TO "2009-02-10T01:59:00"]) AND title:(["B" TO *])'
+            ' AND id:("1" OR "2" OR "3") AND rating:(["3" TO "5"]))',
+        )
+
+    def test_build_query_wildcard_filter_types(self):
+        self.sq.add_filter(SQ(title__startswith="haystack"))
+        self.sq.add_filter(SQ(title__contains="stack"))
+        self.sq.add_filter(SQ(title__fuzzy="stak"))
+        self.assertEqual(
+            self.sq.build_query(),
+            "(title:(haystack*) AND title:(*stack*) AND title:(stak~))",
+        )
+
+    def test_build_query_exact(self):
+        self.sq.add_filter(SQ(title__exact='Foo "bar"'))
+        self.sq.add_filter(SQ(content=Exact("pants:rule")))
+        self.assertEqual(
+            self.sq.build_query(), '(title:("Foo \\"bar\\"") AND ("pants:rule"))'
+        )
+
+    def test_build_query_auto_query(self):
+        self.sq.add_filter(SQ(content=AutoQuery('"stored fields" -foo')))
+        self.assertEqual(self.sq.build_query(), '("stored fields" NOT foo)')
@@ -1,6 +1,12 @@
 from django.apps import apps
 
-from haystack.backends import BaseEngine, BaseSearchBackend, BaseSearchQuery, log_query
+from haystack.backends import (
+    BaseEngine,
+    BaseSearchBackend,
+    BaseSearchQuery,
+    invalidates_query_cache,
+    log_query,
+)
 from haystack.models import SearchResult
 from haystack.routers import BaseRouter
 from haystack.utils import get_identifier
@@ -48,17 +54,20 @@ MOCK_INDEX_DATA = {}
 class MockSearchBackend(BaseSearchBackend):
     model_name = "mockmodel"
 
+    @invalidates_query_cache
     def update(self, index, iterable, commit=True):
         global MOCK_INDEX_DATA
         for obj in iterable:
             doc = index.full_prepare(obj)
             MOCK_INDEX_DATA[doc["id"]] = doc
 
+    @invalidates_query_cache
     def remove(self, obj, commit=True):
         global MOCK_INDEX_DATA
         if commit:
             del MOCK_INDEX_DATA[get_identifier(obj)]
 
+    @invalidates_query_cache
     def clear(self, models=None, commit=True):
         global MOCK_INDEX_DATA
         MOCK_INDEX_DATA = {}
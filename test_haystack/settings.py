@@ -75,6 +75,11 @@ HAYSTACK_CONNECTIONS = {
         "INCLUDE_SPELLING": True,
     },
     "simple": {"ENGINE": "haystack.backends.simple_backend.SimpleEngine"},
+    "memory": {"ENGINE": "haystack.backends.memory_backend.MemoryEngine"},
+    "sqlite_fts": {
+        "ENGINE": "haystack.backends.sqlite_fts_backend.SQLiteFTSEngine",
+        "PATH": os.path.join(mkdtemp(prefix="haystack-sqlite-fts-tests-"), "index.db"),
+    },
     "solr": {
         "ENGINE": "haystack.backends.solr_backend.SolrEngine",
         "URL": os.environ.get(
@@ -109,5 +114,11 @@ if "elasticsearch" in HAYSTACK_CONNECTIONS:
                     "ENGINE": "haystack.backends.elasticsearch7_backend.Elasticsearch7SearchEngine"
                 }
             )
+        elif (8,) <= elasticsearch.__version__ <= (9,):
+            HAYSTACK_CONNECTIONS["elasticsearch"].update(
+                {
+                    "ENGINE": "haystack.backends.elasticsearch8_backend.Elasticsearch8SearchEngine"
+                }
+            )
     except ImportError:
         del HAYSTACK_CONNECTIONS["elasticsearch"]
@@ -1,9 +1,11 @@
 import datetime
+from unittest.mock import patch
 
+import pysolr
 from django.test import TestCase
 
 from haystack import connections
-from haystack.inputs import AltParser, Exact
+from haystack.inputs import AltParser, AutoQuery, Exact, Raw
 from haystack.models import SearchResult
 from haystack.query import SQ, SearchQuerySet
 
@@ -223,3 +225,126 @@ class SolrSearchQueryTestCase(TestCase):
         """Confirm that an empty list avoids a Solr exception"""
         sqs = SearchQuerySet(using="solr").filter(id__in=[])
         self.assertEqual(sqs.query.build_query(), "id:(!*:*)")
+
+    def test_build_search_kwargs_only_defer(self):
+        backend = connections["solr"].get_backend()
+        search_kwargs = backend.build_search_kwargs("*:*")
+        self.assertEqual(search_kwargs["fl"], "* score")
+
+        search_kwargs = backend.build_search_kwargs("*:*", only_fields={"name"})
+        self.assertEqual(search_kwargs["fl"], "django_ct django_id id name score")
+
+        search_kwargs = backend.build_search_kwargs("*:*", deferred_fields={"text"})
+        field_list = search_kwargs["fl"].split()
+        self.assertFalse("text" in field_list)
+        self.assertTrue("django_ct" in field_list)
+        self.assertEqual(field_list[-1], "score")
+
+    def test_filter_queries(self):
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(SQ(title="moof"))
+        self.sq.add_filter(SQ(author__exact="daniel"))
+        self.sq.add_filter(SQ(rating=4) | SQ(rating__gt=8))
+        self.sq.add_filter(~SQ(id__in=[1, 2]))
+        self.sq.add_narrow_query("site:(1)")
+
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(query_string, "((why) AND title:(moof))")
+        self.assertEqual(
+            search_kwargs["narrow_queries"],
+            {
+                "site:(1)",
+                'author:("daniel")',
+                'NOT (id:("1" OR "2"))',
+                '(rating:(4) OR rating:({"8" TO *}))',
+            },
+        )
+        self.assertEqual(self.sq.narrow_queries, {"site:(1)"})
+
+        # The full query string is still there for display.
+        self.assertIn('author:("daniel")', self.sq.build_query())
+
+        # Anything OR-ed with a scored lookup stays in the query.
+        self.sq.add_filter(SQ(author__exact="john"), use_or=True)
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertIn('author:("john")', query_string)
+        self.assertEqual(search_kwargs["narrow_queries"], {"site:(1)"})
+
+    def test_filter_queries_input_types(self):
+        # ``InputType`` values may add to the score, so they stay in the query.
+        self.sq.add_filter(SQ(title=AutoQuery("moof -baz")))
+        self.sq.add_filter(SQ(author__exact=Raw("daniel*")))
+        self.sq.add_filter(SQ(rating=4))
+
+        query_string, search_kwargs = self.sq._run_params()
+        self.assertEqual(query_string, "(title:(moof NOT baz) AND author:daniel*)")
+        self.assertEqual(search_kwargs["narrow_queries"], {"rating:(4)"})
+
+    def test_filter_queries_local_params(self):
+        backend = connections["solr"].get_backend()
+        old_local_params = backend.fq_local_params
+        backend.fq_local_params = {"pub_date": "cache=false cost=200"}
+
+        try:
+            self.sq.add_filter(SQ(content="why"))
+            self.sq.add_filter(SQ(pub_date__gte=datetime.date(2009, 2, 10)))
+            self.sq.add_filter(SQ(author__exact="daniel"))
+
+            query_string, search_kwargs = self.sq._run_params()
+        finally:
+            backend.fq_local_params = old_local_params
+
+        self.assertEqual(query_string, "(why)")
+        self.assertEqual(
+            search_kwargs["narrow_queries"],
+            {
+                '{!cache=false cost=200}pub_date:(["2009-02-10T00:00:00Z" TO *])',
+                'author:("daniel")',
+            },
+        )
+
+    def test_iter_results_filter_queries(self):
+        backend = connections["solr"].get_backend()
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(SQ(author__exact="daniel"))
+
+        with patch.object(backend, "iter_search", return_value=iter([])) as search:
+            self.assertEqual(list(self.sq.iter_results(chunk_size=10)), [])
+
+        query_string, kwargs = search.call_args[0][0], search.call_args[1]
+        self.assertEqual(query_string, "(why)")
+        self.assertEqual(kwargs["narrow_queries"], {'author:("daniel")'})
+        self.assertEqual(kwargs["chunk_size"], 10)
+
+    def test_facet_iterator(self):
+        backend = connections["solr"].get_backend()
+        pages = [
+            pysolr.Results(
+                {
+                    "response": {"docs": [], "numFound": 6},
+                    "facet_counts": {"facet_fields": {"author": ["a", 3, "b", 1]}},
+                }
+            ),
+            pysolr.Results(
+                {
+                    "response": {"docs": [], "numFound": 6},
+                    "facet_counts": {"facet_fields": {"author": ["c", 2]}},
+                }
+            ),
+        ]
+        sqs = SearchQuerySet(using="solr").filter(content="why").facet("author")
+
+        with patch.object(backend.conn, "search", side_effect=pages) as search:
+            self.assertEqual(
+                list(sqs.facet_iterator("author", page_size=2)),
+                [("a", 3), ("b", 1), ("c", 2)],
+            )
+
+        self.assertEqual(search.call_count, 2)
+        query_string, kwargs = search.call_args[0][0], search.call_args[1]
+        self.assertEqual(query_string, "(why)")
+        self.assertEqual(kwargs["rows"], 0)
+        self.assertEqual(kwargs["facet.field"], ["author"])
+        self.assertEqual(kwargs["facet.limit"], 2)
+        self.assertEqual(kwargs["facet.offset"], 2)
+        self.assertEqual(kwargs["facet.sort"], "index")
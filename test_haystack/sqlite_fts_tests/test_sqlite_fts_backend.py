@@ -0,0 +1,296 @@
+import sqlite3
+from datetime import datetime
+
+from django.test import TestCase
+
+from haystack import connections, indexes
+from haystack.exceptions import SearchBackendError
+from haystack.forms import FacetedModelSearchForm
+from haystack.inputs import Raw
+from haystack.query import SearchQuerySet
+from haystack.utils.loading import UnifiedIndex
+
+from ..core.models import AnotherMockModel, MockModel
+
+
+class SQLiteFTSMockSearchIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True, model_attr="foo")
+    name = indexes.CharField(model_attr="author", faceted=True)
+    pub_date = indexes.DateTimeField(model_attr="pub_date")
+    tags = indexes.MultiValueField()
+
+    def get_model(self):
+        return MockModel
+
+    def prepare_tags(self, obj):
+        return ["even" if obj.pk % 2 == 0 else "odd", "all"]
+
+
+class SQLiteFTSAutocompleteSearchIndex(indexes.SearchIndex, indexes.Indexable):
+    text = indexes.CharField(document=True, model_attr="author")
+    name_auto = indexes.EdgeNgramField(model_attr="author")
+
+    def get_model(self):
+        return AnotherMockModel
+
+
+class SQLiteFTSSearchBackendTestCase(TestCase):
+    fixtures = ["bulk_data.json"]
+
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_ui = connections["sqlite_fts"].get_unified_index()
+        self.ui = UnifiedIndex()
+        self.smmi = SQLiteFTSMockSearchIndex()
+        self.samsi = SQLiteFTSAutocompleteSearchIndex()
+        self.ui.build(indexes=[self.smmi, self.samsi])
+        connections["sqlite_fts"]._index = self.ui
+
+        self.sb = connections["sqlite_fts"].get_backend()
+        self.sb.setup_complete = False
+        self.sb.silently_fail = False
+        self.sb.clear()
+        self.sb.update(self.smmi, MockModel.objects.all())
+        self.sqs = SearchQuerySet("sqlite_fts")
+
+    def tearDown(self):
+        self.sb.clear()
+        self.sb.setup_complete = False
+        self.sb.silently_fail = True
+        connections["sqlite_fts"]._index = self.old_ui
+        super().tearDown()
+
+    def pks(self, results):
+        return [int(result.pk) for result in results["results"]]
+
+    def test_update(self):
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+
+        # Updating a document replaces it.
+        obj = MockModel.objects.get(pk=1)
+        obj.author = "daniel4"
+        self.sb.update(self.smmi, [obj])
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+        self.assertEqual(
+            [result.pk for result in self.sqs.filter(name="daniel4")], ["1"]
+        )
+        self.assertEqual(self.sqs.filter(name_exact="daniel1").count(), 6)
+
+    def test_remove(self):
+        # Words are stemmed, so this matches "register" too.
+        self.assertEqual(self.sqs.filter(content="registering").count(), 4)
+
+        self.sb.remove(MockModel.objects.get(pk=1))
+        self.assertEqual(self.sb.search("*")["hits"], 22)
+        self.assertEqual(self.sqs.filter(content="registering").count(), 3)
+
+        self.sb.remove("core.mockmodel.5")
+        self.assertEqual(self.sqs.filter(name_exact="daniel1").count(), 5)
+
+    def test_clear(self):
+        self.sb.clear(models=[AnotherMockModel])
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+
+        self.sb.clear(models=[MockModel])
+        self.assertEqual(self.sb.search("*")["hits"], 0)
+
+        self.sb.update(self.smmi, MockModel.objects.all())
+        self.sb.clear()
+        self.assertEqual(self.sb.search("*")["hits"], 0)
+
+    def test_setup(self):
+        # The tables are left alone while the fields stay the same...
+        self.sb.setup()
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+
+        # ...& when they change, until they're cleared.
+        self.ui.build(indexes=[self.samsi])
+
+        with self.assertLogs("haystack", "WARNING"):
+            self.sb.setup()
+
+        count = self.sb.conn.execute('SELECT COUNT(*) FROM "haystack_documents"')
+        self.assertEqual(count.fetchone()[0], 23)
+        self.assertNotIn("pub_date", self.sb.columns)
+
+        self.sb.clear()
+        self.assertEqual(self.sb.search("*")["hits"], 0)
+        self.sb.update(self.samsi, AnotherMockModel.objects.all())
+        self.assertEqual(self.sb.search("*")["hits"], 2)
+
+    def test_reset_sessions(self):
+        conn = self.sb.conn
+        connections["sqlite_fts"].reset_sessions()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+        # The backend in use carries on with a new connection.
+        self.assertIsNot(self.sb.conn, conn)
+        self.assertEqual(self.sb.search("*")["hits"], 23)
+
+    def test_search(self):
+        # No query string should always yield zero results.
+        self.assertEqual(self.sb.search(""), {"hits": 0, "results": []})
+
+        self.assertEqual(
+            [result.pk for result in self.sqs.filter(content="searchquery")],
+            ["7", "10", "9", "11"],
+        )
+        self.assertEqual(self.sqs.filter(content="stored fields").count(), 3)
+        self.assertEqual(self.sqs.filter(content__exact="stored fields").count(), 1)
+        self.assertEqual(self.sqs.auto_query('"stored fields" -foo').count(), 1)
+        self.assertEqual(self.sqs.auto_query("-searchquery").count(), 19)
+        self.assertEqual(
+            self.sqs.filter(content="searchquery").exclude(content="most").count(), 3
+        )
+
+        result = self.sqs.filter(content="registering models")[0]
+        self.assertEqual(result.app_label, "core")
+        self.assertEqual(result.model_name, "mockmodel")
+        self.assertEqual(result.pk, "1")
+        self.assertEqual(result.name, "daniel1")
+        self.assertEqual(result.pub_date, datetime(2009, 6, 18, 6, 0))
+        self.assertEqual(result.tags, ["odd", "all"])
+        self.assertGreater(result.score, 0)
+
+    def test_pagination(self):
+        everything = [result.pk for result in self.sqs.order_by("pub_date")]
+        self.assertEqual(everything[:3], ["1", "3", "2"])
+
+        page = self.sb.search("*", sort_by=["pub_date"], start_offset=5, end_offset=10)
+        self.assertEqual(page["hits"], 23)
+        self.assertEqual([result.pk for result in page["results"]], everything[5:10])
+
+        self.assertEqual(
+            [result.pk for result in self.sqs.order_by("name", "-pub_date")[:3]],
+            ["18", "11", "9"],
+        )
+
+        # Unknown fields aren't quietly sorted by as a constant.
+        with self.assertRaises(SearchBackendError):
+            self.sb.search("*", sort_by=["-pub_dat"])
+
+    def test_filters(self):
+        self.assertEqual(self.sqs.filter(name="daniel1").count(), 7)
+        self.assertEqual(self.sqs.filter(name_exact="daniel1").count(), 7)
+        self.assertEqual(self.sqs.filter(name__in=["daniel1", "daniel2"]).count(), 14)
+        self.assertEqual(self.sqs.exclude(name="daniel3").count(), 14)
+        self.assertEqual(self.sqs.filter(name__startswith="dan").count(), 23)
+        self.assertEqual(self.sqs.filter(text__contains="SearchQ").count(), 5)
+        self.assertEqual(self.sqs.filter(tags="even").count(), 11)
+        self.assertEqual(self.sqs.filter(tags__in=["even", "odd"]).count(), 23)
+        self.assertEqual(
+            self.sqs.filter(pub_date__lt=datetime(2009, 7, 17, 2, 30)).count(), 4
+        )
+        self.assertEqual(
+            self.sqs.filter(
+                pub_date__range=[datetime(2009, 7, 17), datetime(2009, 7, 17, 3, 30)]
+            ).count(),
+            4,
+        )
+        self.assertEqual(
+            self.sqs.filter(content="haystack").narrow('name_exact:"daniel2"').count(),
+            3,
+        )
+        self.assertEqual(self.sqs.narrow("name_exact:daniel2").count(), 7)
+
+        # Other narrow queries aren't run as SQL.
+        with self.assertRaises(SearchBackendError):
+            self.sqs.narrow("\"name_exact\" != 'daniel2'").count()
+
+        self.assertEqual(
+            self.sqs.filter(name_exact=Raw("daniel2' OR '1' = '1")).count(), 0
+        )
+
+    def test_hostile_selected_facets(self):
+        self.sb.silently_fail = True
+        form = FacetedModelSearchForm(
+            {"q": "zzzznomatch", "selected_facets": "0) OR (1=1"},
+            searchqueryset=self.sqs,
+        )
+        self.assertTrue(form.is_valid())
+
+        with self.assertLogs("haystack", "ERROR"):
+            self.assertEqual(form.search().count(), 0)
+
+        # Nor can a quoted value break out of its quotes.
+        form = FacetedModelSearchForm(
+            {"q": "zzzznomatch", "selected_facets": 'name_exact:"x\') OR (1=1"'},
+            searchqueryset=self.sqs,
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.search().count(), 0)
+
+    def test_facets(self):
+        self.assertEqual(
+            self.sqs.facet("name").facet_counts()["fields"],
+            {"name": [("daniel3", 9), ("daniel1", 7), ("daniel2", 7)]},
+        )
+        self.assertEqual(
+            self.sqs.filter(content="searchindex")
+            .facet("name", limit=1)
+            .facet_counts()["fields"],
+            {"name": [("daniel3", 4)]},
+        )
+        self.assertEqual(
+            self.sqs.facet("tags").facet_counts()["fields"],
+            {"tags": [("all", 23), ("odd", 12), ("even", 11)]},
+        )
+        self.assertEqual(
+            self.sqs.date_facet(
+                "pub_date", datetime(2009, 6, 1), datetime(2009, 8, 1), "month"
+            ).facet_counts()["dates"],
+            {
+                "pub_date": [
+                    (datetime(2009, 6, 1), 2),
+                    (datetime(2009, 7, 1), 21),
+                ]
+            },
+        )
+
+    def test_boost(self):
+        results = self.sqs.filter(content="searchquery")
+        self.assertEqual(results[0].pk, "7")
+
+        boosted = results.boost("daniel3", 2)
+        self.assertEqual(boosted[0].pk, "10")
+        self.assertAlmostEqual(boosted[0].score, results[1].score * 2)
+
+    def test_highlight(self):
+        self.assertEqual(
+            self.sqs.filter(content="indexes")
+            .highlight()[0]
+            .highlighted["text"][0][:40],
+            "Registering <em>indexes</em> in Haystack",
+        )
+
+    def test_autocomplete(self):
+        self.sb.update(self.samsi, AnotherMockModel.objects.all())
+        self.assertEqual(
+            self.sqs.models(AnotherMockModel).autocomplete(name_auto="dan").count(), 2
+        )
+        self.assertEqual(
+            self.sqs.models(AnotherMockModel).autocomplete(name_auto="ann").count(), 0
+        )
+
+    def test_more_like_this(self):
+        results = self.sb.more_like_this(MockModel.objects.get(pk=11))
+        self.assertGreater(results["hits"], 0)
+        self.assertNotIn(11, self.pks(results))
+
+        results = self.sb.more_like_this(
+            MockModel.objects.get(pk=11),
+            additional_query_string=self.sqs.filter(name="daniel3").query.build_query(),
+        )
+        self.assertEqual({result.name for result in results["results"]}, {"daniel3"})
+
+    def test_silently_fail(self):
+        self.sb.silently_fail = True
+
+        with self.assertLogs("haystack", "ERROR"):
+            self.assertEqual(
+                self.sb.search("no_such_column = 1"), {"results": [], "hits": 0}
+            )
@@ -0,0 +1,120 @@
+import datetime
+
+from django.test import TestCase
+
+from haystack import connections
+from haystack.inputs import AutoQuery, Exact, Raw
+from haystack.query import SQ
+from haystack.utils.loading import UnifiedIndex
+
+from .test_sqlite_fts_backend import SQLiteFTSMockSearchIndex
+
+
+class SQLiteFTSSearchQueryTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_ui = connections["sqlite_fts"].get_unified_index()
+        self.ui = UnifiedIndex()
+        self.ui.build(indexes=[SQLiteFTSMockSearchIndex()])
+        connections["sqlite_fts"]._index = self.ui
+        connections["sqlite_fts"].get_backend().columns = None
+
+        self.sq = connections["sqlite_fts"].get_query()
+
+    def tearDown(self):
+        connections["sqlite_fts"]._index = self.old_ui
+        connections["sqlite_fts"].get_backend().columns = None
+        super().tearDown()
+
+    def match(self, expression):
+        return (
+            '("haystack_documents".rowid IN (SELECT rowid FROM "haystack_fts" '
+            "WHERE \"haystack_fts\" MATCH '%s'))" % expression.replace("'", "''")
+        )
+
+    def test_build_query_all(self):
+        self.assertEqual(self.sq.build_query(), "*")
+
+    def test_build_query_single_word(self):
+        self.sq.add_filter(SQ(content="hello"))
+        self.assertEqual(self.sq.build_query(), self.match('"text" : ("hello")'))
+
+    def test_build_query_multiple_words(self):
+        self.sq.add_filter(SQ(content="hello world's"))
+        self.assertEqual(
+            self.sq.build_query(), self.match('"text" : ("hello" AND "world\'s")')
+        )
+
+    def test_build_query_not(self):
+        self.sq.add_filter(SQ(content="why"))
+        self.sq.add_filter(~SQ(name_exact="foo"))
+        self.assertEqual(
+            self.sq.build_query(),
+            "(%s AND NOT ((\"name_exact\" = 'foo')))" % self.match('"text" : ("why")'),
+        )
+
+    def test_build_query_exact(self):
+        self.sq.add_filter(SQ(content=Exact('a "quoted" phrase')))
+        self.assertEqual(
+            self.sq.build_query(), self.match('"text" : ("a ""quoted"" phrase")')
+        )
+
+    def test_build_query_auto_query(self):
+        self.sq.add_filter(SQ(content=AutoQuery('"stored fields" -foo bar')))
+        self.assertEqual(
+            self.sq.build_query(),
+            self.match('"text" : (("stored fields" AND "bar") NOT ("foo"))'),
+        )
+
+    def test_build_query_auto_query_value(self):
+        # Quotes that don't make up a phrase are compared as they are.
+        self.sq.add_filter(SQ(name_exact=AutoQuery('"daniel d"')))
+        self.sq.add_filter(SQ(name_exact=AutoQuery('"x')))
+        self.assertEqual(
+            self.sq.build_query(),
+            '(("name_exact" = \'daniel d\') AND ("name_exact" = \'"x\'))',
+        )
+
+    def test_build_query_raw(self):
+        self.sq.add_filter(SQ(content=Raw("hello NEAR world")))
+        self.assertEqual(
+            self.sq.build_query(), self.match('"text" : (hello NEAR world)')
+        )
+
+    def test_build_query_raw_value(self):
+        # Only text fields take their raw values as queries.
+        self.sq.add_filter(SQ(name_exact=Raw("0) OR (1=1")))
+        self.assertEqual(self.sq.build_query(), "(\"name_exact\" = '0) OR (1=1')")
+
+    def test_build_query_value_filters(self):
+        self.sq.add_filter(SQ(pub_date__lte=datetime.datetime(2009, 2, 10, 1, 59)))
+        self.sq.add_filter(SQ(name_exact__in=["a", "b"]))
+        self.sq.add_filter(SQ(name_exact__startswith="10%_"))
+        self.sq.add_filter(SQ(tags="even"))
+        self.assertEqual(
+            self.sq.build_query(),
+            "((\"pub_date\" <= '2009-02-10T01:59:00')"
+            " AND (\"name_exact\" IN ('a', 'b'))"
+            " AND (\"name_exact\" LIKE '10\\%\\_%' ESCAPE '\\')"
+            ' AND EXISTS (SELECT 1 FROM json_each("haystack_documents"."tags")'
+            " AS multivalued WHERE multivalued.value = 'even'))",
+        )
+
+    def test_build_query_text_filters(self):
+        self.sq.add_filter(SQ(name__startswith="dan"))
+        self.sq.add_filter(SQ(name__in=["daniel1", "daniel 2"]))
+        self.assertEqual(
+            self.sq.build_query(),
+            "(%s AND %s)"
+            % (
+                self.match('"name" : ("dan"*)'),
+                self.match('"name" : ("daniel1" OR "daniel 2")'),
+            ),
+        )
+
+    def test_build_query_boost(self):
+        self.sq.add_filter(SQ(content="hello"))
+        self.sq.add_boost("world", 5)
+        self.assertEqual(self.sq.build_query(), self.match('"text" : ("hello")'))
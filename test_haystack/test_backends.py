@@ -1,8 +1,10 @@
 import warnings
 
+from asgiref.sync import async_to_sync
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
 
+from haystack.backends import BaseSearchBackend
 from haystack.utils import loading
 
 
@@ -73,3 +75,33 @@ class LoadBackendTestCase(TestCase):
                 str(e),
                 "The Python module 'haystack.backends.simple_backend' has no 'FooEngine' class.",
             )
+
+
+class AsyncClient:
+    closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class AsyncClientSearchBackend(BaseSearchBackend):
+    def build_async_conn(self):
+        return AsyncClient()
+
+
+class AsyncConnTestCase(TestCase):
+    def test_get_async_conn(self):
+        backend = AsyncClientSearchBackend("default")
+
+        async def get_async_conns():
+            return backend.get_async_conn(), backend.get_async_conn()
+
+        # One client per event loop...
+        first, again = async_to_sync(get_async_conns)()
+        self.assertIs(first, again)
+
+        # ...which is closed along with the loop.
+        self.assertTrue(first.closed)
+        second, _ = async_to_sync(get_async_conns)()
+        self.assertIsNot(second, first)
+        self.assertTrue(second.closed)
@@ -1,10 +1,13 @@
+import threading
 import unittest
+from unittest.mock import patch
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase, override_settings
 
 from haystack import indexes
+from haystack.backends.simple_backend import SimpleEngine, SimpleSearchBackend
 from haystack.exceptions import NotHandled, SearchFieldError
 from haystack.utils import loading
 from test_haystack.core.models import AnotherMockModel, MockModel
@@ -15,6 +18,18 @@ except ImportError:
     pysolr = False
 
 
+class ThreadUnsafeEngine(SimpleEngine):
+    thread_safe = False
+
+
+def in_thread(func):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(func()))
+    thread.start()
+    thread.join()
+    return results[0]
+
+
 class ConnectionHandlerTestCase(TestCase):
     def test_init(self):
         ch = loading.ConnectionHandler({})
@@ -89,6 +104,84 @@ class ConnectionHandlerTestCase(TestCase):
         self.assertEqual(str(klass_2), "haystack.utils.loading.UnifiedIndex")
         self.assertEqual(address_2, address)
 
+    def test_get_unified_index_threads(self):
+        ch = loading.ConnectionHandler(
+            {"default": {"ENGINE": "haystack.backends.simple_backend.SimpleEngine"}}
+        )
+        ui = in_thread(lambda: ch["default"].get_unified_index())
+
+        # Every thread shares the same unified index.
+        self.assertIs(ch["default"].get_unified_index(), ui)
+
+    def test_get_unified_index_per_handler(self):
+        connections_info = {
+            "default": {"ENGINE": "test_haystack.test_loading.ThreadUnsafeEngine"}
+        }
+        ch = loading.ConnectionHandler(connections_info)
+        ui = ch["default"].get_unified_index()
+
+        # Engines made in other threads share it, even when they aren't shared.
+        self.assertIs(in_thread(lambda: ch["default"].get_unified_index()), ui)
+
+        # Other handlers don't...
+        other = loading.ConnectionHandler(connections_info)
+        self.assertIsNot(other["default"].get_unified_index(), ui)
+
+        # ...& reloading the connection builds a fresh one.
+        self.assertIsNot(ch.reload("default").get_unified_index(), ui)
+
+    def test_get_item_threads(self):
+        ch = loading.ConnectionHandler(
+            {
+                "default": {"ENGINE": "haystack.backends.simple_backend.SimpleEngine"},
+                "unsafe": {"ENGINE": "test_haystack.test_loading.ThreadUnsafeEngine"},
+                "mock": {"ENGINE": "test_haystack.mocks.MockEngine"},
+            }
+        )
+        engine = ch["default"]
+        engine.queries.append("query")
+
+        # The engine & its backend are shared, but not the query log.
+        self.assertIs(in_thread(lambda: ch["default"]), engine)
+        backend = in_thread(lambda: ch["default"].get_backend())
+        self.assertIs(backend, engine.get_backend())
+        self.assertEqual(in_thread(lambda: ch["default"].queries), [])
+        self.assertEqual(engine.queries, ["query"])
+
+        # Engines that aren't thread safe get one per thread, as do those that
+        # don't say either way.
+        self.assertIsNot(in_thread(lambda: ch["unsafe"]), ch["unsafe"])
+        self.assertIs(ch["unsafe"], ch["unsafe"])
+        self.assertIsNot(in_thread(lambda: ch["mock"]), ch["mock"])
+
+    def test_ensure_setup(self):
+        backend = SimpleSearchBackend("default")
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def setup():
+            calls.append(threading.current_thread())
+            started.set()
+            release.wait(5)
+            backend.setup_complete = True
+
+        backend.setup = setup
+        thread = threading.Thread(target=backend.ensure_setup)
+        thread.start()
+        started.wait(5)
+
+        # The other thread waits for the first to finish, rather than setting
+        # the backend up again.
+        waiting = threading.Thread(target=backend.ensure_setup)
+        waiting.start()
+        release.set()
+        thread.join()
+        waiting.join()
+
+        backend.ensure_setup()
+        self.assertEqual(calls, [thread])
+
 
 class ConnectionRouterTestCase(TestCase):
     @override_settings()
@@ -275,6 +368,24 @@ class UnifiedIndexTestCase(TestCase):
             isinstance(self.ui.get_index(MockModel), indexes.BasicSearchIndex)
         )
 
+    def test_lazy_build(self):
+        ui = loading.UnifiedIndex()
+        index = ValidSearchIndex()
+
+        with patch.object(ui, "collect_indexes", return_value=[index]) as collect:
+            # Finding the index for a model doesn't need the unified fields.
+            self.assertEqual(ui.get_index(MockModel), index)
+            self.assertEqual(ui.fields, {})
+            self.assertIn("indexes", ui.timings)
+
+            self.assertEqual(ui.get_index_fieldname("author"), "name")
+            self.assertEqual(len(ui.fields), 3)
+            self.assertIn("fields", ui.timings)
+            self.assertEqual(collect.call_count, 1)
+
+        # Fields only used by one index aren't copied.
+        self.assertIs(ui.fields["name"], index.fields["author"])
+
     def test_get_indexed_models(self):
         self.assertEqual(self.ui.get_indexed_models(), [])
 
@@ -10,7 +10,7 @@ from haystack.utils.loading import UnifiedIndex
 from test_haystack.core.models import MockModel
 
 from .mocks import MockSearchResult
-from .test_indexes import ReadQuerySetTestSearchIndex
+from .test_indexes import GoodMockSearchIndex, ReadQuerySetTestSearchIndex
 
 
 class CaptureHandler(std_logging.Handler):
@@ -194,6 +194,39 @@ class SearchResultTestCase(TestCase):
         # Restore.
         connections["default"]._index = old_unified_index
 
+    def test_page_objects(self):
+        # Stow.
+        old_unified_index = connections["default"]._index
+        ui = UnifiedIndex()
+        ui.build(indexes=[GoodMockSearchIndex()])
+        connections["default"]._index = ui
+
+        page = [
+            SearchResult("core", "mockmodel", "1", 2),
+            SearchResult("core", "mockmodel", "2", 2),
+            SearchResult("core", "mockmodel", "1000000", 2),
+            SearchResult("core", "yetanothermockmodel", "1", 2),
+        ]
+
+        for result in page:
+            result._siblings = page
+
+        with self.assertNumQueries(1):
+            self.assertEqual(page[1].object.pk, 2)
+            self.assertEqual(page[0].object.pk, 1)
+
+        self.assertIsNone(page[0]._siblings)
+
+        # Missing objects fail gracefully, as before.
+        with self.assertLogs("haystack", "ERROR") as logs:
+            self.assertEqual(page[2].object, None)
+            self.assertEqual(page[3].object, None)
+
+        self.assertEqual(len(logs.records), 2)
+
+        # Restore.
+        connections["default"]._index = old_unified_index
+
     def test_pickling(self):
         pickle_me_1 = SearchResult("core", "mockmodel", "1000000", 2)
         picklicious = pickle.dumps(pickle_me_1)
@@ -203,3 +236,8 @@ class SearchResultTestCase(TestCase):
         self.assertEqual(pickle_me_1.model_name, pickle_me_2.model_name)
         self.assertEqual(pickle_me_1.pk, pickle_me_2.pk)
         self.assertEqual(pickle_me_1.score, pickle_me_2.score)
+
+        # The rest of the page isn't pickled along with the result.
+        pickle_me_1._siblings = [pickle_me_1]
+        pickle_me_2 = pickle.loads(pickle.dumps(pickle_me_1))
+        self.assertIsNone(pickle_me_2._siblings)
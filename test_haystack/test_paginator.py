@@ -0,0 +1,73 @@
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from haystack import connections, reset_search_queries
+from haystack.paginator import SearchPaginator
+from haystack.query import SearchQuerySet
+from haystack.utils.loading import UnifiedIndex
+from test_haystack.core.models import MockModel
+
+from .mocks import MOCK_SEARCH_RESULTS
+from .test_views import BasicMockModelSearchIndex
+
+
+@override_settings(DEBUG=True)
+class SearchPaginatorTestCase(TestCase):
+    fixtures = ["base_data.json", "bulk_data.json"]
+
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_unified_index = connections["default"]._index
+        self.ui = UnifiedIndex()
+        self.bmmsi = BasicMockModelSearchIndex()
+        self.ui.build(indexes=[self.bmmsi])
+        connections["default"]._index = self.ui
+
+        # Update the "index".
+        backend = connections["default"].get_backend()
+        backend.clear()
+        backend.update(self.bmmsi, MockModel.objects.all())
+
+        reset_search_queries()
+
+    def tearDown(self):
+        # Restore.
+        connections["default"]._index = self.old_unified_index
+        super().tearDown()
+
+    def test_page(self):
+        paginator = SearchPaginator(SearchQuerySet(), 10)
+        page = paginator.page(2)
+        self.assertEqual(
+            [int(result.pk) for result in page.object_list],
+            [result.pk for result in MOCK_SEARCH_RESULTS[10:20]],
+        )
+        self.assertEqual(paginator.count, 23)
+        self.assertEqual(paginator.num_pages, 3)
+
+        # The count came back with the page.
+        self.assertEqual(len(connections["default"].queries), 1)
+
+    def test_orphans(self):
+        paginator = SearchPaginator(SearchQuerySet(), 10, orphans=3)
+        page = paginator.page(2)
+        self.assertEqual(len(page.object_list), 13)
+        self.assertEqual(len(connections["default"].queries), 1)
+
+    def test_invalid_page(self):
+        paginator = SearchPaginator(SearchQuerySet(), 10)
+        self.assertRaises(EmptyPage, paginator.page, 4)
+        self.assertRaises(EmptyPage, paginator.page, 0)
+        self.assertRaises(PageNotAnInteger, paginator.page, "foo")
+        self.assertEqual(len(connections["default"].queries), 1)
+
+    def test_count(self):
+        sqs = SearchQuerySet()
+        self.assertEqual(len(sqs), 23)
+
+        # A count on its own doesn't ask for any documents.
+        self.assertEqual(sqs.query.end_offset, sqs.query.start_offset)
+        self.assertEqual(len(sqs.query.get_results()), 0)
@@ -1,7 +1,10 @@
 import datetime
 import pickle
+from unittest.mock import patch
 
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase
 from django.test.utils import override_settings
 
 from haystack import connections, indexes, reset_search_queries
@@ -13,8 +16,11 @@ from haystack.query import (
     SearchQuerySet,
     ValuesListSearchQuerySet,
     ValuesSearchQuerySet,
+    multi_search,
 )
+from haystack.utils.identity_map import identity_map
 from haystack.utils.loading import UnifiedIndex
+from haystack.utils.query_cache import get_query_cache_stats, reset_query_cache_stats
 from test_haystack.core.models import (
     AnotherMockModel,
     CharPKMockModel,
@@ -25,6 +31,7 @@ from test_haystack.core.models import (
 from .mocks import (
     MOCK_SEARCH_RESULTS,
     CharPKMockSearchBackend,
+    MockEngine,
     MockSearchBackend,
     MockSearchQuery,
     ReadQuerySetMockSearchBackend,
@@ -37,6 +44,10 @@ from .test_indexes import (
 from .test_views import BasicAnotherMockModelSearchIndex, BasicMockModelSearchIndex
 
 
+async def alist(aiterable):
+    return [item async for item in aiterable]
+
+
 class SQTestCase(TestCase):
     def test_split_expression(self):
         sq = SQ(foo="bar")
@@ -281,6 +292,34 @@ class BaseSearchQueryTestCase(TestCase):
         self.bsq.add_narrow_query("moof:baz")
         self.assertEqual(self.bsq.narrow_queries, set(["foo:bar", "moof:baz"]))
 
+    def test_add_only_fields(self):
+        self.bsq.add_only_fields(["foo", "bar"])
+        self.assertEqual(self.bsq.only_fields, set(["foo", "bar"]))
+
+        # Subsequent calls replace the previous fields.
+        self.bsq.add_only_fields(["moof"])
+        self.assertEqual(self.bsq.only_fields, set(["moof"]))
+
+    def test_add_deferred_fields(self):
+        self.bsq.add_deferred_fields(["foo"])
+        self.assertEqual(self.bsq.deferred_fields, set(["foo"]))
+
+        self.bsq.add_deferred_fields(["bar"])
+        self.assertEqual(self.bsq.deferred_fields, set(["foo", "bar"]))
+
+        self.bsq.clear_deferred_fields()
+        self.assertEqual(self.bsq.deferred_fields, set())
+
+    def test_set_cache(self):
+        self.assertEqual(self.bsq.use_cache, None)
+
+        self.bsq.set_cache(60)
+        self.assertEqual(self.bsq.use_cache, True)
+        self.assertEqual(self.bsq.cache_timeout, 60)
+
+        self.bsq.set_cache(0)
+        self.assertEqual(self.bsq.use_cache, False)
+
     def test_set_result_class(self):
         # Assert that we're defaulting to ``SearchResult``.
         self.assertTrue(issubclass(self.bsq.result_class, SearchResult))
@@ -336,6 +375,9 @@ class BaseSearchQueryTestCase(TestCase):
         self.bsq.add_query_facet("foo", "bar")
         self.bsq.add_stats_query("foo", "bar")
         self.bsq.add_narrow_query("foo:bar")
+        self.bsq.add_only_fields(["foo"])
+        self.bsq.add_deferred_fields(["bar"])
+        self.bsq.set_cache(60)
 
         clone = self.bsq._clone()
         self.assertTrue(isinstance(clone, BaseSearchQuery))
@@ -348,10 +390,41 @@ class BaseSearchQueryTestCase(TestCase):
         self.assertEqual(len(clone.date_facets), 1)
         self.assertEqual(len(clone.query_facets), 1)
         self.assertEqual(len(clone.narrow_queries), 1)
+        self.assertEqual(clone.only_fields, set(["foo"]))
+        self.assertEqual(clone.deferred_fields, set(["bar"]))
+        self.assertEqual(clone.use_cache, True)
+        self.assertEqual(clone.cache_timeout, 60)
         self.assertEqual(clone.start_offset, self.bsq.start_offset)
         self.assertEqual(clone.end_offset, self.bsq.end_offset)
         self.assertEqual(clone.backend.__class__, self.bsq.backend.__class__)
 
+    def test_clone_shares_nodes(self):
+        self.bsq.add_filter(SQ(foo="bar") | SQ(foo="baz"))
+        self.bsq.add_filter(~SQ(claris="moof"))
+        original = repr(self.bsq.query_filter)
+
+        clone = self.bsq._clone()
+        self.assertIsNot(clone.query_filter, self.bsq.query_filter)
+        self.assertIsNot(clone.query_filter.children, self.bsq.query_filter.children)
+
+        for child, clone_child in zip(
+            self.bsq.query_filter.children, clone.query_filter.children
+        ):
+            self.assertIs(clone_child, child)
+
+        # Changing either one leaves the other alone.
+        clone.add_filter(SQ(title="moof"), use_or=True)
+        clone.add_filter(~SQ(foo="qux"))
+        self.assertEqual(repr(self.bsq.query_filter), original)
+
+        self.bsq.add_filter(SQ(title="hello") | SQ(title="world"))
+        self.assertEqual(
+            repr(clone.query_filter),
+            "<SQ: AND ((((foo__content=bar OR foo__content=baz) AND NOT "
+            "(claris__content=moof)) OR title__content=moof) AND NOT "
+            "(foo__content=qux))>",
+        )
+
     def test_log_query(self):
         reset_search_queries()
         self.assertEqual(len(connections["default"].queries), 0)
@@ -555,6 +628,140 @@ class SearchQuerySetTestCase(TestCase):
         self.assertEqual(results._cache_is_full(), True)
         self.assertEqual(len(connections["default"].queries), 4)
 
+    def test_sparse_cache(self):
+        results = self.msqs.all()
+        self.assertEqual(int(results[22].pk), 23)
+
+        # Only the page that was asked for is cached.
+        self.assertEqual(len(results._result_cache), 3)
+        self.assertEqual(results._result_cache.get_range(0, 10), None)
+
+        reset_search_queries()
+        self.assertEqual(int(results[21].pk), 22)
+        self.assertEqual(len(connections["default"].queries), 0)
+
+        # An open-ended slice isn't held to the limits of the count query.
+        results = self.msqs.all()
+        self.assertEqual(len(results), 23)
+        self.assertEqual(len(results[5:]), 18)
+
+    def test_cache_max_pages(self):
+        results = self.msqs.all()
+        results._result_cache.max_pages = 1
+        self.assertEqual(
+            [int(res.pk) for res in results],
+            [res.pk for res in MOCK_SEARCH_RESULTS[:23]],
+        )
+        self.assertEqual(len(results._result_cache), 3)
+        self.assertEqual(results._cache_is_full(), False)
+        self.assertEqual(int(results[5].pk), 6)
+
+    def test_iterator(self):
+        reset_search_queries()
+        self.assertEqual(len(connections["default"].queries), 0)
+        msqs = self.msqs.all()
+        results = [int(res.pk) for res in msqs.iterator(chunk_size=10)]
+        self.assertEqual(results, [res.pk for res in MOCK_SEARCH_RESULTS[:23]])
+        self.assertEqual(len(connections["default"].queries), 3)
+
+        # Streaming shouldn't touch the result cache.
+        self.assertEqual(len(msqs._result_cache), 0)
+        self.assertEqual(msqs._cache_is_full(), False)
+
+        # A full cache is reused rather than querying again.
+        list(msqs)
+        reset_search_queries()
+        self.assertEqual(len(list(msqs.iterator())), 23)
+        self.assertEqual(len(connections["default"].queries), 0)
+
+    def test_facet_iterator(self):
+        sqs = self.msqs.narrow("foo:(bar)").facet("author").order_by("-pub_date")
+
+        with patch.object(
+            MockSearchBackend, "iter_facet", return_value=iter([("daniel", 3)])
+        ) as iter_facet:
+            facets = sqs.facet_iterator("author", page_size=50)
+            # Nothing is fetched until the values are needed.
+            self.assertFalse(iter_facet.called)
+            self.assertEqual(list(facets), [("daniel", 3)])
+
+        (query_string, field), kwargs = iter_facet.call_args
+        self.assertEqual(field, "author")
+        self.assertEqual(kwargs["page_size"], 50)
+        self.assertEqual(kwargs["narrow_queries"], {"foo:(bar)"})
+
+        for key in ("facets", "sort_by", "start_offset", "end_offset"):
+            self.assertNotIn(key, kwargs)
+
+    def test_multi_search(self):
+        sqs1 = self.msqs.all()
+        sqs2 = self.msqs.raw_search("foo")
+        sqs3 = self.msqs.all()
+        self.assertEqual(len(sqs3[:5]), 5)
+
+        reset_search_queries()
+        querysets = [sqs1, sqs2, sqs3, EmptySearchQuerySet()]
+        self.assertEqual(multi_search(querysets), querysets)
+
+        # The third already had the page cached.
+        self.assertEqual(len(connections["default"].queries), 2)
+        self.assertEqual(
+            [int(res.pk) for res in sqs1[:10]],
+            [res.pk for res in MOCK_SEARCH_RESULTS[:10]],
+        )
+        self.assertEqual(len(sqs1), 23)
+        self.assertEqual(len(sqs2), 23)
+        self.assertEqual(sqs1.facet_counts(), {})
+        self.assertEqual(len(connections["default"].queries), 2)
+
+        # The searches for each backend are handed over together.
+        backend = connections["default"].get_backend()
+
+        with patch.object(
+            backend, "multi_search", wraps=backend.multi_search
+        ) as backend_multi_search:
+            sqs1 = self.msqs.all()
+            sqs2 = self.msqs.filter(content="foo").cache()
+            multi_search([sqs1, sqs2], 5, 15)
+            self.assertEqual(backend_multi_search.call_count, 1)
+            self.assertEqual(len(backend_multi_search.call_args[0][0]), 2)
+            self.assertEqual(
+                [int(res.pk) for res in sqs1[5:15]],
+                [res.pk for res in MOCK_SEARCH_RESULTS[5:15]],
+            )
+
+            # Responses in the query cache aren't fetched again.
+            multi_search([self.msqs.filter(content="foo").cache()], 5, 15)
+            self.assertEqual(backend_multi_search.call_count, 1)
+
+    def test_async(self):
+        msqs = self.msqs.all()
+        results = async_to_sync(msqs.aget_results)(0, 10)
+        self.assertEqual(
+            [int(res.pk) for res in results],
+            [res.pk for res in MOCK_SEARCH_RESULTS[:10]],
+        )
+
+        # The count came back with the page.
+        self.assertEqual(async_to_sync(msqs.acount)(), 23)
+        self.assertEqual(len(connections["default"].queries), 1)
+
+        results = [int(res.pk) for res in async_to_sync(alist)(msqs)]
+        self.assertEqual(results, [res.pk for res in MOCK_SEARCH_RESULTS[:23]])
+        self.assertEqual(len(connections["default"].queries), 3)
+        self.assertEqual(msqs._cache_is_full(), True)
+
+        self.assertEqual(async_to_sync(self.msqs.afacet_counts)(), {})
+        self.assertEqual(async_to_sync(self.msqs.aspelling_suggestion)(), None)
+        self.assertEqual(async_to_sync(self.msqs.acount)(), 23)
+        self.assertEqual(len(connections["default"].queries), 6)
+
+    def test_async_load_all(self):
+        results = async_to_sync(alist)(self.msqs.load_all())
+        self.assertEqual(len(results), 23)
+        self.assertTrue(isinstance(results[0].object, MockModel))
+        self.assertEqual(results[0].object.pk, int(results[0].pk))
+
     def test_all(self):
         sqs = self.msqs.all()
         self.assertTrue(isinstance(sqs, SearchQuerySet))
@@ -618,6 +825,55 @@ class SearchQuerySetTestCase(TestCase):
         sqs = self.msqs.result_class(None)
         self.assertTrue(issubclass(sqs.query.result_class, SearchResult))
 
+    def test_only(self):
+        sqs = self.msqs.only("name", "pub_date")
+        self.assertTrue(isinstance(sqs, SearchQuerySet))
+        self.assertEqual(sqs.query.only_fields, set(["name", "pub_date"]))
+        self.assertEqual(self.msqs.query.only_fields, set())
+
+        results = list(sqs)
+        self.assertEqual(len(results), 23)
+        self.assertTrue(isinstance(results[0], SearchResult))
+
+    def test_defer(self):
+        sqs = self.msqs.defer("text").defer("name")
+        self.assertTrue(isinstance(sqs, SearchQuerySet))
+        self.assertEqual(sqs.query.deferred_fields, set(["text", "name"]))
+
+        sqs = sqs.defer(None)
+        self.assertEqual(sqs.query.deferred_fields, set())
+
+    def test_cache(self):
+        caches["default"].clear()
+        reset_query_cache_stats()
+        sqs = self.msqs.all().cache(60)
+        self.assertTrue(isinstance(sqs, SearchQuerySet))
+        self.assertEqual(sqs.query.cache_timeout, 60)
+
+        reset_search_queries()
+        self.assertEqual(len(sqs[:5]), 5)
+        self.assertEqual(len(connections["default"].queries), 1)
+
+        # The same query is answered from the cache.
+        self.assertEqual(len(self.msqs.all().cache()[:5]), 5)
+        self.assertEqual(len(connections["default"].queries), 1)
+        self.assertEqual(get_query_cache_stats("default"), {"hits": 1, "misses": 1})
+
+        # Uncached queries still go to the backend.
+        self.assertEqual(len(self.msqs.all()[:5]), 5)
+        self.assertEqual(len(self.msqs.all().cache(0)[:5]), 5)
+        self.assertEqual(len(connections["default"].queries), 3)
+
+        # Changing the index invalidates everything cached so far, even
+        # without a ``CACHE`` for the connection.
+        backend = connections["default"].get_backend()
+        backend.update(self.bmmsi, MockModel.objects.all()[:1])
+        self.assertEqual(len(self.msqs.all().cache()[:5]), 5)
+        self.assertEqual(len(connections["default"].queries), 4)
+        self.assertEqual(len(self.msqs.all().cache()[:5]), 5)
+        self.assertEqual(len(connections["default"].queries), 4)
+        self.assertEqual(get_query_cache_stats("default"), {"hits": 2, "misses": 2})
+
     def test_boost(self):
         sqs = self.msqs.boost("foo", 10)
         self.assertTrue(isinstance(sqs, SearchQuerySet))
@@ -658,9 +914,7 @@ class SearchQuerySetTestCase(TestCase):
         results = sqs.load_all().all()
         self.assertEqual(len(results._result_cache), 0)
         results._fill_cache(0, 2)
-        self.assertEqual(
-            len([result for result in results._result_cache if result is not None]), 2
-        )
+        self.assertEqual(len(results._result_cache.get_range(0, 2)), 2)
 
         # Models with uuid primary keys.
         sqs = SearchQuerySet()
@@ -668,9 +922,7 @@ class SearchQuerySetTestCase(TestCase):
         results = sqs.load_all().all()
         self.assertEqual(len(results._result_cache), 0)
         results._fill_cache(0, 2)
-        self.assertEqual(
-            len([result for result in results._result_cache if result is not None]), 2
-        )
+        self.assertEqual(len(results._result_cache.get_range(0, 2)), 2)
 
         # If nothing is handled, you get nothing.
         old_ui = connections["default"]._index
@@ -686,6 +938,65 @@ class SearchQuerySetTestCase(TestCase):
 
         # For full tests, see the solr_backend.
 
+    def test_load_all_chunk_size(self):
+        # Iterating fetches & loads the results a chunk at a time.
+        with self.assertNumQueries(1):
+            results = [result.object for result in self.msqs.load_all()]
+
+        self.assertEqual([obj.pk for obj in results], list(range(1, 24)))
+
+        with self.assertNumQueries(3):
+            results = [result.object for result in self.msqs.load_all(chunk_size=10)]
+
+        self.assertEqual([obj.pk for obj in results], list(range(1, 24)))
+
+    def test_load_all_missing_objects(self):
+        MockModel.objects.filter(pk__in=[3, 5]).delete()
+        sqs = self.msqs.load_all()
+        reset_search_queries()
+
+        # A margin of extra results stands in for the deleted objects, without
+        # going back to the engine.
+        with patch("haystack.query.LOAD_ALL_MARGIN", 0.5):
+            page = sqs[:10]
+            self.assertEqual(len(connections["default"].queries), 1)
+            self.assertEqual(
+                [result.pk for result in page], [1, 2, 4, 6, 7, 8, 9, 10, 11, 12]
+            )
+
+            # The results fetched past the page aren't lost.
+            self.assertEqual([result.pk for result in sqs[10:]], list(range(13, 24)))
+
+        self.assertEqual(len(sqs), 21)
+
+    def test_load_all_identity_map(self):
+        with identity_map():
+            first = [result.object for result in self.msqs.load_all()]
+
+            # Objects already loaded in the same request are shared.
+            with self.assertNumQueries(0):
+                second = [result.object for result in self.msqs.load_all()[:5]]
+
+            self.assertIs(second[0], first[0])
+
+        with self.assertNumQueries(1):
+            self.assertIsNot(self.msqs.load_all()[0].object, first[0])
+
+    def test_result_object_loads_page(self):
+        results = self.msqs[:5]
+
+        # The first object needed loads the rest of the page along with it.
+        with self.assertNumQueries(1):
+            objects = [result.object for result in results]
+
+        self.assertEqual([obj.pk for obj in objects], [1, 2, 3, 4, 5])
+        self.assertEqual(results[0]._using, "default")
+
+        # As does the first one needed from the next page.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.msqs[10].object.pk, 11)
+            self.assertEqual(self.msqs[11].object.pk, 12)
+
     def test_load_all_read_queryset(self):
         # Stow.
         old_ui = connections["default"]._index
@@ -888,11 +1199,22 @@ class SearchQuerySetTestCase(TestCase):
         clone = results._clone()
         self.assertTrue(isinstance(clone, SearchQuerySet))
         self.assertEqual(str(clone.query), str(results.query))
-        self.assertEqual(clone._result_cache, [])
+        self.assertEqual(len(clone._result_cache), 0)
         self.assertEqual(clone._result_count, None)
         self.assertEqual(clone._cache_full, False)
         self.assertEqual(clone._using, results._using)
 
+    def test_clone_skips_routers(self):
+        results = self.msqs.filter(foo="bar")
+
+        with patch(
+            "haystack.query.connection_router.for_read", return_value="default"
+        ) as for_read:
+            clone = results._clone()
+
+        self.assertFalse(for_read.called)
+        self.assertEqual(str(clone.query), str(results.query))
+
     def test_using(self):
         sqs = SearchQuerySet(using="default")
         self.assertNotEqual(sqs.query, None)
@@ -996,6 +1318,61 @@ class ValuesQuerySetTestCase(SearchQuerySetTestCase):
         self.assert_(flat_sqs[0] is None)
         self.assert_(flat_sqs[0:1][0] is None)
 
+    def test_valueslist_iterator(self):
+        sqs = self.msqs.auto_query("test").values_list("id")
+        results = list(sqs.iterator(chunk_size=5))
+        self.assertEqual(len(results), 23)
+        self.assertIsInstance(results[0], (list, tuple))
+        self.assertEqual(len(sqs._result_cache), 0)
+
+
+class LoadAllPrefetchTestCase(TransactionTestCase):
+    # The objects are loaded in another thread, so they have to be committed.
+    fixtures = ["base_data.json", "bulk_data.json"]
+
+    def setUp(self):
+        super().setUp()
+
+        # Stow.
+        self.old_unified_index = connections["default"]._index
+        self.ui = UnifiedIndex()
+        self.bmmsi = BasicMockModelSearchIndex()
+        self.ui.build(indexes=[self.bmmsi])
+        connections["default"]._index = self.ui
+
+        # Update the "index".
+        backend = connections["default"].get_backend()
+        backend.clear()
+        backend.update(self.bmmsi, MockModel.objects.all())
+
+        self.msqs = SearchQuerySet()
+
+    def tearDown(self):
+        # Restore.
+        connections["default"]._index = self.old_unified_index
+        super().tearDown()
+
+    def test_prefetch(self):
+        sqs = self.msqs.load_all(chunk_size=10, prefetch=True)
+
+        # Connections are per-thread, so the index has to be swapped for all.
+        with patch.object(
+            MockEngine, "get_unified_index", return_value=self.ui
+        ), patch.object(
+            MockSearchBackend,
+            "search",
+            autospec=True,
+            side_effect=MockSearchBackend.search,
+        ) as search:
+            # Every chunk's objects are loaded by this thread, which can see
+            # the test's uncommitted rows.
+            with self.assertNumQueries(3):
+                results = [result.object for result in sqs]
+
+        self.assertEqual([obj.pk for obj in results], list(range(1, 24)))
+        # The prefetched results aren't fetched again.
+        self.assertEqual(search.call_count, 3)
+
 
 class EmptySearchQuerySetTestCase(TestCase):
     def setUp(self):
@@ -1028,6 +1405,12 @@ class EmptySearchQuerySetTestCase(TestCase):
         except IndexError:
             pass
 
+    def test_async(self):
+        self.assertEqual(async_to_sync(self.esqs.acount)(), 0)
+        self.assertEqual(async_to_sync(self.esqs.aget_results)(0, 10), [])
+        self.assertEqual(async_to_sync(alist)(self.esqs), [])
+        self.assertEqual(async_to_sync(self.esqs.afacet_counts)(), {})
+
     def test_dictionary_lookup(self):
         """
         Ensure doing a dictionary lookup raises a TypeError so
@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.template import Context, Template
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from haystack.utils.highlighting import Highlighter
 
@@ -16,6 +16,14 @@ class BorkHighlighter(Highlighter):
         return highlighted_chunk
 
 
+class CountingHighlighter(Highlighter):
+    instances = 0
+
+    def __init__(self, query, **kwargs):
+        super().__init__(query, **kwargs)
+        CountingHighlighter.instances += 1
+
+
 class TemplateTagTestCase(TestCase):
     def render(self, template, context):
         # Why on Earth does Django not have a TemplateTestCase yet?
@@ -100,3 +108,29 @@ the attribute of the object to populate that field with.
 
         # Restore.
         settings.HAYSTACK_CUSTOM_HIGHLIGHTER = old_custom_highlighter
+
+    @override_settings(
+        HAYSTACK_CUSTOM_HIGHLIGHTER="test_haystack.test_templatetags.CountingHighlighter"
+    )
+    def test_shared_highlighter(self):
+        CountingHighlighter.instances = 0
+        template = Template(
+            """{% load highlight %}{% for entry in entries %}"""
+            """{% highlight entry with query max_length 20 %}|{% endfor %}"""
+        )
+
+        # Changing the setting afterwards doesn't affect compiled templates.
+        with self.settings(HAYSTACK_CUSTOM_HIGHLIGHTER="not.here.FooHighlighter"):
+            rendered = template.render(
+                Context({"entries": ["an index", "no match"] * 25, "query": "index"})
+            )
+
+        self.assertEqual(
+            rendered, '...<span class="highlighted">index</span>|no match|' * 25
+        )
+        # The query was only parsed once for the page.
+        self.assertEqual(CountingHighlighter.instances, 1)
+
+        template.render(Context({"entries": ["an index"], "query": "index"}))
+        template.render(Context({"entries": ["an index"], "query": "an"}))
+        self.assertEqual(CountingHighlighter.instances, 3)
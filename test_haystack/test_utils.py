@@ -1,3 +1,5 @@
+import threading
+
 from django.test import TestCase
 from django.test.utils import override_settings
 
@@ -8,6 +10,14 @@ from haystack.utils import (
     log,
 )
 from haystack.utils.highlighting import Highlighter
+from haystack.utils.pooling import (
+    build_session,
+    clear_pools,
+    get_pool,
+    session_pools,
+    summarize_pools,
+)
+from haystack.utils.result_cache import ResultCache
 from test_haystack.core.models import MockModel
 
 
@@ -87,6 +97,26 @@ class HighlighterTestCase(TestCase):
         highlighter.text_block = self.document_1
         self.assertEqual(highlighter.find_highlightable_words(), {"highlight": [22]})
 
+        # Words inside & starting alongside other words are found too.
+        highlighter = Highlighter("is this high highlight")
+        highlighter.text_block = self.document_1
+        self.assertEqual(
+            highlighter.find_highlightable_words(),
+            {
+                "is": [2, 5, 55, 58, 81],
+                "this": [0, 53, 79],
+                "high": [22],
+                "highlight": [22],
+            },
+        )
+
+        # Each word's matches don't overlap.
+        highlighter = Highlighter("aa a+")
+        highlighter.text_block = "aaaaa a+"
+        self.assertEqual(
+            highlighter.find_highlightable_words(), {"aa": [0, 2], "a+": [6]}
+        )
+
     def test_find_window(self):
         # The query doesn't matter for this method, so ignore it.
         highlighter = Highlighter("")
@@ -309,6 +339,115 @@ class HighlighterTestCase(TestCase):
         )
 
 
+class ResultCacheTestCase(TestCase):
+    def test_get_range(self):
+        cache = ResultCache(10)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_range(0, 5), None)
+
+        cache.add_pages(2, list(range(20, 40)))
+        self.assertEqual(len(cache), 20)
+        self.assertEqual(cache.get_range(25, 32), list(range(25, 32)))
+        self.assertEqual(cache.get_range(35, 45), None)
+        self.assertEqual(cache.get_range(15, 25), None)
+        self.assertEqual(cache.get_range(5, 5), [])
+        self.assertEqual(list(cache), list(range(20, 40)))
+
+    def test_count(self):
+        cache = ResultCache(10)
+        cache.set_count(23)
+
+        # A trailing partial page is only kept at the end of the results.
+        cache.add_pages(0, list(range(5)))
+        self.assertEqual(len(cache), 0)
+
+        cache.add_pages(0, list(range(23)))
+        self.assertEqual(cache.get_range(20, 30), [20, 21, 22])
+        self.assertEqual(cache.get_range(23, 33), [])
+        self.assertEqual(cache.get_range(0, None), list(range(23)))
+        self.assertTrue(cache.is_full())
+
+        cache.set_count(30)
+        self.assertEqual(cache.count, 23)
+
+    def test_missing_span(self):
+        cache = ResultCache(10)
+        self.assertEqual(cache.missing_span(0, 1), (0, 0))
+        self.assertEqual(cache.missing_span(15, 35), (1, 3))
+        self.assertEqual(cache.missing_span(15), (1, None))
+
+        cache.add_pages(1, list(range(10, 20)))
+        cache.add_pages(3, list(range(30, 40)))
+        self.assertEqual(cache.missing_span(15, 35), (2, 2))
+        self.assertEqual(cache.missing_span(15), (2, None))
+
+    def test_max_pages(self):
+        cache = ResultCache(10, max_pages=2)
+        cache.add_pages(0, list(range(10)))
+        cache.add_pages(1, list(range(10, 20)))
+        self.assertEqual(cache.get_range(0, 10), list(range(10)))
+
+        # Page 1 is now the least recently used, so it's evicted first.
+        cache.add_pages(2, list(range(20, 30)))
+        self.assertEqual(len(cache), 20)
+        self.assertEqual(cache.get_range(10, 20), None)
+        self.assertEqual(cache.get_range(0, 10), list(range(10)))
+
+        # Pages added together are kept, even past the limit.
+        cache.add_pages(3, list(range(30, 60)))
+        self.assertEqual(cache.get_range(30, 60), list(range(30, 60)))
+
+
+class PoolingTestCase(TestCase):
+    def tearDown(self):
+        clear_pools("pool-test")
+        super().tearDown()
+
+    def test_get_pool(self):
+        built = []
+
+        def build():
+            built.append(object())
+            return built[-1]
+
+        pools = []
+        threads = [
+            threading.Thread(target=lambda: pools.append(get_pool("pool-test", build)))
+            for _ in range(5)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        # Every thread got the same client.
+        self.assertEqual(len(built), 1)
+        self.assertEqual(pools, built * 5)
+
+        # New options build a new one.
+        self.assertIsNot(get_pool("pool-test", build, options=(1,)), built[0])
+        self.assertEqual(get_pool("pool-test", build, options=(1,)), built[1])
+
+        clear_pools("pool-test")
+        self.assertEqual(get_pool("pool-test", build), built[2])
+
+    def test_build_session(self):
+        session = build_session(pool_size=3, max_retries=2)
+        adapter = session.get_adapter("http://localhost:9001/")
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(session.headers["Connection"], "keep-alive")
+        self.assertEqual(build_session(keepalive=False).headers["Connection"], "close")
+
+        adapter.poolmanager.connection_from_url("http://localhost:9001/")
+        self.assertEqual(
+            summarize_pools(session_pools(session)),
+            {"pools": 1, "max_size": 3, "connections": 0, "idle": 0, "requests": 0},
+        )
+
+
 class LoggingFacadeTestCase(TestCase):
     def test_everything_noops_if_settings_are_off(self):
         with self.settings(HAYSTACK_LOGGING=False):
@@ -2,6 +2,7 @@ import os
 import unittest
 from datetime import timedelta
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.conf import settings
 from django.test import TestCase
@@ -15,7 +16,7 @@ from haystack import connections, indexes, reset_search_queries
 from haystack.exceptions import SearchBackendError, SkipDocument
 from haystack.inputs import AutoQuery
 from haystack.models import SearchResult
-from haystack.query import SQ, SearchQuerySet
+from haystack.query import SQ, SearchQuerySet, multi_search
 from haystack.utils.loading import UnifiedIndex
 
 from ..core.models import AFourthMockModel, AnotherMockModel, MockModel
@@ -450,6 +451,27 @@ class WhooshSearchBackendTestCase(WhooshTestCase):
 
         self.assertEqual(result, ["<em>Indexed</em>!\n%d" % i for i in range(1, 24)])
 
+    def test_highlight_chars(self):
+        self.sb.highlight_chars = True
+
+        try:
+            self.sb.delete_index()
+            self.assertTrue(self.sb.index.schema["text"].supports("characters"))
+            self.sb.update(self.wmmi, self.sample_objs)
+
+            with patch("haystack.backends.whoosh_backend.whoosh_highlight") as rescan:
+                query = self.sb.search("Index*", highlight=True)["results"]
+
+            # The stored positions are used, rather than re-tokenizing.
+            self.assertFalse(rescan.called)
+            self.assertEqual(
+                [result.highlighted["text"][0] for result in query],
+                ["<em>Indexed</em>!\n%d" % i for i in range(1, 24)],
+            )
+        finally:
+            self.sb.highlight_chars = False
+            self.sb.delete_index()
+
     def test_search_all_models(self):
         wamsi = WhooshAnotherMockSearchIndex()
         self.ui.build(indexes=[self.wmmi, wamsi])
@@ -1102,13 +1124,50 @@ class LiveWhooshSearchQuerySetTestCase(WhooshTestCase):
         self.assertEqual(sorted(results), [1, 2, 3])
         self.assertEqual(len(connections["whoosh"].queries), 1)
 
+    def test_iterator(self):
+        self.sb.update(self.wmmi, self.sample_objs)
+
+        sqs = self.sqs.auto_query("Indexed!").order_by("-pub_date")
+        results = [int(result.pk) for result in sqs.iterator(chunk_size=2)]
+        self.assertEqual(results, [int(result.pk) for result in sqs])
+
+        sqs = self.sqs.auto_query("Indexed!")
+        self.assertEqual(
+            sorted(int(result.pk) for result in sqs.iterator(chunk_size=1)), [1, 2, 3]
+        )
+        self.assertEqual(len(sqs._result_cache), 0)
+
+        sqs = self.sqs.auto_query("Indexed!").values_list("pk", flat=True)
+        self.assertEqual(sorted(sqs.iterator(chunk_size=2)), ["1", "2", "3"])
+
+    def test_multi_search(self):
+        self.sb.update(self.wmmi, self.sample_objs)
+
+        reset_search_queries()
+        sqs1 = self.sqs.auto_query("Indexed!").order_by("pub_date")
+        sqs2 = self.sqs.filter(name="daniel3")
+        sqs3 = self.sqs.auto_query("nonexistent")
+        index = self.sb.index.refresh()
+
+        with patch.object(index, "searcher", wraps=index.searcher) as searcher:
+            self.sb.index = index
+            multi_search([sqs1, sqs2, sqs3])
+
+        # All three searches shared a single searcher.
+        self.assertEqual(searcher.call_count, 1)
+        self.assertEqual(len(connections["whoosh"].queries), 3)
+        self.assertEqual([int(result.pk) for result in sqs1], [3, 2, 1])
+        self.assertEqual([int(result.pk) for result in sqs2], [3])
+        self.assertEqual(len(sqs3), 0)
+        self.assertEqual(len(connections["whoosh"].queries), 3)
+
     def test_slice(self):
         self.sb.update(self.wmmi, self.sample_objs)
 
         reset_search_queries()
         self.assertEqual(len(connections["whoosh"].queries), 0)
         results = self.sqs.auto_query("Indexed!")
-        self.assertEqual(sorted([int(result.pk) for result in results[1:3]]), [1, 2])
+        self.assertEqual(sorted([int(result.pk) for result in results[1:3]]), [2, 3])
         self.assertEqual(len(connections["whoosh"].queries), 1)
 
         reset_search_queries()
@@ -1127,7 +1186,7 @@ class LiveWhooshSearchQuerySetTestCase(WhooshTestCase):
 
         # The values will come back as strings because Hasytack doesn't assume PKs are integers.
         # We'll prepare this set once since we're going to query the same results in multiple ways:
-        expected_pks = ["3", "2", "1"]
+        expected_pks = ["2", "1"]
 
         results = self.sqs.all().order_by("pub_date").values("pk")
         self.assertListEqual([i["pk"] for i in results[1:11]], expected_pks)
@@ -1222,6 +1281,22 @@ class LiveWhooshSearchQuerySetTestCase(WhooshTestCase):
         sqs = self.sqs.result_class(None).all()
         self.assertTrue(isinstance(sqs[0], SearchResult))
 
+    def test_only_defer(self):
+        self.sb.update(self.wmmi, self.sample_objs)
+
+        result = self.sqs.all().only("name")[0]
+        self.assertTrue(isinstance(result, SearchResult))
+        self.assertEqual(sorted(result.get_additional_fields().keys()), ["id", "name"])
+
+        result = self.sqs.all().defer("text", "name_analyzed")[0]
+        self.assertTrue(isinstance(result, SearchResult))
+        self.assertEqual(
+            sorted(result.get_additional_fields().keys()), ["id", "name", "pub_date"]
+        )
+
+        result = self.sqs.all().defer("text").defer(None)[0]
+        self.assertTrue("text" in result.get_additional_fields())
+
 
 class LiveWhooshMultiSearchQuerySetTestCase(WhooshTestCase):
     fixtures = ["bulk_data.json"]
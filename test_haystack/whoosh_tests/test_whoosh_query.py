@@ -1,4 +1,5 @@
 import datetime
+from unittest.mock import patch
 
 from haystack import connections
 from haystack.inputs import Exact
@@ -57,6 +58,32 @@ class WhooshSearchQueryTestCase(WhooshTestCase):
         self.sq.add_boost("world", 5)
         self.assertEqual(self.sq.build_query(), "(hello) world^5")
 
+    def test_build_query_cached(self):
+        self.sq.add_filter(SQ(content="hello"))
+        self.assertEqual(self.sq.build_query(), "(hello)")
+
+        with patch.object(self.sq, "build_query_fragment") as build_query_fragment:
+            self.assertEqual(self.sq.build_query(), "(hello)")
+            self.assertEqual(self.sq._clone().build_query(), "(hello)")
+            self.assertFalse(build_query_fragment.called)
+
+        # Changing the query builds it again.
+        self.sq.add_filter(SQ(content="world"))
+        self.assertEqual(self.sq.build_query(), "((hello) AND (world))")
+        self.sq.add_boost("world", 5)
+        self.assertEqual(self.sq.build_query(), "((hello) AND (world)) world^5")
+
+        clone = self.sq._clone()
+        clone.add_filter(SQ(title="moof"), use_or=True)
+        self.assertEqual(
+            clone.build_query(), "(((hello) AND (world)) OR title:(moof)) world^5"
+        )
+        self.assertEqual(self.sq.build_query(), "((hello) AND (world)) world^5")
+
+        self.sq.query_filter = SQ(content="moof")
+        self.sq.clear_built_query()
+        self.assertEqual(self.sq.build_query(), "(moof) world^5")
+
     def test_correct_exact(self):
         self.sq.add_filter(SQ(content=Exact("hello world")))
         self.assertEqual(self.sq.build_query(), '("hello world")')